@@ -25,6 +25,7 @@ from src.ui.widgets.pet_widget import PetWidget
 from src.ui.widgets.chat_widget import ChatWidget
 from src.ui.widgets.online_chat_widget import OnlineChatWidget
 from src.api.openai_api import OpenAIChat
+from src.api import http_client
 from src.core import config
 from src.ui.screens.transition_screen import TransitionScreen
 
@@ -431,6 +432,9 @@ class IntegratedApplication(QMainWindow):
                 except Exception as e:
                     print(f"❌ 停止API服务器时出错: {e}")
             
+            # 释放共享HTTP连接池
+            http_client.close()
+            
             # 隐藏托盘图标
             if self.tray_icon:
                 self.tray_icon.hide()
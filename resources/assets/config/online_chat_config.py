@@ -1,4 +1,5 @@
 import os
+from collections import OrderedDict
 
 # 获取脚本所在目录作为基础路径
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -12,6 +13,12 @@ HEARTBEAT_INTERVAL = 30000  # 心跳间隔（毫秒）
 RECONNECT_INTERVAL = 5000   # 重连间隔（毫秒）
 AUTO_REFRESH_INTERVAL = 1000  # 自动刷新间隔（毫秒） - 3秒刷新一次，减少频繁刷新
 
+# 推送通道配置（SSE） - 服务器不支持时自动回退到轮询
+CHAT_PUSH_ENABLED = True
+CHAT_PUSH_PATH = "/api/chat/stream"  # 事件流端点
+CHAT_PUSH_READ_TIMEOUT = 90  # 事件流读取超时（秒），服务器应定期发送心跳注释
+CHAT_PUSH_MAX_RECONNECT_INTERVAL = 60000  # 推送通道最大重连间隔（毫秒）
+
 # 文件上传配置
 UPLOAD_MAX_SIZE = 50 * 1024 * 1024  # 最大文件大小 50MB
 UPLOAD_ALLOWED_EXTENSIONS = [
@@ -27,6 +34,13 @@ UPLOAD_ALLOWED_EXTENSIONS = [
     '.mp3', '.wav', '.mp4', '.avi', '.mov', '.mkv'
 ]
 UPLOAD_CHUNK_SIZE = 1024 * 1024  # 分块上传大小 1MB
+UPLOAD_CHUNK_CONCURRENCY = 4  # 同一文件同时上传的数据块数量
+UPLOAD_CHUNK_RETRIES = 3  # 单个数据块失败后的重试次数
+UPLOAD_RETRY_BACKOFF = 0.5  # 重试退避基数（秒）
+UPLOAD_MAX_CONCURRENT = 3  # 上传队列同时上传的文件数量
+UPLOAD_BANDWIDTH_LIMIT = 0  # 上传总带宽上限（字节/秒），0 表示不限制
+UPLOAD_ITEM_RETRIES = 2  # 单个文件上传失败后自动重试次数
+UPLOAD_ITEM_RETRY_DELAY = 2000  # 文件重试的初始等待时间（毫秒），之后每次加倍
 
 # 头像配置 - 使用工程师头像
 ENGINEER_AVATARS_PATH = os.path.join(BASE_DIR, "..", "images", "roles", "engineer")
@@ -58,6 +72,11 @@ USER_LIST_AVATAR_SIZE = (30, 30)
 # 消息配置
 MAX_MESSAGE_LENGTH = 2000  # 最大消息长度
 MESSAGE_HISTORY_LIMIT = 100  # 历史消息加载限制
+CHAT_RENDER_OVERSCAN = 300  # 消息列表在可见区域上下额外创建气泡的范围（像素），其余气泡回收
+CHAT_RENDER_PAGE = 30  # 滚动到列表顶部时一次从本地记录加载的更早消息数量
+CHAT_RENDER_EDGE_THRESHOLD = 50  # 距离顶部多少像素时加载更早的消息
+CHAT_LIST_MAX_RECORDS = 100000  # 消息列表在内存中保留的最多记录数（只保存数据，气泡按可见区域创建）
+CHAT_LIST_TRIM_SLACK = 1000  # 记录数超出上限该值后才移除最早的记录（移除时需要重建行高索引）
 AUTO_SCROLL_DELAY = 100  # 自动滚动延迟（毫秒）
 
 # 界面配置
@@ -108,7 +127,21 @@ LOG_FILE = os.path.join(BASE_DIR, 'logs', 'online_chat.log')  # 日志文件路
 # 缓存配置
 CACHE_DIR = os.path.join(BASE_DIR, 'cache', 'online_chat')
 AVATAR_CACHE_SIZE = 100  # 头像缓存数量
+AVATAR_CACHE_WARMUP = True  # 打开聊天窗口时预先渲染职业头像
+CHAT_IMAGE_MEMORY_CACHE_BYTES = 64 * 1024 * 1024  # 聊天图片内存缓存上限（字节）
+CHAT_IMAGE_REVALIDATE_AFTER = 24 * 3600  # 磁盘缓存图片超过该时间（秒）后向服务器条件验证
+CHAT_IMAGE_DECODE_THREADS = 2  # 图片解码线程数
+CHAT_IMAGE_DOWNLOAD_CONCURRENCY = 4  # 图片同时下载数量上限
 MESSAGE_CACHE_SIZE = 1000  # 消息缓存数量
+UPLOAD_MANIFEST_DIR = os.path.join(CACHE_DIR, 'uploads')  # 分块上传续传清单目录
+UPLOAD_INDEX_NAME = 'upload_index.json'  # 最近上传文件索引文件名（位于CACHE_DIR）
+UPLOAD_INDEX_SIZE = 500  # 最近上传文件索引保留数量
+UPLOAD_INDEX_TTL = 7 * 24 * 3600  # 索引记录有效期（秒），过期后重新向服务器探测
+CHAT_HISTORY_DB_NAME = 'chat_history.db'  # 本地聊天记录数据库文件名（位于CACHE_DIR）
+CHAT_HISTORY_MAX_MESSAGES = 20000  # 每个聊天室本地最多保留的消息数量
+CHAT_HISTORY_PRUNE_SLACK = 1000  # 本地消息数超出保留数量该值后才清理最早的消息
+MESSAGE_SYNC_MAX_PAGES = 50  # 最新一页没有覆盖本地最新消息时，向前补齐遗漏消息的最多请求页数
+MESSAGE_SYNC_POLL_MAX_PAGES = 3  # 定时轮询时向前补齐遗漏消息的最多请求页数
 
 # 创建必要的目录
 os.makedirs(os.path.dirname(LOG_FILE), exist_ok=True)
@@ -195,13 +228,57 @@ def get_avatar_by_profession(profession_name):
     avatar_type = profession_avatar_map.get(profession_name, 'online_user')
     return get_avatar_path(avatar_type)
 
+# 已渲染的圆形头像缓存: (路径, 大小, 设备像素比) -> (文件修改时间, QPixmap)
+_avatar_cache = OrderedDict()
+_avatar_cache_stats = {'hits': 0, 'misses': 0}
+
 def create_rounded_avatar(avatar_path, size=40):
     """
-    创建完美圆形头像
+    创建完美圆形头像（按路径、大小和设备像素比缓存，头像文件修改后自动重新渲染）
     avatar_path: 头像文件路径
     size: 头像大小（像素）
     返回: QPixmap对象
     """
+    from PyQt5.QtGui import QGuiApplication
+    
+    app = QGuiApplication.instance()
+    device_pixel_ratio = app.devicePixelRatio() if app else 1.0
+    key = (avatar_path, size, device_pixel_ratio)
+    try:
+        mtime = os.path.getmtime(avatar_path)
+    except (OSError, TypeError):
+        mtime = None
+    
+    cached = _avatar_cache.get(key)
+    if cached is not None and cached[0] == mtime:
+        _avatar_cache.move_to_end(key)
+        _avatar_cache_stats['hits'] += 1
+        return cached[1]
+    
+    _avatar_cache_stats['misses'] += 1
+    pixmap = _render_rounded_avatar(avatar_path, size, device_pixel_ratio)
+    _avatar_cache[key] = (mtime, pixmap)
+    _avatar_cache.move_to_end(key)
+    while len(_avatar_cache) > AVATAR_CACHE_SIZE:
+        _avatar_cache.popitem(last=False)
+    return pixmap
+
+def warm_avatar_cache(sizes=(40, 30)):
+    """预先渲染已知职业头像，避免首次显示聊天气泡时现场绘制"""
+    avatar_paths = {
+        NETWORK_PLANNING_DESIGNER_AVATAR, NETWORK_PLANNING_AVATAR,
+        SYSTEM_ARCHITECT_AVATAR, SYSTEMS_ANALYST_AVATAR
+    }
+    for avatar_path in avatar_paths:
+        for size in sizes:
+            create_rounded_avatar(avatar_path, size)
+
+def get_avatar_cache_stats():
+    """获取头像缓存命中统计"""
+    return dict(_avatar_cache_stats, size=len(_avatar_cache))
+
+def _render_rounded_avatar(avatar_path, size, device_pixel_ratio=1.0):
+    """绘制圆形头像（按设备像素比渲染，保证高分屏清晰）"""
     from PyQt5.QtGui import QPixmap, QPainter, QBrush, QColor, QPainterPath, QPen
     from PyQt5.QtCore import Qt
     
@@ -215,7 +292,8 @@ def create_rounded_avatar(avatar_path, size=40):
         return create_default_avatar(size)
     
     # 创建目标Pixmap，确保透明背景
-    result_pixmap = QPixmap(size, size)
+    result_pixmap = QPixmap(int(size * device_pixel_ratio), int(size * device_pixel_ratio))
+    result_pixmap.setDevicePixelRatio(device_pixel_ratio)
     result_pixmap.fill(Qt.transparent)
     
     # 创建画师
@@ -242,10 +320,11 @@ def create_rounded_avatar(avatar_path, size=40):
     
     # 缩放并绘制图片
     scaled_pixmap = original_pixmap.scaled(
-        scaled_width, scaled_height, 
+        int(scaled_width * device_pixel_ratio), int(scaled_height * device_pixel_ratio),
         Qt.KeepAspectRatio, 
         Qt.SmoothTransformation
     )
+    scaled_pixmap.setDevicePixelRatio(device_pixel_ratio)
     
     painter.drawPixmap(x_offset, y_offset, scaled_pixmap)
     
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import base64
+import json
+import threading
+import time
+from typing import Optional, Dict, Any, Tuple
+
+import requests
+
+from src.api import http_client
+from src.core import api_config
+
+
+class CachedToken:
+    """缓存的访问令牌及其过期时间"""
+
+    def __init__(self, access_token: str, expires_at: float, user: Optional[Dict[str, Any]] = None):
+        self.access_token = access_token
+        self.expires_at = expires_at
+        self.user = user or {}
+
+    def seconds_left(self) -> float:
+        return self.expires_at - time.time()
+
+
+class AuthManager:
+    """认证管理器 - 缓存 /api/auth/login 返回的令牌，临近过期时通过 /api/auth/refresh 续期"""
+
+    def __init__(self, base_url: str = api_config.API_BASE_URL):
+        """
+        初始化认证管理器
+
+        Args:
+            base_url: 后端API基础URL
+        """
+        self.base_url = base_url.rstrip('/')
+        self._tokens: Dict[Tuple[str, str, str], CachedToken] = {}
+        self._locks: Dict[Tuple[str, str, str], threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        self.stats = {'logins': 0, 'refreshes': 0, 'cache_hits': 0}
+
+    def _key(self, username: str, login_type: str, base_url: Optional[str]) -> Tuple[str, str, str]:
+        return ((base_url or self.base_url).rstrip('/'), username or '', login_type or '')
+
+    def _lock_for(self, key: Tuple[str, str, str]) -> threading.Lock:
+        with self._locks_guard:
+            if key not in self._locks:
+                self._locks[key] = threading.Lock()
+            return self._locks[key]
+
+    @staticmethod
+    def _decode_expiry(access_token: str) -> float:
+        """从JWT的exp声明中读取过期时间，无法解析时使用默认有效期"""
+        try:
+            payload = access_token.split('.')[1]
+            payload += '=' * (-len(payload) % 4)
+            exp = json.loads(base64.urlsafe_b64decode(payload)).get('exp')
+            if exp:
+                return float(exp)
+        except Exception:
+            pass
+        return time.time() + api_config.TOKEN_DEFAULT_LIFETIME
+
+    def _store(self, key: Tuple[str, str, str], token_data: Dict[str, Any]) -> Optional[str]:
+        access_token = token_data.get('access_token')
+        if not access_token:
+            return None
+        self._tokens[key] = CachedToken(access_token, self._decode_expiry(access_token), token_data.get('user'))
+        return access_token
+
+    def _login(self, key: Tuple[str, str, str], password: str) -> Optional[str]:
+        """使用用户名密码登录"""
+        base_url, username, login_type = key
+        login_data = {
+            'login_type': login_type,
+            'username': username,
+            'password': password,
+            'grant_type': 'password'
+        }
+        response = http_client.post(
+            f"{base_url}{api_config.API_ENDPOINTS['login']}",
+            data=login_data,
+            headers={'Content-Type': 'application/x-www-form-urlencoded'},
+            timeout=api_config.REQUEST_TIMEOUT
+        )
+        self.stats['logins'] += 1
+        if response.status_code == 200:
+            print(f"🔐 密码登录成功，用户: {username}")
+            return self._store(key, response.json())
+        print(f"❌ 登录失败: {response.status_code} - {response.text}")
+        return None
+
+    def _refresh(self, key: Tuple[str, str, str], cached: CachedToken) -> Tuple[Optional[str], bool]:
+        """
+        通过refresh_token端点续期
+
+        Returns:
+            (新令牌, 是否需要回退到密码登录)
+        """
+        base_url = key[0]
+        try:
+            response = http_client.post(
+                f"{base_url}{api_config.API_ENDPOINTS['refresh_token']}",
+                headers={'Authorization': f'Bearer {cached.access_token}'},
+                timeout=api_config.REQUEST_TIMEOUT
+            )
+        except requests.exceptions.RequestException as e:
+            print(f"⚠️ 令牌续期请求失败: {str(e)}")
+            return None, False
+        self.stats['refreshes'] += 1
+        if response.status_code == 200:
+            print(f"🔄 令牌已续期，用户: {key[1]}")
+            return self._store(key, response.json()), False
+        if response.status_code == 401:
+            return None, True
+        print(f"⚠️ 令牌续期失败: {response.status_code}")
+        return None, False
+
+    def get_token(self, username: str, password: str, login_type: str,
+                  base_url: Optional[str] = None, force_login: bool = False) -> Optional[str]:
+        """
+        获取有效的访问令牌
+
+        Args:
+            username: 用户名
+            password: 密码（仅在需要密码登录时使用）
+            login_type: 登录类型
+            base_url: 后端API基础URL，默认使用初始化时的地址
+            force_login: 是否忽略缓存强制密码登录（收到401后使用）
+
+        Returns:
+            访问令牌，获取失败返回None
+        """
+        key = self._key(username, login_type, base_url)
+        with self._lock_for(key):
+            cached = self._tokens.get(key)
+            if force_login:
+                self._tokens.pop(key, None)
+                cached = None
+
+            if cached:
+                seconds_left = cached.seconds_left()
+                if seconds_left > api_config.TOKEN_REFRESH_MARGIN:
+                    self.stats['cache_hits'] += 1
+                    return cached.access_token
+                if seconds_left > 0:
+                    token, needs_login = self._refresh(key, cached)
+                    if token:
+                        return token
+                    if not needs_login:
+                        # 续期暂时失败但旧令牌仍然有效，继续使用
+                        return cached.access_token
+                self._tokens.pop(key, None)
+
+            if not password:
+                print(f"⚠️ 缺少密码，无法为用户 {username} 登录")
+                return None
+            try:
+                return self._login(key, password)
+            except requests.exceptions.RequestException as e:
+                print(f"❌ 登录请求异常: {str(e)}")
+                return None
+
+    def invalidate(self, username: str, login_type: str, base_url: Optional[str] = None):
+        """清除指定用户的缓存令牌"""
+        self._tokens.pop(self._key(username, login_type, base_url), None)
+
+    def clear(self):
+        """清除所有缓存令牌"""
+        self._tokens.clear()
+
+    def request(self, method: str, url: str, username: str, password: str, login_type: str,
+                base_url: Optional[str] = None, **kwargs) -> Optional[requests.Response]:
+        """
+        发送带认证的请求，收到401时重新登录并重试一次
+
+        Returns:
+            requests.Response 对象，无法获取令牌时返回None
+        """
+        token = self.get_token(username, password, login_type, base_url)
+        if not token:
+            return None
+        headers = dict(kwargs.pop('headers', None) or {})
+        headers['Authorization'] = f'Bearer {token}'
+        response = http_client.request(method, url, headers=headers, **kwargs)
+        if response.status_code != 401:
+            return response
+
+        print("⚠️ 令牌已失效(401)，重新登录后重试")
+        token = self.get_token(username, password, login_type, base_url, force_login=True)
+        if not token:
+            return response
+        headers['Authorization'] = f'Bearer {token}'
+        return http_client.request(method, url, headers=headers, **kwargs)
+
+
+_default_manager: Optional[AuthManager] = None
+_default_manager_lock = threading.Lock()
+
+
+def get_auth_manager() -> AuthManager:
+    """获取进程级共享的认证管理器"""
+    global _default_manager
+    if _default_manager is None:
+        with _default_manager_lock:
+            if _default_manager is None:
+                _default_manager = AuthManager()
+    return _default_manager
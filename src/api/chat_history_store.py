@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import sqlite3
+import threading
+from typing import List, Dict, Any, Optional
+
+from resources.assets.config import online_chat_config as config
+
+
+class ChatHistoryStore:
+    """聊天记录本地存储 - SQLite(WAL模式)，按聊天室和消息ID保存服务器返回的原始消息"""
+
+    def __init__(self, db_path: Optional[str] = None, max_messages: int = config.CHAT_HISTORY_MAX_MESSAGES,
+                 prune_slack: int = config.CHAT_HISTORY_PRUNE_SLACK):
+        """
+        初始化聊天记录存储
+
+        Args:
+            db_path: 数据库文件路径，默认保存在 CACHE_DIR 下
+            max_messages: 每个聊天室最多保留的消息数量
+            prune_slack: 消息数超出 max_messages 该值后才清理，避免每次保存都执行清理查询
+        """
+        self.db_path = db_path or os.path.join(config.CACHE_DIR, config.CHAT_HISTORY_DB_NAME)
+        self.max_messages = max_messages
+        self.prune_slack = prune_slack
+        self._counts: Dict[str, int] = {}  # 聊天室 -> 消息数量（估计值，不小于实际数量）
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS messages (
+                room_id TEXT NOT NULL,
+                message_id TEXT NOT NULL,
+                created_at TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                PRIMARY KEY (room_id, message_id)
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_messages_room_time ON messages (room_id, created_at)")
+        self._conn.commit()
+
+    def save_messages(self, room_id: str, messages: List[Dict[str, Any]]) -> int:
+        """
+        保存消息（已存在的消息会被更新）
+
+        Returns:
+            写入的消息数量
+        """
+        rows = [
+            (room_id, str(message['id']), message.get('timestamp') or '', json.dumps(message, ensure_ascii=False))
+            for message in messages if message.get('id')
+        ]
+        if not rows:
+            return 0
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO messages (room_id, message_id, created_at, payload) VALUES (?, ?, ?, ?)",
+                rows
+            )
+            if room_id not in self._counts:
+                self._counts[room_id] = self._count(room_id)
+            else:
+                self._counts[room_id] += len(rows)
+            if self._counts[room_id] > self.max_messages + self.prune_slack:
+                self._prune(room_id)
+            self._conn.commit()
+        return len(rows)
+
+    def _count(self, room_id: str) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM messages WHERE room_id = ?", (room_id,)).fetchone()[0]
+
+    def _prune(self, room_id: str):
+        """删除超出保留数量的最早消息"""
+        self._conn.execute("""
+            DELETE FROM messages WHERE room_id = ? AND rowid NOT IN (
+                SELECT rowid FROM messages WHERE room_id = ?
+                ORDER BY created_at DESC, rowid DESC LIMIT ?
+            )
+        """, (room_id, room_id, self.max_messages))
+        self._counts[room_id] = self._count(room_id)
+
+    def load_latest(self, room_id: str, limit: int) -> List[Dict[str, Any]]:
+        """加载最新的消息（与服务器接口一致，最新的在前）"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT payload FROM messages WHERE room_id = ? ORDER BY created_at DESC, rowid DESC LIMIT ?",
+                (room_id, limit)
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def load_before(self, room_id: str, message_id: Any, limit: int) -> List[Dict[str, Any]]:
+        """加载指定消息之前的更早消息（最新的在前），用于向上翻页"""
+        with self._lock:
+            anchor = self._conn.execute(
+                "SELECT created_at, rowid FROM messages WHERE room_id = ? AND message_id = ?",
+                (room_id, str(message_id))
+            ).fetchone()
+            if not anchor:
+                return []
+            rows = self._conn.execute("""
+                SELECT payload FROM messages
+                WHERE room_id = ? AND (created_at < ? OR (created_at = ? AND rowid < ?))
+                ORDER BY created_at DESC, rowid DESC LIMIT ?
+            """, (room_id, anchor[0], anchor[0], anchor[1], limit)).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def delete_message(self, room_id: str, message_id: Any):
+        """删除单条消息"""
+        with self._lock:
+            self._conn.execute("DELETE FROM messages WHERE room_id = ? AND message_id = ?", (room_id, str(message_id)))
+            self._counts.pop(room_id, None)
+            self._conn.commit()
+
+    def clear_room(self, room_id: str):
+        """清空聊天室的本地记录"""
+        with self._lock:
+            self._conn.execute("DELETE FROM messages WHERE room_id = ?", (room_id,))
+            self._counts.pop(room_id, None)
+            self._conn.commit()
+
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import threading
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from src.core import api_config
+
+# 幂等方法可以安全地在网关错误后重试；POST 只在建立连接阶段失败时重试
+IDEMPOTENT_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'])
+
+
+class HTTPClient:
+    """共享HTTP客户端 - 进程内所有后端请求复用同一组 keep-alive 连接池"""
+
+    def __init__(self,
+                 pool_connections: int = api_config.HTTP_POOL_CONNECTIONS,
+                 pool_maxsize: int = api_config.HTTP_POOL_MAXSIZE,
+                 max_retries: int = api_config.HTTP_MAX_RETRIES,
+                 backoff_factor: float = api_config.HTTP_BACKOFF_FACTOR,
+                 timeout: float = api_config.REQUEST_TIMEOUT):
+        """
+        初始化HTTP客户端
+
+        Args:
+            pool_connections: 缓存的主机连接池数量（每个主机一个池）
+            pool_maxsize: 每个主机连接池保持的最大连接数
+            max_retries: 连接失败或网关错误时的最大重试次数
+            backoff_factor: 重试退避系数
+            timeout: 调用方未指定超时时使用的默认超时（秒）
+        """
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.timeout = timeout
+        self._session = None
+        self._lock = threading.Lock()
+
+    def _build_retry(self) -> Retry:
+        """构建重试策略"""
+        retry_kwargs = {
+            'total': self.max_retries,
+            'connect': self.max_retries,
+            'read': 0,  # 读超时不重试，避免重复提交
+            'status': self.max_retries,
+            'backoff_factor': self.backoff_factor,
+            'status_forcelist': api_config.HTTP_RETRY_STATUS_CODES,
+            'raise_on_status': False,  # 重试耗尽后返回最后一次响应，由调用方检查状态码
+        }
+        try:
+            return Retry(allowed_methods=IDEMPOTENT_METHODS, **retry_kwargs)
+        except TypeError:
+            # urllib3 < 1.26 使用旧参数名
+            return Retry(method_whitelist=IDEMPOTENT_METHODS, **retry_kwargs)
+
+    def _create_session(self) -> requests.Session:
+        """创建挂载连接池适配器的会话"""
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            max_retries=self._build_retry()
+        )
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        print(f"🔗 HTTP连接池已创建 (主机池: {self.pool_connections}, 每主机连接: {self.pool_maxsize})")
+        return session
+
+    @property
+    def session(self) -> requests.Session:
+        """获取共享会话（首次访问时创建）"""
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    self._session = self._create_session()
+        return self._session
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        发送HTTP请求
+
+        Args:
+            method: HTTP方法
+            url: 完整请求URL
+            **kwargs: 透传给 requests 的参数，未指定 timeout 时使用默认超时
+
+        Returns:
+            requests.Response 对象
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        return self.session.request(method, url, **kwargs)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request('POST', url, **kwargs)
+
+    def put(self, url: str, **kwargs) -> requests.Response:
+        return self.request('PUT', url, **kwargs)
+
+    def delete(self, url: str, **kwargs) -> requests.Response:
+        return self.request('DELETE', url, **kwargs)
+
+    def close(self):
+        """关闭会话并释放所有连接"""
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+                print("🔌 HTTP连接池已关闭")
+
+
+_default_client: Optional[HTTPClient] = None
+_probe_client: Optional[HTTPClient] = None
+_default_client_lock = threading.Lock()
+
+
+def get_client() -> HTTPClient:
+    """获取进程级共享的HTTP客户端"""
+    global _default_client
+    if _default_client is None:
+        with _default_client_lock:
+            if _default_client is None:
+                _default_client = HTTPClient()
+    return _default_client
+
+
+def get_probe_client() -> HTTPClient:
+    """获取不重试的HTTP客户端（健康检查等探测请求，服务器不可用时应立即失败）"""
+    global _probe_client
+    if _probe_client is None:
+        with _default_client_lock:
+            if _probe_client is None:
+                _probe_client = HTTPClient(pool_connections=1, pool_maxsize=2, max_retries=0)
+    return _probe_client
+
+
+def probe(url: str, **kwargs) -> requests.Response:
+    """发送不重试的GET探测请求"""
+    return get_probe_client().get(url, **kwargs)
+
+
+def request(method: str, url: str, **kwargs) -> requests.Response:
+    return get_client().request(method, url, **kwargs)
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    return get_client().get(url, **kwargs)
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    return get_client().post(url, **kwargs)
+
+
+def put(url: str, **kwargs) -> requests.Response:
+    return get_client().put(url, **kwargs)
+
+
+def delete(url: str, **kwargs) -> requests.Response:
+    return get_client().delete(url, **kwargs)
+
+
+def close():
+    """关闭共享HTTP客户端（应用退出时调用）"""
+    for client in (_default_client, _probe_client):
+        if client is not None:
+            client.close()
@@ -1,5 +1,5 @@
 from PyQt5.QtCore import QObject, pyqtSignal
-import requests
+from src.api import http_client
 import threading
 from src.core import config
 import json
@@ -30,7 +30,7 @@ class OpenAIChat(QObject):
                         'content-Type': 'application/json',
                         'accept': 'application/json'
                     }
-                    resq = requests.post(self.url, headers=headers, json=data, timeout=60)
+                    resq = http_client.post(self.url, headers=headers, json=data, timeout=60)
                     resq.raise_for_status()
                     text = resq.text.strip()
                     if not text:
@@ -69,7 +69,7 @@ class OpenAIChat(QObject):
                 'content-Type': 'application/json',
                 'accept': 'application/json'
             }
-            resq = requests.post(self.url, headers=headers, json=data, timeout=60)
+            resq = http_client.post(self.url, headers=headers, json=data, timeout=60)
             resq.raise_for_status()
             text = resq.text.strip()
             if not text:
@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Any, Optional
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from src.api import http_client
+from src.core import api_config
+
+# 数据至少写入该字节数后刷新到磁盘并更新续传状态
+COMMIT_BYTES = 4 * 1024 * 1024
+
+
+class IncompleteDownloadError(requests.exceptions.RequestException):
+    """下载的字节数与服务器声明的大小不一致"""
+
+
+class _RemoteChanged(Exception):
+    """续传时服务器上的文件已变化（If-Range 校验失败），需要从头下载"""
+
+
+class RangeDownloader:
+    """断点续传下载器 - 数据先写入 .part 文件，支持 Range 的服务器上大文件分段并行下载，中断后从已完成位置继续"""
+
+    def __init__(self, url: str, dest_path: str, headers: Optional[Dict[str, str]] = None,
+                 expected_size: int = 0,
+                 progress_callback: Optional[Callable[[int, int], None]] = None,
+                 segments: int = api_config.DOWNLOAD_SEGMENTS,
+                 max_retries: int = api_config.DOWNLOAD_MAX_RETRIES,
+                 timeout: float = api_config.REQUEST_TIMEOUT):
+        """
+        初始化下载器
+
+        Args:
+            url: 下载地址
+            dest_path: 保存路径（下载过程中使用 dest_path + '.part'）
+            headers: 附加请求头（如认证头）
+            expected_size: 调用方预期的文件大小，仅用于校验提示，0 表示未知
+            progress_callback: 进度回调 (已下载字节, 总字节)，按 DOWNLOAD_PROGRESS_INTERVAL 节流，可能在工作线程中调用
+            segments: 大文件并行下载的最大分段数
+            max_retries: 失败后的重试次数（从断点继续）。http_client 的共享会话对连接失败和 502/503/504
+                还会自行重试 HTTP_MAX_RETRIES 次，两者叠加：单个请求最多尝试
+                (max_retries + 1) * (HTTP_MAX_RETRIES + 1) 次
+            timeout: 单个请求的超时时间（秒）
+        """
+        self.url = url
+        self.dest_path = dest_path
+        self.part_path = dest_path + '.part'
+        self.state_path = dest_path + '.part.json'
+        self.headers = dict(headers or {})
+        # 分段的字节偏移以未压缩内容为准
+        self.headers['Accept-Encoding'] = 'identity'
+        self.expected_size = expected_size
+        self.progress_callback = progress_callback
+        self.segments = max(1, segments)
+        self.max_retries = max_retries
+        self.timeout = timeout
+
+        self.response_headers: CaseInsensitiveDict = CaseInsensitiveDict()
+        self.total_size = 0
+        self.downloaded = 0
+        self._lock = threading.Lock()
+        self._last_report = 0.0
+        self.stats = {'resumed_bytes': 0, 'segments': 0, 'retries': 0, 'elapsed': 0.0}
+
+    def run(self) -> str:
+        """
+        执行下载
+
+        Returns:
+            保存路径
+
+        Raises:
+            requests.exceptions.RequestException: 网络错误、HTTP错误或重试耗尽后内容仍不完整
+            OSError: 文件写入失败
+        """
+        started = time.monotonic()
+        os.makedirs(os.path.dirname(os.path.abspath(self.dest_path)), exist_ok=True)
+        attempt = 0
+        while True:
+            try:
+                self._download_once()
+                break
+            except _RemoteChanged:
+                print("🔄 服务器文件已变化，重新下载")
+                self._discard_partial()
+                error = None
+            except requests.exceptions.HTTPError as e:
+                status = e.response.status_code if e.response is not None else 0
+                if 400 <= status < 500 and status not in (408, 429):
+                    raise
+                error = e
+            except (requests.exceptions.RequestException, OSError) as e:
+                error = e
+
+            attempt += 1
+            if attempt > self.max_retries:
+                if error:
+                    raise error
+                raise IncompleteDownloadError(f"下载未完成: {self.url}")
+            self.stats['retries'] += 1
+            if error:
+                wait_time = api_config.HTTP_BACKOFF_FACTOR * (2 ** attempt)
+                print(f"⚠️ 下载中断，{wait_time:.1f} 秒后从断点继续: {str(error)}")
+                time.sleep(wait_time)
+
+        self._finish()
+        self.stats['elapsed'] = time.monotonic() - started
+        return self.dest_path
+
+    # ---- 下载流程 ----
+
+    def _download_once(self):
+        """执行一轮下载：有续传状态时继续未完成的分段，否则探测服务器并规划分段"""
+        probe_response = None
+        state = self._load_state()
+        if state is None:
+            state, probe_response = self._probe()
+
+        pending = [segment for segment in state['segments'] if not self._segment_complete(segment)]
+        self.stats['segments'] = len(state['segments'])
+        if len(pending) <= 1:
+            for segment in pending:
+                self._download_segment(state, segment, probe_response)
+            return
+
+        # 探测请求返回的数据流直接用作第一个分段
+        first = pending[0] if probe_response is not None else None
+        with ThreadPoolExecutor(max_workers=len(pending)) as executor:
+            futures = [
+                executor.submit(self._download_segment, state, segment,
+                                probe_response if segment is first else None)
+                for segment in pending
+            ]
+            errors = [future.exception() for future in futures]
+        for error in errors:
+            if error is not None:
+                raise error
+
+    def _probe(self):
+        """
+        发送 Range: bytes=0- 请求，根据响应判断是否支持分段下载
+
+        Returns:
+            (下载状态, 可继续读取的响应)
+        """
+        headers = dict(self.headers)
+        headers['Range'] = 'bytes=0-'
+        response = http_client.get(self.url, headers=headers, stream=True, timeout=self.timeout)
+        try:
+            response.raise_for_status()
+        except requests.exceptions.HTTPError:
+            response.close()
+            raise
+        self.response_headers = CaseInsensitiveDict(response.headers)
+
+        content_range = response.headers.get('Content-Range', '')
+        match = re.match(r'bytes\s+\d+-\d+/(\d+)', content_range)
+        if response.status_code == 206 and match:
+            total = int(match.group(1))
+            ranges = True
+        else:
+            total = int(response.headers.get('Content-Length') or 0)
+            ranges = False
+
+        state = {
+            'url': self.url,
+            'total': total,
+            'ranges': ranges,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'content_disposition': response.headers.get('Content-Disposition'),
+            'segments': self._plan_segments(total, ranges)
+        }
+        self.total_size = total
+        self.downloaded = 0
+
+        with open(self.part_path, 'wb') as f:
+            if ranges:
+                f.truncate(total)
+        self._save_state(state)
+        return state, response
+
+    def _plan_segments(self, total: int, ranges: bool):
+        """按文件大小划分下载分段"""
+        if not ranges or total <= 0:
+            return [{'start': 0, 'end': total - 1 if total else None, 'done': 0}]
+        count = max(1, min(self.segments, total // api_config.DOWNLOAD_MIN_SEGMENT_SIZE))
+        size = (total + count - 1) // count
+        return [
+            {'start': start, 'end': min(start + size, total) - 1, 'done': 0}
+            for start in range(0, total, size)
+        ]
+
+    @staticmethod
+    def _segment_complete(segment: Dict[str, Any]) -> bool:
+        if segment['end'] is None:
+            return False
+        return segment['start'] + segment['done'] > segment['end']
+
+    def _download_segment(self, state: Dict[str, Any], segment: Dict[str, Any],
+                          response: Optional[requests.Response] = None):
+        """下载单个分段，写入 .part 文件对应位置"""
+        base_done = segment['done']
+        offset = segment['start'] + base_done
+        if response is None:
+            headers = dict(self.headers)
+            end = '' if segment['end'] is None else segment['end']
+            headers['Range'] = f"bytes={offset}-{end}"
+            validator = state.get('etag') or state.get('last_modified')
+            if validator:
+                headers['If-Range'] = validator
+            response = http_client.get(self.url, headers=headers, stream=True, timeout=self.timeout)
+            if response.status_code == 200 and state['ranges']:
+                response.close()
+                raise _RemoteChanged()
+            try:
+                response.raise_for_status()
+            except requests.exceptions.HTTPError:
+                response.close()
+                raise
+
+        remaining = None if segment['end'] is None else segment['end'] - offset + 1
+        written = 0
+        committed = 0
+        try:
+            with open(self.part_path, 'r+b', buffering=api_config.DOWNLOAD_CHUNK_SIZE) as f:
+                f.seek(offset)
+                for chunk in response.iter_content(chunk_size=api_config.DOWNLOAD_CHUNK_SIZE):
+                    if not chunk:
+                        continue
+                    if remaining is not None:
+                        chunk = chunk[:remaining]
+                        remaining -= len(chunk)
+                    f.write(chunk)
+                    written += len(chunk)
+                    self._advance(len(chunk))
+                    if written - committed >= COMMIT_BYTES:
+                        f.flush()
+                        committed = written
+                        self._commit(state, segment, base_done + written)
+                    if remaining is not None and remaining <= 0:
+                        break
+        finally:
+            response.close()
+            # 文件已关闭（数据已写入），记录实际完成位置
+            self._commit(state, segment, base_done + written)
+
+        if remaining:
+            raise IncompleteDownloadError(
+                f"分段 {segment['start']}-{segment['end']} 未下载完整，缺少 {remaining} 字节"
+            )
+
+    def _finish(self):
+        """校验大小并将 .part 文件重命名为目标文件"""
+        actual_size = os.path.getsize(self.part_path)
+        if self.total_size and actual_size != self.total_size:
+            raise IncompleteDownloadError(f"文件大小不匹配: 服务器声明 {self.total_size}, 实际 {actual_size}")
+        if self.expected_size and actual_size != self.expected_size:
+            print(f"⚠️ 文件大小与预期不符: 预期 {self.expected_size}, 实际 {actual_size}")
+        os.replace(self.part_path, self.dest_path)
+        self._remove(self.state_path)
+        self._report(force=True)
+
+    # ---- 进度与续传状态 ----
+
+    def _advance(self, nbytes: int):
+        with self._lock:
+            self.downloaded += nbytes
+        self._report()
+
+    def _report(self, force: bool = False):
+        """节流后的进度回调"""
+        if not self.progress_callback:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if not force and now - self._last_report < api_config.DOWNLOAD_PROGRESS_INTERVAL:
+                return
+            self._last_report = now
+            downloaded, total = self.downloaded, self.total_size
+        try:
+            self.progress_callback(downloaded, total)
+        except Exception as e:
+            print(f"⚠️ 下载进度回调出错: {str(e)}")
+
+    def _commit(self, state: Dict[str, Any], segment: Dict[str, Any], done: int):
+        with self._lock:
+            segment['done'] = done
+            self._save_state(state)
+
+    def _save_state(self, state: Dict[str, Any]):
+        if not state['ranges']:
+            return  # 服务器不支持Range时无法续传
+        try:
+            temp_path = self.state_path + '.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(state, f)
+            os.replace(temp_path, self.state_path)
+        except OSError as e:
+            print(f"⚠️ 保存下载续传状态失败: {str(e)}")
+
+    def _load_state(self) -> Optional[Dict[str, Any]]:
+        """读取上次未完成下载的状态，与当前下载不匹配时丢弃残留文件"""
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            if (state.get('url') == self.url and state.get('ranges')
+                    and os.path.getsize(self.part_path) == state['total']):
+                self.total_size = state['total']
+                self.response_headers = CaseInsensitiveDict({
+                    name: value for name, value in (('ETag', state.get('etag')),
+                                                    ('Last-Modified', state.get('last_modified')),
+                                                    ('Content-Disposition', state.get('content_disposition'))) if value
+                })
+                self.downloaded = sum(segment['done'] for segment in state['segments'])
+                if self.downloaded and not self.stats['resumed_bytes']:
+                    self.stats['resumed_bytes'] = self.downloaded
+                    print(f"⏩ 断点续传: 已下载 {self.downloaded}/{self.total_size} 字节")
+                return state
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        self._discard_partial()
+        return None
+
+    def _discard_partial(self):
+        self._remove(self.part_path)
+        self._remove(self.state_path)
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def download_file(url: str, dest_path: str, **kwargs) -> str:
+    """下载文件到 dest_path（断点续传、分段并行），返回保存路径"""
+    return RangeDownloader(url, dest_path, **kwargs).run()
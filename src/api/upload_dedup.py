@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+import requests
+
+from resources.assets.config import online_chat_config as config
+from src.api import http_client
+
+
+class UploadIndex:
+    """最近上传文件索引 - 按路径、大小和修改时间记录文件哈希，重复发送同一文件时跳过哈希计算和服务器探测"""
+
+    def __init__(self, index_path: Optional[str] = None,
+                 max_entries: int = config.UPLOAD_INDEX_SIZE,
+                 ttl: int = config.UPLOAD_INDEX_TTL):
+        """
+        初始化上传索引
+
+        Args:
+            index_path: 索引文件路径，默认保存在 CACHE_DIR 下
+            max_entries: 最多保留的记录数量（LRU淘汰）
+            ttl: 记录有效期（秒），过期后重新探测服务器
+        """
+        self.index_path = index_path or os.path.join(config.CACHE_DIR, config.UPLOAD_INDEX_NAME)
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'index_hits': 0, 'probe_hits': 0, 'probe_misses': 0, 'probe_skipped': 0, 'bytes_skipped': 0}
+        self._load()
+
+    @staticmethod
+    def fingerprint(file_path: str) -> str:
+        """文件指纹（绝对路径|大小|修改时间），文件被修改后指纹随之变化"""
+        stat = os.stat(file_path)
+        return f"{os.path.abspath(file_path)}|{stat.st_size}|{stat.st_mtime_ns}"
+
+    def _load(self):
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                for key, entry in json.load(f).items():
+                    self._entries[key] = entry
+        except (OSError, ValueError, AttributeError):
+            pass
+
+    def _save(self):
+        try:
+            os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+            temp_path = self.index_path + '.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._entries, f)
+            os.replace(temp_path, self.index_path)
+        except OSError as e:
+            print(f"⚠️ 保存上传索引失败: {str(e)}")
+
+    def lookup(self, file_path: str) -> Optional[Dict[str, Any]]:
+        """
+        查找最近上传过的文件
+
+        Returns:
+            {'file_hash', 'file_size', 'uploaded_at'}，未上传过或已过期返回None
+        """
+        try:
+            key = self.fingerprint(file_path)
+        except OSError:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if not entry:
+                return None
+            if time.time() - entry.get('uploaded_at', 0) > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return dict(entry)
+
+    def remember(self, file_path: str, file_hash: str, file_size: int):
+        """记录上传成功的文件"""
+        try:
+            key = self.fingerprint(file_path)
+        except OSError:
+            return
+        with self._lock:
+            self._entries[key] = {'file_hash': file_hash, 'file_size': file_size, 'uploaded_at': time.time()}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._save()
+
+    def forget(self, file_path: str):
+        """移除记录（服务器上的文件已不存在时调用）"""
+        try:
+            key = self.fingerprint(file_path)
+        except OSError:
+            return
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self._save()
+
+    def record(self, name: str, amount: int = 1):
+        """累加去重统计"""
+        with self._lock:
+            self.stats[name] += amount
+
+    def get_stats(self) -> Dict[str, int]:
+        """获取去重统计（索引命中/探测命中/探测未命中/服务器不支持而跳过/节省的上传字节数）"""
+        with self._lock:
+            return dict(self.stats, entries=len(self._entries))
+
+
+# 没有 /exists 接口的上传地址（本次运行内不再探测和发送引用）
+_unsupported_urls = set()
+_unsupported_lock = threading.Lock()
+
+
+def dedup_supported(upload_url: str) -> bool:
+    """上传地址是否可能支持去重（尚未发现 /exists 接口缺失）"""
+    with _unsupported_lock:
+        return upload_url not in _unsupported_urls
+
+
+def probe_blob(upload_url: str, file_hash: str, file_size: int, headers: Dict[str, str]) -> bool:
+    """
+    询问服务器是否已有相同哈希和大小的文件，接口不可用时按不存在处理
+
+    /exists 和 /reference 不在 API.json 中，服务器返回404/405时记住该上传地址不支持去重，
+    之后重复发送时不再探测
+    """
+    if not dedup_supported(upload_url):
+        return False
+    try:
+        response = http_client.get(
+            f"{upload_url}/exists",
+            params={'file_hash': file_hash, 'file_size': file_size},
+            headers=headers,
+            timeout=config.CHAT_API_TIMEOUT
+        )
+        if response.status_code == 200:
+            return bool(response.json().get('exists'))
+        if response.status_code in (404, 405):
+            with _unsupported_lock:
+                _unsupported_urls.add(upload_url)
+            print(f"ℹ️ 服务器不支持文件去重探测，本次运行不再探测: {upload_url}")
+    except (requests.exceptions.RequestException, ValueError, AttributeError) as e:
+        print(f"⚠️ 文件去重探测失败: {str(e)}")
+    return False
+
+
+def send_reference(upload_url: str, file_hash: str, file_size: int, filename: str,
+                   headers: Dict[str, str], **extra) -> Optional[Dict[str, Any]]:
+    """
+    引用服务器上已有的文件（不上传文件内容）
+
+    Args:
+        extra: 附加字段，例如 room_id
+
+    Returns:
+        服务器返回的上传结果（与普通上传一致），服务器上已没有该文件时返回None
+    """
+    payload = {'file_hash': file_hash, 'file_size': file_size, 'filename': filename}
+    payload.update(extra)
+    try:
+        response = http_client.post(
+            f"{upload_url}/reference",
+            json=payload,
+            headers=headers,
+            timeout=config.CHAT_API_TIMEOUT
+        )
+        if response.status_code == 200:
+            return response.json()
+        print(f"⚠️ 引用已上传文件失败: HTTP {response.status_code}")
+    except (requests.exceptions.RequestException, ValueError) as e:
+        print(f"⚠️ 引用已上传文件失败: {str(e)}")
+    return None
+
+
+_default_index: Optional[UploadIndex] = None
+_default_index_lock = threading.Lock()
+
+
+def get_upload_index() -> UploadIndex:
+    """获取进程级共享的上传索引"""
+    global _default_index
+    if _default_index is None:
+        with _default_index_lock:
+            if _default_index is None:
+                _default_index = UploadIndex()
+    return _default_index
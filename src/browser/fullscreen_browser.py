@@ -8,6 +8,7 @@ import tempfile
 import platform
 import shutil
 import requests
+from requests.structures import CaseInsensitiveDict
 import logging
 from urllib.parse import unquote, quote
 import re
@@ -45,6 +46,9 @@ except ImportError:
             def show(self):
                 pass
 
+from src.api.range_downloader import RangeDownloader
+from src.browser.pdf_cache import PDFCache
+
 # 禁用Flask的默认日志输出
 log = logging.getLogger('werkzeug')
 log.setLevel(logging.ERROR)
@@ -129,9 +133,20 @@ class APIServer(QObject):
             "network_errors": 0,
             "file_errors": 0,
             "access_denied": 0,
-            "unexpected_auth_errors": 0
+            "unexpected_auth_errors": 0,
+            "cache_hits": 0,
+            "cache_misses": 0,
+            "cache_revalidations": 0,
+            "bytes_saved": 0
         }
         
+        # PDF本地缓存
+        try:
+            self.pdf_cache = PDFCache()
+        except OSError as e:
+            print(f"⚠️ PDF缓存不可用: {str(e)}")
+            self.pdf_cache = None
+        
         # 配置日志
         self.setup_logging()
         
@@ -667,81 +682,78 @@ class APIServer(QObject):
             self.update_download_stats("failed_downloads")
             return "unknown_error"
     
-    def download_with_retry(self, download_url, local_path, file_size, max_retries=3):
-        """带重试机制的下载函数"""
+    def download_with_retry(self, download_url, local_path, file_size, max_retries=3, response_headers=None):
+        """
+        带重试机制的下载函数
+        
+        HTTP下载先写入 .part 文件，失败后通过 Range 请求从断点继续，大文件分段并行下载
+        
+        Args:
+            response_headers: 传入字典（CaseInsensitiveDict）时填充服务器响应头（用于缓存验证信息）
+        
+        Returns:
+            下载后的本地路径（服务器通过Content-Disposition提供文件名时可能与local_path不同）
+        """
         from urllib.parse import urlparse
         parsed_url = urlparse(download_url)
         
-        for attempt in range(max_retries):
-            try:
-                print(f"🔄 下载尝试 {attempt + 1}/{max_retries}")
-                self.logger.info(f"下载尝试 {attempt + 1}/{max_retries}: {download_url}")
+        try:
+            self.logger.info(f"开始下载: {download_url}")
+            
+            if parsed_url.scheme == 'file':
+                # 本地文件协议，直接复制文件
+                source_path = parsed_url.path
+                print(f"📁 本地文件复制: {source_path} -> {local_path}")
                 
-                if parsed_url.scheme == 'file':
-                    # 本地文件协议，直接复制文件
-                    source_path = parsed_url.path
-                    print(f"📁 本地文件复制: {source_path} -> {local_path}")
-                    
-                    shutil.copy2(source_path, local_path)
-                    downloaded_size = os.path.getsize(local_path)
-                    
-                else:
-                    # HTTP/HTTPS协议，下载文件
-                    response = requests.get(download_url, stream=True, timeout=30)
-                    response.raise_for_status()
-                    
-                    # 尝试从Content-Disposition头中获取文件名
-                    content_disposition = response.headers.get('content-disposition', '')
-                    if content_disposition:
-                        server_filename = self.extract_filename_from_content_disposition(content_disposition)
-                        if server_filename:
-                            # 使用服务器提供的文件名更新本地路径
-                            server_filename = self.sanitize_filename(server_filename)
-                            local_dir = os.path.dirname(local_path)
-                            local_path = os.path.join(local_dir, server_filename)
-                            print(f"📋 服务器文件名: {server_filename}")
-                            self.logger.info(f"使用服务器文件名: {server_filename}")
-                    
-                    # 检查文件大小
-                    content_length = response.headers.get('content-length')
-                    if content_length and int(content_length) != file_size:
-                        print(f"⚠️ 文件大小不匹配: 预期 {file_size}, 实际 {content_length}")
-                    
-                    # 保存到本地
-                    downloaded_size = 0
-                    with open(local_path, 'wb') as f:
-                        for chunk in response.iter_content(chunk_size=8192):
-                            f.write(chunk)
-                            downloaded_size += len(chunk)
-                            
-                            # 显示下载进度
-                            if file_size > 0:
-                                progress = (downloaded_size / file_size) * 100
-                                print(f"📊 下载进度: {progress:.1f}%", end='\r')
+                shutil.copy2(source_path, local_path)
                 
-                print(f"\n✅ 下载成功！文件大小: {downloaded_size} bytes")
-                self.logger.info(f"下载成功: {local_path}, 大小: {downloaded_size} bytes")
-                return True
+            else:
+                # HTTP/HTTPS协议，下载文件
+                def print_progress(downloaded, total):
+                    total = total or file_size
+                    if total > 0:
+                        print(f"📊 下载进度: {downloaded * 100 / total:.1f}%", end='\r')
                 
-            except requests.exceptions.RequestException as e:
-                error_type = self.handle_download_error(e, None)
+                downloader = RangeDownloader(
+                    download_url, local_path,
+                    expected_size=file_size,
+                    progress_callback=print_progress,
+                    max_retries=max_retries - 1
+                )
+                downloader.run()
+                if response_headers is not None:
+                    response_headers.update(downloader.response_headers)
+                if downloader.stats['resumed_bytes']:
+                    self.logger.info(f"断点续传: 复用已下载的 {downloader.stats['resumed_bytes']} bytes")
                 
-                if attempt < max_retries - 1:
-                    wait_time = (attempt + 1) * 2  # 递增等待时间：2秒、4秒、6秒
-                    print(f"⏳ 等待 {wait_time} 秒后重试...")
-                    time.sleep(wait_time)
-                else:
-                    print(f"❌ 所有下载尝试均失败")
-                    self.logger.error(f"所有下载尝试均失败: {str(e)}")
-                    raise e
-            except Exception as e:
-                print(f"❌ 下载过程中出现意外错误: {str(e)}")
-                self.logger.error(f"下载意外错误: {str(e)}")
-                if attempt == max_retries - 1:
-                    raise e
-                time.sleep(2)
-        
-        return False
+                # 尝试从Content-Disposition头中获取文件名
+                content_disposition = downloader.response_headers.get('Content-Disposition', '')
+                if content_disposition:
+                    server_filename = self.extract_filename_from_content_disposition(content_disposition)
+                    if server_filename:
+                        # 使用服务器提供的文件名更新本地路径
+                        server_filename = self.sanitize_filename(server_filename)
+                        server_path = os.path.join(os.path.dirname(local_path), server_filename)
+                        if server_path != local_path:
+                            os.replace(local_path, server_path)
+                            local_path = server_path
+                        print(f"📋 服务器文件名: {server_filename}")
+                        self.logger.info(f"使用服务器文件名: {server_filename}")
+            
+            downloaded_size = os.path.getsize(local_path)
+            print(f"\n✅ 下载成功！文件大小: {downloaded_size} bytes")
+            self.logger.info(f"下载成功: {local_path}, 大小: {downloaded_size} bytes")
+            return local_path
+            
+        except requests.exceptions.RequestException as e:
+            self.handle_download_error(e, None)
+            print(f"❌ 所有下载尝试均失败")
+            self.logger.error(f"所有下载尝试均失败: {str(e)}")
+            raise e
+        except Exception as e:
+            print(f"❌ 下载过程中出现意外错误: {str(e)}")
+            self.logger.error(f"下载意外错误: {str(e)}")
+            raise e
     
     def download_and_open_pdf(self, pdf_data):
         """下载并打开PDF文件 - 增强版本，支持token验证和重试机制"""
@@ -790,6 +802,21 @@ class APIServer(QObject):
                 self.update_download_stats("failed_downloads")
                 return
             
+            # 优先使用本地缓存（本地文件协议无需缓存）
+            use_cache = self.pdf_cache is not None and download_url.startswith(('http://', 'https://'))
+            if use_cache:
+                cached = self.pdf_cache.lookup(download_url, file_size)
+                if cached:
+                    print(f"⚡ 命中PDF缓存: {cached['path']}")
+                    self.logger.info(f"命中PDF缓存: {filename}")
+                    self.download_stats["bytes_saved"] += cached['size']
+                    if cached['revalidated']:
+                        self.download_stats["cache_revalidations"] += 1
+                    self.open_pdf_file(cached['path'])
+                    self.update_download_stats("cache_hits")
+                    return
+                self.download_stats["cache_misses"] += 1
+            
             # 创建临时目录
             temp_dir = os.path.join(tempfile.gettempdir(), 'ACO_PDF_Preview')
             os.makedirs(temp_dir, exist_ok=True)
@@ -801,7 +828,16 @@ class APIServer(QObject):
             print(f"   💾 保存路径: {local_path}")
             
             # 使用带重试机制的下载
-            if self.download_with_retry(download_url, local_path, file_size):
+            response_headers = CaseInsensitiveDict()
+            downloaded_path = self.download_with_retry(download_url, local_path, file_size,
+                                                       response_headers=response_headers)
+            if downloaded_path:
+                local_path = downloaded_path
+                if use_cache:
+                    try:
+                        local_path = self.pdf_cache.store(download_url, local_path, response_headers)
+                    except OSError as e:
+                        print(f"⚠️ 写入PDF缓存失败: {str(e)}")
                 # 验证下载的文件
                 actual_size = os.path.getsize(local_path)
                 if file_size > 0 and actual_size != file_size:
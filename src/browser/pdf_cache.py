@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from typing import Dict, Any, Optional
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from src.api import http_client
+from src.core import api_config
+
+
+class PDFCache:
+    """PDF本地缓存 - 按下载URL索引，文件按内容哈希存放；超出容量时按最近访问时间淘汰"""
+
+    def __init__(self, cache_dir: str = api_config.PDF_CACHE_DIR,
+                 max_bytes: int = api_config.PDF_CACHE_MAX_BYTES,
+                 fresh_seconds: int = api_config.PDF_CACHE_FRESH_SECONDS):
+        """
+        初始化PDF缓存
+
+        Args:
+            cache_dir: 缓存目录
+            max_bytes: 缓存文件总大小上限
+            fresh_seconds: 验证后在该秒数内直接使用缓存，不再请求服务器
+        """
+        self.cache_dir = cache_dir
+        self.index_path = os.path.join(cache_dir, 'index.json')
+        self.max_bytes = max_bytes
+        self.fresh_seconds = fresh_seconds
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self._entries: Dict[str, Dict[str, Any]] = self._load_index()
+
+    def _load_index(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_index(self):
+        try:
+            temp_path = self.index_path + '.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._entries, f, ensure_ascii=False)
+            os.replace(temp_path, self.index_path)
+        except OSError as e:
+            print(f"⚠️ 保存PDF缓存索引失败: {str(e)}")
+
+    def _entry_path(self, entry: Dict[str, Any]) -> str:
+        return os.path.join(self.cache_dir, entry['hash'][:16], entry['filename'])
+
+    def lookup(self, url: str, expected_size: int = 0) -> Optional[Dict[str, Any]]:
+        """
+        查找缓存并在需要时向服务器条件验证
+
+        Args:
+            url: 下载URL
+            expected_size: 请求中携带的文件大小，与缓存不一致时视为已变化
+
+        Returns:
+            {'path', 'size', 'revalidated'}，未命中或服务器文件已变化时返回None
+        """
+        with self._lock:
+            entry = self._entries.get(url)
+            entry = dict(entry) if entry else None
+        if not entry:
+            return None
+        path = self._entry_path(entry)
+        if not os.path.exists(path) or (expected_size and expected_size != entry['size']):
+            self.remove(url)
+            return None
+
+        revalidated = False
+        if time.time() - entry.get('validated_at', 0) > self.fresh_seconds:
+            result = self._revalidate(url, entry)
+            if result == 'modified':
+                print("🔄 服务器上的PDF已更新，重新下载")
+                self.remove(url)
+                return None
+            revalidated = result == 'not_modified'
+
+        with self._lock:
+            current = self._entries.get(url)
+            if current:
+                current['last_access'] = time.time()
+                if revalidated:
+                    current['validated_at'] = time.time()
+                self._save_index()
+        return {'path': path, 'size': entry['size'], 'revalidated': revalidated}
+
+    def _revalidate(self, url: str, entry: Dict[str, Any]) -> str:
+        """
+        条件请求验证缓存
+
+        Returns:
+            'not_modified' / 'modified' / 'error'（网络错误时继续使用缓存）
+        """
+        headers = {'Accept-Encoding': 'identity'}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        if len(headers) == 1:
+            return self._compare_size(url, entry)  # 服务器没有提供验证信息，按文件大小判断
+        try:
+            response = http_client.get(url, headers=headers, stream=True, timeout=api_config.REQUEST_TIMEOUT)
+            response.close()
+        except requests.exceptions.RequestException as e:
+            print(f"⚠️ PDF缓存验证失败，使用本地缓存: {str(e)}")
+            return 'error'
+        if response.status_code == 304:
+            return 'not_modified'
+        if response.status_code == 200:
+            etag = response.headers.get('ETag')
+            if etag and etag == entry.get('etag'):
+                return 'not_modified'
+            return 'modified'
+        print(f"⚠️ PDF缓存验证返回 HTTP {response.status_code}，使用本地缓存")
+        return 'error'
+
+    def _compare_size(self, url: str, entry: Dict[str, Any]) -> str:
+        """
+        没有 ETag/Last-Modified 时的验证：比较服务器声明的文件大小和修改时间
+
+        Returns:
+            'not_modified' / 'modified' / 'error'（无法判断时继续使用缓存）
+        """
+        try:
+            response = http_client.get(url, headers={'Accept-Encoding': 'identity'}, stream=True,
+                                       timeout=api_config.REQUEST_TIMEOUT)
+            response.close()
+        except requests.exceptions.RequestException as e:
+            print(f"⚠️ PDF缓存验证失败，使用本地缓存: {str(e)}")
+            return 'error'
+        if response.status_code != 200:
+            print(f"⚠️ PDF缓存验证返回 HTTP {response.status_code}，使用本地缓存")
+            return 'error'
+        size = response.headers.get('Content-Length')
+        if size is None or not size.isdigit():
+            return 'error'
+        if int(size) != entry['size']:
+            return 'modified'
+        last_modified = response.headers.get('Last-Modified')
+        if last_modified and entry.get('last_modified') and last_modified != entry['last_modified']:
+            return 'modified'
+        return 'not_modified'
+
+    def store(self, url: str, file_path: str, response_headers: Optional[Dict[str, str]] = None) -> str:
+        """
+        将下载完成的文件移入缓存
+
+        Returns:
+            缓存中的文件路径
+        """
+        response_headers = CaseInsensitiveDict(response_headers or {})
+        content_hash = self._hash_file(file_path)
+        entry = {
+            'hash': content_hash,
+            'filename': os.path.basename(file_path),
+            'size': os.path.getsize(file_path),
+            'etag': response_headers.get('ETag'),
+            'last_modified': response_headers.get('Last-Modified'),
+            'validated_at': time.time(),
+            'last_access': time.time()
+        }
+        path = self._entry_path(entry)
+        with self._lock:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            if os.path.abspath(path) != os.path.abspath(file_path):
+                os.replace(file_path, path)
+            self._entries[url] = entry
+            self._evict(keep=url)
+            self._save_index()
+        return path
+
+    def remove(self, url: str):
+        """移除URL对应的缓存记录（没有其他记录引用时删除文件）"""
+        with self._lock:
+            entry = self._entries.pop(url, None)
+            if entry:
+                self._delete_unreferenced(entry)
+                self._save_index()
+
+    def _evict(self, keep: str):
+        """按最近访问时间淘汰，直到总大小不超过上限"""
+        total = self._total_bytes()
+        for url, entry in sorted(self._entries.items(), key=lambda item: item[1].get('last_access', 0)):
+            if total <= self.max_bytes:
+                break
+            if url == keep:
+                continue
+            del self._entries[url]
+            if self._delete_unreferenced(entry):
+                total -= entry['size']
+            print(f"🗑️ PDF缓存已淘汰: {entry['filename']}")
+
+    def _total_bytes(self) -> int:
+        files = {self._entry_path(entry): entry['size'] for entry in self._entries.values()}
+        return sum(files.values())
+
+    def _delete_unreferenced(self, entry: Dict[str, Any]) -> bool:
+        path = self._entry_path(entry)
+        if any(self._entry_path(other) == path for other in self._entries.values()):
+            return False
+        try:
+            os.remove(path)
+            if not os.listdir(os.path.dirname(path)):
+                shutil.rmtree(os.path.dirname(path), ignore_errors=True)
+        except OSError:
+            pass
+        return True
+
+    @staticmethod
+    def _hash_file(file_path: str) -> str:
+        content_hash = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(api_config.DOWNLOAD_CHUNK_SIZE), b''):
+                content_hash.update(chunk)
+        return content_hash.hexdigest()
@@ -3,6 +3,7 @@
 
 import json
 import os
+import tempfile
 
 # API 基础URL
 API_BASE_URL = "http://172.18.122.8:8000"
@@ -111,4 +112,38 @@ TASK_STATUS = {
 }
 
 # HTTP 请求超时设置（秒）
-REQUEST_TIMEOUT = 30 
\ No newline at end of file
+REQUEST_TIMEOUT = 30
+
+# HTTP 连接池配置（所有后端请求共享同一个会话，复用 keep-alive 连接）
+HTTP_POOL_CONNECTIONS = 10  # 缓存的主机连接池数量
+HTTP_POOL_MAXSIZE = 20      # 每个主机连接池的最大连接数
+HTTP_MAX_RETRIES = 3        # 连接失败/网关错误时的最大重试次数
+HTTP_BACKOFF_FACTOR = 0.5   # 重试退避系数（0.5s, 1s, 2s ...）
+HTTP_RETRY_STATUS_CODES = (502, 503, 504)  # 幂等请求遇到这些状态码时重试
+
+# 访问令牌缓存配置
+TOKEN_DEFAULT_LIFETIME = 30 * 60  # 无法从JWT解析过期时间时的默认有效期（秒）
+TOKEN_REFRESH_MARGIN = 120        # 距离过期不足该秒数时通过 refresh_token 续期
+
+# 文件下载配置（断点续传 + 分段并行下载）
+DOWNLOAD_SEGMENTS = 4                       # 大文件并行下载的分段数量
+DOWNLOAD_MIN_SEGMENT_SIZE = 2 * 1024 * 1024  # 每个分段的最小字节数，小于该值的文件单连接下载
+DOWNLOAD_CHUNK_SIZE = 256 * 1024            # 每次读取并写入磁盘的字节数
+DOWNLOAD_MAX_RETRIES = 3                    # 下载失败后的重试次数（从断点继续）
+DOWNLOAD_PROGRESS_INTERVAL = 0.25           # 进度回调的最小间隔（秒）
+
+# PDF预览缓存配置
+PDF_CACHE_DIR = os.path.join(tempfile.gettempdir(), 'ACO_PDF_Preview', 'cache')  # 缓存目录
+PDF_CACHE_MAX_BYTES = 500 * 1024 * 1024  # 缓存总大小上限，超出后按最近访问时间淘汰
+PDF_CACHE_FRESH_SECONDS = 300            # 验证后在该时间（秒）内直接打开缓存，之后先向服务器条件验证
+PDF_TEXT_INDEX_DIR = os.path.join(tempfile.gettempdir(), 'ACO_PDF_Preview', 'text_index')  # PDF全文索引目录（按文件内容哈希命名）
+
+# 轮询调度配置（毫秒）
+TASK_DISPLAY_INTERVAL = 10000         # 任务显示同步间隔
+TASK_REFRESH_INTERVAL = 15000         # 任务数据刷新间隔
+TASK_REFRESH_FAST_INTERVAL = 3000     # 用户操作后的快速刷新间隔
+TASK_REFRESH_MAX_INTERVAL = 5 * 60000  # 连续失败后的最大退避间隔
+TASK_REFRESH_BOOST_DURATION = 60000   # 用户操作后保持快速刷新的时长
+API_CHECK_INTERVAL = 60000            # API状态检查间隔
+API_CHECK_MAX_INTERVAL = 10 * 60000   # API状态检查最大退避间隔
+POLL_JITTER = 0.2                     # 轮询间隔随机抖动比例（±20%）
@@ -14,7 +14,7 @@ from PyQt5.QtWidgets import (QApplication, QWidget, QHBoxLayout, QVBoxLayout,
                              QTextEdit, QFileDialog, QTabWidget, QTableWidget,
                              QTableWidgetItem, QHeaderView, QProgressBar, QGraphicsDropShadowEffect,
                              QGridLayout, QListWidget, QSpinBox)
-from PyQt5.QtCore import Qt, QTimer, QTime, pyqtSignal, QPoint, QPropertyAnimation, QEasingCurve, QFileSystemWatcher, QThread, pyqtSlot, QSize
+from PyQt5.QtCore import Qt, QEvent, QTimer, QTime, pyqtSignal, QPoint, QPropertyAnimation, QEasingCurve, QFileSystemWatcher, QThread, pyqtSlot, QSize
 from PyQt5.QtGui import QFont, QIcon, QPixmap, QPainter, QColor, QLinearGradient
 from src.core import config
 from src.ui.widgets.pet_widget import PetWidget
@@ -24,15 +24,22 @@ from src.ui.screens.transition_screen import TransitionScreen
 from src.api.openai_api import OpenAIChat
 from src.ui.widgets.tuopo_widget import TuopoWidget
 from src.core import api_config
+from src.api import http_client
+from src.api.auth_manager import get_auth_manager
+from src.desktop.poll_scheduler import PollScheduler
 import logging
 import time
 from datetime import datetime
 import re
 import threading
+import hashlib
 
 # PDF处理相关导入
 try:
     import fitz  # PyMuPDF
+    from src.ui.widgets.pdf_render_engine import (PDFRenderEngine, PDFPageCanvas, PDFContinuousCanvas,
+                                                  TILE_SIZE, ZOOM_RENDER_DELAY, zoom_key)
+    from src.ui.widgets.pdf_text_index import get_text_index, normalize_query
     PYMUPDF_AVAILABLE = True
 except ImportError:
     print("⚠️ PyMuPDF库未找到，PDF预览功能将受限")
@@ -521,80 +528,96 @@ class APIClient:
         self.base_url = base_url.rstrip('/')
         self.session = None
         self.access_token = None
+        self.auth_manager = get_auth_manager()
+        self.credentials = None
+        self.task_validators = {}  # 条件请求验证器: (用户名, 登录类型, 状态) -> {'etag', 'last_modified'}
+        self.not_modified = False  # 最近一次条件请求是否返回304
     
     def authenticate(self, username, password, user_type=None, operator_type=None):
-        """用户认证"""
+        """用户认证 - 优先使用缓存的令牌，临近过期时续期，只有必要时才密码登录"""
         try:
-            import requests
-            
             # 根据operator_type或user_type确定登录类型
             # operator_type优先，因为它更准确地反映了用户的操作员类型
             login_type = operator_type or user_type or '操作员'  # 默认使用"操作员"而不是"password"
             
-            # 准备登录数据
-            login_data = {
-                'login_type': login_type,
-                'username': username,
-                'password': password,
-                'grant_type': 'password'  # grant_type始终为password
-            }
-            
-            # 发送登录请求
-            response = requests.post(
-                f"{self.base_url}/api/auth/login",
-                data=login_data,
-                headers={'Content-Type': 'application/x-www-form-urlencoded'},
-                timeout=10
-            )
+            self.credentials = (username, password, login_type)
+            self.access_token = self.auth_manager.get_token(username, password, login_type, self.base_url)
             
-            if response.status_code == 200:
-                token_data = response.json()
-                self.access_token = token_data.get('access_token')
+            if self.access_token:
                 print(f"✅ API认证成功，用户: {username}")
                 return True
             else:
-                print(f"❌ API认证失败: {response.status_code} - {response.text}")
+                print(f"❌ API认证失败，用户: {username}")
                 return False
                 
         except Exception as e:
             print(f"❌ API认证异常: {str(e)}")
             return False
     
-    def get_my_tasks(self, status=None):
-        """获取当前用户的任务"""
+    def _authorized_get(self, path, params=None, headers=None):
+        """发送带认证的GET请求，令牌失效(401)时自动重新登录并重试"""
+        username, password, login_type = self.credentials
+        request_headers = {'Content-Type': 'application/json'}
+        request_headers.update(headers or {})
+        return self.auth_manager.request(
+            'GET',
+            f"{self.base_url}{path}",
+            username, password, login_type, self.base_url,
+            headers=request_headers,
+            params=params,
+            timeout=10
+        )
+    
+    def get_my_tasks(self, status=None, conditional=False):
+        """
+        获取当前用户的任务
+        
+        conditional为True时携带上次响应的ETag/Last-Modified发送条件请求，
+        服务器返回304时不下载任务列表，返回None并将not_modified置为True
+        """
         try:
-            import requests
+            self.not_modified = False
             
             if not self.access_token:
                 print("❌ 未认证，无法获取任务")
                 return []
             
-            # 准备请求头
-            headers = {
-                'Authorization': f'Bearer {self.access_token}',
-                'Content-Type': 'application/json'
-            }
-            
             # 准备查询参数
             params = {}
             if status:
                 params['status'] = status
             
+            # 准备条件请求头
+            validator_key = (self.credentials[0], self.credentials[2], status)
+            headers = {}
+            if conditional:
+                validators = self.task_validators.get(validator_key, {})
+                if validators.get('etag'):
+                    headers['If-None-Match'] = validators['etag']
+                if validators.get('last_modified'):
+                    headers['If-Modified-Since'] = validators['last_modified']
+            
             # 发送请求
-            response = requests.get(
-                f"{self.base_url}/api/my-tasks",
-                headers=headers,
-                params=params,
-                timeout=10
-            )
+            response = self._authorized_get("/api/my-tasks", params=params, headers=headers)
             
-            if response.status_code == 200:
+            if response is not None and response.status_code == 304:
+                self.not_modified = True
+                print("📭 任务列表未变化 (304)")
+                return None
+            elif response is not None and response.status_code == 200:
                 tasks = response.json()
+                self.task_validators[validator_key] = {
+                    'etag': response.headers.get('ETag'),
+                    'last_modified': response.headers.get('Last-Modified')
+                }
                 print(f"✅ 成功获取 {len(tasks)} 个任务")
                 return tasks
-            else:
+            elif response is not None:
                 print(f"❌ 获取任务失败: {response.status_code} - {response.text}")
                 return []
+            else:
+                print("❌ 获取任务失败: 无法获取访问令牌")
+                return []
                 
         except Exception as e:
             print(f"❌ 获取任务异常: {str(e)}")
@@ -603,29 +626,18 @@ class APIClient:
     def get_user_task_stats(self, user_id):
         """获取用户任务统计"""
         try:
-            import requests
-            
             if not self.access_token:
                 print("❌ 未认证，无法获取任务统计")
                 return {}
             
-            headers = {
-                'Authorization': f'Bearer {self.access_token}',
-                'Content-Type': 'application/json'
-            }
-            
-            response = requests.get(
-                f"{self.base_url}/api/users/{user_id}/task-stats",
-                headers=headers,
-                timeout=10
-            )
+            response = self._authorized_get(f"/api/users/{user_id}/task-stats")
             
-            if response.status_code == 200:
+            if response is not None and response.status_code == 200:
                 stats = response.json()
                 print(f"✅ 成功获取用户任务统计")
                 return stats
             else:
-                print(f"❌ 获取任务统计失败: {response.status_code}")
+                print(f"❌ 获取任务统计失败: {response.status_code if response is not None else '无令牌'}")
                 return {}
                 
         except Exception as e:
@@ -1740,15 +1752,37 @@ class TaskSelectionDialog(QDialog):
 
 
 class PDFPreviewDialog(QDialog):
-    """PDF预览和下载对话框 - 使用PyMuPDF渲染图像"""
+    """PDF预览和下载对话框 - 使用PyMuPDF在后台线程渲染图像"""
     
-    def __init__(self, pdf_path, role_name, parent=None):
+    def __init__(self, pdf_path, role_name, parent=None, manuals=None):
+        """
+        Args:
+            manuals: 可选，所有角色的汇报文档 {角色名称: PDF路径}，用于跨手册搜索
+        """
         super().__init__(parent)
         self.pdf_path = pdf_path
         self.role_name = role_name
+        self.manuals = manuals or {}
         self.current_page = 0
         self.total_pages = 0
         self.pdf_doc = None
+        self.render_engine = None
+        self.page_canvas = None
+        self.continuous_canvas = None  # 连续滚动模式的画布（首次切换时创建）
+        # 连续缩放时延迟渲染，只渲染最终的缩放比例
+        self.zoom_render_timer = QTimer(self)
+        self.zoom_render_timer.setSingleShot(True)
+        self.zoom_render_timer.setInterval(ZOOM_RENDER_DELAY)
+        self.zoom_render_timer.timeout.connect(self.render_current_page)
+        # 全文搜索：结果为 [(角色名称, PDF路径, 页码, 高亮区域)]，索引建立过程中定时刷新
+        self.search_query = ""
+        self.search_all = False
+        self.search_results = []
+        self.watched_indexes = []
+        self.search_refresh_timer = QTimer(self)
+        self.search_refresh_timer.setSingleShot(True)
+        self.search_refresh_timer.setInterval(100)
+        self.search_refresh_timer.timeout.connect(self.refresh_search_results)
         self.init_ui()
         self.load_pdf()
         
@@ -1788,7 +1822,7 @@ class PDFPreviewDialog(QDialog):
         title_icon.setFont(QFont("Segoe UI Emoji", 18))
         title_icon.setStyleSheet("background: transparent; color: #667eea;")
         
-        title_text = QLabel(f"{self.role_name} - 项目任务汇报单")
+        self.title_text = title_text = QLabel(f"{self.role_name} - 项目任务汇报单")
         title_text.setFont(QFont("微软雅黑", 12, QFont.Bold))
         title_text.setStyleSheet("color: #2d3436; background: transparent;")
         
@@ -1879,8 +1913,31 @@ class PDFPreviewDialog(QDialog):
         
         # 添加鼠标滚轮缩放支持
         self.scroll_area.wheelEvent = self.scroll_area_wheel_event
+        # 高缩放按图块渲染时，滚动后渲染新露出的区域
+        self.scroll_area.horizontalScrollBar().valueChanged.connect(self.request_visible_tiles)
+        self.scroll_area.verticalScrollBar().valueChanged.connect(self.request_visible_tiles)
+        
+        # 搜索结果列表（有搜索时显示）
+        self.search_results_list = QListWidget()
+        self.search_results_list.setMaximumHeight(120)
+        self.search_results_list.setVisible(False)
+        self.search_results_list.itemClicked.connect(self.open_search_result)
+        self.search_results_list.setStyleSheet("""
+            QListWidget {
+                background: #f8f9fa;
+                border: 1px solid #dee2e6;
+                border-radius: 6px;
+                font-family: '微软雅黑';
+                font-size: 11px;
+            }
+            QListWidget::item:selected {
+                background: rgba(102, 126, 234, 0.2);
+                color: #2d3436;
+            }
+        """)
         
         preview_layout.addWidget(self.scroll_area)
+        preview_layout.addWidget(self.search_results_list)
         layout.addWidget(preview_frame)
         
     def scroll_area_wheel_event(self, event):
@@ -2124,10 +2181,40 @@ class PDFPreviewDialog(QDialog):
             }
         """)
         
+        # 全文搜索
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText("搜索文档内容...")
+        self.search_edit.setFixedSize(160, 30)
+        self.search_edit.returnPressed.connect(self.search_text)
+        self.search_edit.setStyleSheet("""
+            QLineEdit {
+                background: white;
+                border: 1px solid #dee2e6;
+                border-radius: 6px;
+                padding: 3px 8px;
+                font-family: '微软雅黑';
+            }
+            QLineEdit:focus {
+                border-color: #667eea;
+            }
+        """)
+        
+        self.search_all_check = QCheckBox("全部手册")
+        self.search_all_check.setStyleSheet("color: #6c757d; font-family: '微软雅黑';")
+        self.search_all_check.setVisible(len(self.manuals) > 1)
+        self.search_all_check.toggled.connect(self.search_scope_changed)
+        
+        self.continuous_check = QCheckBox("连续滚动")
+        self.continuous_check.setStyleSheet("color: #6c757d; font-family: '微软雅黑';")
+        self.continuous_check.toggled.connect(self.set_continuous_mode)
+        
         # 添加左侧控件
         combined_layout.addWidget(self.page_info_label)
         combined_layout.addWidget(zoom_label)
         combined_layout.addWidget(self.zoom_combo)
+        combined_layout.addWidget(self.continuous_check)
+        combined_layout.addWidget(self.search_edit)
+        combined_layout.addWidget(self.search_all_check)
         
         # 中间弹性空间
         combined_layout.addStretch()
@@ -2216,6 +2303,20 @@ class PDFPreviewDialog(QDialog):
                 self.pdf_label.setAlignment(Qt.AlignCenter)
                 return
             
+            # 页面在后台线程渲染，最新的页码/缩放请求会取代尚未开始的旧请求
+            page_sizes = [(page.rect.width, page.rect.height) for page in self.pdf_doc]
+            self.render_engine = PDFRenderEngine(self.pdf_path, page_sizes, parent=self)
+            self.render_engine.page_ready.connect(self.on_page_rendered)
+            self.render_engine.tile_ready.connect(self.on_tile_rendered)
+            self.render_engine.render_error.connect(self.on_render_error)
+            
+            # 用页面画布替换提示标签
+            self.page_canvas = PDFPageCanvas(self.render_engine)
+            self.scroll_area.setWidget(self.page_canvas)
+            
+            # 全文索引在后台建立（已有保存的索引时直接读取）
+            self.watch_index(get_text_index(self.pdf_path))
+            
             # 显示第一页
             self.show_page(0)
             self.update_controls()
@@ -2230,48 +2331,259 @@ class PDFPreviewDialog(QDialog):
             import traceback
             traceback.print_exc()
             
-    def show_page(self, page_num):
-        """显示指定页面 - 修正滚动和缩放问题"""
+    def current_zoom(self):
+        """当前缩放比例"""
+        return float(self.zoom_combo.currentText().replace('%', '')) / 100.0
+            
+    def show_page(self, page_num, defer_render=False):
+        """
+        显示指定页面 - 已缓存时立即显示，否则先显示预览（旧图像缩放或低分辨率渲染），后台渲染完成后替换
+        
+        Args:
+            defer_render: 连续缩放时为True，停止缩放 ZOOM_RENDER_DELAY 毫秒后才开始渲染
+        """
         try:
-            if not self.pdf_doc or page_num < 0 or page_num >= self.total_pages:
+            if not self.render_engine or page_num < 0 or page_num >= self.total_pages:
                 return
             
-            # 获取当前缩放比例
-            zoom_text = self.zoom_combo.currentText().replace('%', '')
-            zoom_factor = float(zoom_text) / 100.0
+            zoom_factor = self.current_zoom()
+            self.current_page = page_num
+            self.update_controls()
+            if self.continuous_mode:
+                self.continuous_canvas.scroll_to_page(page_num)
+                return
             
-            # 获取页面
-            page = self.pdf_doc[page_num]
+            # 画布立即调整为目标尺寸，滚动区域据此显示滚动条
+            self.page_canvas.show_page(page_num, zoom_factor)
+            self.apply_search_highlights()
+            if defer_render and self.render_engine.cached_page(page_num, zoom_factor) is None:
+                # 丢弃旧缩放比例的待渲染任务，缩放停止后再渲染
+                self.render_engine.cancel_pending()
+                self.zoom_render_timer.start()
+                return
             
-            # 设置缩放矩阵
-            mat = fitz.Matrix(zoom_factor, zoom_factor)
+            self.zoom_render_timer.stop()
+            self.render_current_page()
             
-            # 渲染页面为图像
-            pix = page.get_pixmap(matrix=mat)
+        except Exception as e:
+            print(f"❌ 显示页面失败：{str(e)}")
+            import traceback
+            traceback.print_exc()
             
-            # 转换为QPixmap
-            img_data = pix.tobytes("ppm")
-            pixmap = QPixmap()
-            pixmap.loadFromData(img_data)
+    def render_current_page(self):
+        """请求渲染当前页面（后台渲染，完成后通过 on_page_rendered 显示）"""
+        if not self.render_engine:
+            return
+        if self.page_canvas.tiled:
+            QTimer.singleShot(0, self.request_visible_tiles)
+            return
+        
+        pixmap = self.render_engine.request_page(self.current_page, self.current_zoom(),
+                                                 with_preview=self.page_canvas.preview is None)
+        if pixmap is not None:
+            self.page_canvas.set_pixmap(pixmap)
+        elif self.page_canvas.preview is None:
+            self.page_canvas.set_message("📄 正在渲染页面...")
             
-            # 正确设置图像显示
-            self.pdf_label.setPixmap(pixmap)
-            self.pdf_label.setScaledContents(False)
+    @property
+    def continuous_mode(self):
+        return self.continuous_canvas is not None and self.scroll_area.widget() is self.continuous_canvas
             
-            # 关键：设置标签大小为图像实际大小，这样滚动区域才能正确显示滚动条
-            self.pdf_label.resize(pixmap.size())
-            self.pdf_label.setMinimumSize(pixmap.size())
+    def set_continuous_mode(self, enabled):
+        """切换连续滚动模式（全部页面纵向排列，只渲染可见页面）"""
+        if not self.render_engine or enabled == self.continuous_mode:
+            return
+        # takeWidget 保留另一种模式的画布，切换回来时继续使用
+        self.scroll_area.takeWidget()
+        if enabled:
+            if self.continuous_canvas is None:
+                self.continuous_canvas = PDFContinuousCanvas(self.render_engine, self.scroll_area)
+                self.continuous_canvas.current_page_changed.connect(self.on_continuous_page_changed)
+            self.scroll_area.setWidget(self.continuous_canvas)
+            self.continuous_canvas.set_zoom(self.current_zoom())
+            self.apply_search_highlights()
+            # 等滚动区域完成布局后再定位
+            page_num = self.current_page
+            QTimer.singleShot(0, lambda: self.continuous_mode and self.continuous_canvas.scroll_to_page(page_num))
+        else:
+            self.scroll_area.setWidget(self.page_canvas)
+            self.show_page(self.current_page)
             
-            # 更新页面信息
-            self.current_page = page_num
-            self.update_controls()
+    def on_continuous_page_changed(self, page_num):
+        """连续滚动时可见区域中的当前页面变化"""
+        self.current_page = page_num
+        self.update_controls()
             
-            print(f"✅ 页面 {page_num + 1} 已显示 - 图像尺寸: {pixmap.width()}x{pixmap.height()}, 缩放: {zoom_factor*100:.0f}%")
+    def request_visible_tiles(self, *args):
+        """按图块渲染时请求当前可见区域的图块"""
+        if not self.render_engine or self.continuous_mode or not self.page_canvas.tiled:
+            return
+        visible = self.page_canvas.visibleRegion().boundingRect()
+        if visible.isEmpty():
+            visible = self.scroll_area.viewport().rect()
+        self.render_engine.request_tiles(self.current_page, self.current_zoom(), visible)
+            
+    def on_page_rendered(self, page_num, page_zoom):
+        """后台渲染完成（过期的页码/缩放结果只进入缓存，连续滚动画布自行处理）"""
+        if page_num != self.current_page or self.page_canvas.tiled or self.continuous_mode:
+            return
+        zoom_factor = self.current_zoom()
+        if page_zoom == zoom_key(zoom_factor):
+            self.page_canvas.set_pixmap(self.render_engine.cached_page(page_num, zoom_factor))
+        elif self.render_engine.is_preview(page_zoom):
+            self.page_canvas.set_preview(self.render_engine.cached_preview(page_num))
+            
+    def on_tile_rendered(self, page_num, page_zoom, col, row):
+        """图块渲染完成"""
+        if page_num == self.current_page and page_zoom == zoom_key(self.current_zoom()) and not self.continuous_mode:
+            self.page_canvas.update(col * TILE_SIZE, row * TILE_SIZE, TILE_SIZE, TILE_SIZE)
+            
+    def on_render_error(self, page_num, error_msg):
+        """渲染失败"""
+        if page_num == self.current_page and not self.continuous_mode:
+            self.page_canvas.set_message(f"❌ 渲染页面失败\n\n{error_msg}")
+            
+    def search_scope(self):
+        """搜索范围 [(角色名称, PDF路径)]"""
+        if self.search_all_check.isChecked() and self.manuals:
+            return list(self.manuals.items())
+        return [(self.role_name, self.pdf_path)]
+            
+    def watch_index(self, index):
+        """索引有新页面或建立完成时刷新搜索结果"""
+        if index not in self.watched_indexes:
+            index.page_indexed.connect(self.schedule_search_refresh)
+            index.index_ready.connect(self.schedule_search_refresh)
+            index.index_failed.connect(self.schedule_search_refresh)
+            self.watched_indexes.append(index)
+            
+    def schedule_search_refresh(self, *args):
+        if self.search_query and not self.search_refresh_timer.isActive():
+            self.search_refresh_timer.start()
+            
+    def search_scope_changed(self):
+        """切换“全部手册”后重新搜索"""
+        if self.search_query:
+            self.search_query = ""
+            self.search_text()
+            
+    def search_text(self):
+        """搜索文本（在全文索引中查询，再次搜索相同内容时跳到下一个结果）"""
+        try:
+            query = normalize_query(self.search_edit.text())
+            search_all = self.search_all_check.isChecked()
+            if query and query == self.search_query and search_all == self.search_all and self.search_results:
+                current = self.current_result_row()
+                self.open_search_result(self.search_results_list.item((current + 1) % len(self.search_results)))
+                return
             
+            self.search_query = query
+            self.search_all = search_all
+            self.search_results = []
+            self.refresh_search_results()
         except Exception as e:
-            print(f"❌ 显示页面失败：{str(e)}")
-            import traceback
-            traceback.print_exc()
+            print(f"❌ 搜索文档失败：{str(e)}")
+            
+    def refresh_search_results(self):
+        """在搜索范围内的索引中查询（索引建立过程中随新页面刷新）"""
+        if not self.search_query:
+            self.search_results = []
+            self.search_results_list.clear()
+            self.search_results_list.setVisible(False)
+            self.apply_search_highlights()
+            return
+        
+        results = []
+        building = False
+        for role_name, pdf_path in self.search_scope():
+            index = get_text_index(pdf_path)
+            self.watch_index(index)
+            building = building or (not index.complete and index.error is None)
+            for page_num, rects in index.search(self.search_query):
+                results.append((role_name, pdf_path, page_num, rects,
+                                index.snippet(page_num, self.search_query)))
+        first_results = not self.search_results and results
+        self.search_results = [result[:4] for result in results]
+        
+        self.search_results_list.clear()
+        for role_name, pdf_path, page_num, rects, snippet in results:
+            prefix = f"{role_name} · " if self.search_all else ""
+            self.search_results_list.addItem(f"{prefix}第{page_num + 1}页 · {len(rects)}处 · {snippet}")
+            self.search_results_list.item(self.search_results_list.count() - 1).setData(
+                Qt.UserRole, (pdf_path, role_name, page_num))
+        if building:
+            self.search_results_list.addItem("⏳ 正在建立索引，结果会陆续显示...")
+        elif not results:
+            self.search_results_list.addItem("未找到匹配的文本")
+        self.search_results_list.setVisible(True)
+        self.apply_search_highlights()
+        
+        # 首批结果出现时跳到当前文档中的第一个匹配页面
+        if first_results:
+            for row, (role_name, pdf_path, page_num, rects) in enumerate(self.search_results):
+                if self.is_current_document(pdf_path):
+                    self.open_search_result(self.search_results_list.item(row))
+                    break
+                    
+    def is_current_document(self, pdf_path):
+        return os.path.abspath(pdf_path) == os.path.abspath(self.pdf_path)
+            
+    def current_result_row(self):
+        """当前显示的页面在结果列表中的位置，不在结果中时返回-1"""
+        for row, (role_name, pdf_path, page_num, rects) in enumerate(self.search_results):
+            if self.is_current_document(pdf_path) and page_num == self.current_page:
+                return row
+        return -1
+            
+    def apply_search_highlights(self):
+        """高亮当前页面中的匹配"""
+        if not self.page_canvas:
+            return
+        row = self.current_result_row()
+        self.page_canvas.set_highlights(self.search_results[row][3] if row >= 0 else [])
+        if self.continuous_canvas is not None:
+            self.continuous_canvas.set_highlights({
+                page_num: rects for role_name, pdf_path, page_num, rects in self.search_results
+                if self.is_current_document(pdf_path)
+            })
+            
+    def open_search_result(self, item):
+        """打开搜索结果（其他手册中的结果会切换文档）"""
+        data = item.data(Qt.UserRole) if item else None
+        if not data:
+            return
+        pdf_path, role_name, page_num = data
+        if not self.is_current_document(pdf_path):
+            self.open_document(pdf_path, role_name)
+        self.show_page(page_num)
+        self.search_results_list.setCurrentItem(item)
+            
+    def open_document(self, pdf_path, role_name):
+        """切换到另一份手册"""
+        self.zoom_render_timer.stop()
+        if self.render_engine:
+            # 引擎以对话框为父对象，停止后需要显式释放，否则会一直挂在对话框上直到关闭
+            self.render_engine.stop()
+            self.render_engine.deleteLater()
+            self.render_engine = None
+        if self.pdf_doc:
+            self.pdf_doc.close()
+            self.pdf_doc = None
+        self.pdf_path = pdf_path
+        self.role_name = role_name
+        self.current_page = 0
+        self.continuous_canvas = None
+        self.setWindowTitle(f"项目汇报文档预览 - {role_name}")
+        self.title_text.setText(f"{role_name} - 项目任务汇报单")
+        
+        # 画布随滚动区域内容替换而释放，加载期间显示提示标签
+        self.page_canvas = None
+        self.pdf_label = QLabel("📄 正在加载PDF文档...")
+        self.pdf_label.setAlignment(Qt.AlignCenter)
+        self.scroll_area.setWidget(self.pdf_label)
+        self.load_pdf()
+        if self.continuous_check.isChecked():
+            self.set_continuous_mode(True)
             
     def prev_page(self):
         """上一页"""
@@ -2285,7 +2597,10 @@ class PDFPreviewDialog(QDialog):
             
     def zoom_changed(self):
         """缩放改变"""
-        self.show_page(self.current_page)
+        if self.continuous_mode:
+            self.continuous_canvas.set_zoom(self.current_zoom(), defer_render=True)
+            return
+        self.show_page(self.current_page, defer_render=True)
         
     def update_controls(self):
         """更新控制显示状态"""
@@ -2318,15 +2633,58 @@ class PDFPreviewDialog(QDialog):
             QMessageBox.critical(self, "下载失败", f"无法下载PDF文件：{str(e)}")
             print(f"❌ 下载PDF失败：{str(e)}")
             
+    def done(self, result):
+        """Esc、accept()/reject() 结束对话框时不会产生关闭事件，在这里释放资源"""
+        self.release_resources()
+        super().done(result)
+    
     def closeEvent(self, event):
         """关闭事件处理"""
+        self.release_resources()
+        super().closeEvent(event)
+    
+    def release_resources(self):
+        """停止渲染线程、断开索引并关闭文档（可重复调用）"""
         try:
+            self.zoom_render_timer.stop()
+            self.search_refresh_timer.stop()
+            # 索引由同一文件的预览窗口共享，只断开信号，后台索引继续完成
+            for index in self.watched_indexes:
+                index.page_indexed.disconnect(self.schedule_search_refresh)
+                index.index_ready.disconnect(self.schedule_search_refresh)
+                index.index_failed.disconnect(self.schedule_search_refresh)
+            self.watched_indexes = []
+            if self.render_engine:
+                print(f"📊 PDF渲染缓存统计: {self.render_engine.get_stats()}")
+                self.render_engine.stop()
+                self.render_engine.deleteLater()
+                self.render_engine = None
             if self.pdf_doc:
                 self.pdf_doc.close()
+                self.pdf_doc = None
                 print("✅ PDF文档已关闭")
         except Exception as e:
             print(f"⚠️ 关闭PDF文档时出错：{str(e)}")
-        super().closeEvent(event)
+
+
+class BackgroundCallWorker(QThread):
+    """通用后台调用线程 - 在工作线程执行耗时调用（网络/文件IO），结果通过信号回到界面线程"""
+    
+    # 定义信号
+    result_ready = pyqtSignal(object)  # 调用结果信号
+    error_occurred = pyqtSignal(str)   # 错误信号
+    
+    def __init__(self, func, *args):
+        super().__init__()
+        self.func = func
+        self.args = args
+        
+    def run(self):
+        """执行调用"""
+        try:
+            self.result_ready.emit(self.func(*self.args))
+        except Exception as e:
+            self.error_occurred.emit(str(e))
 
 
 class TaskSubmissionWorker(QThread):
@@ -2378,53 +2736,51 @@ class TaskSubmissionWorker(QThread):
             self.error_occurred.emit(f"任务提交失败: {str(e)}")
             
     def authenticate(self):
-        """用户认证"""
+        """用户认证（使用共享令牌缓存）"""
         try:
             # 使用配置文件中的认证信息
-            auth_data = {
-                "login_type": api_config.DEFAULT_LOGIN_TYPE,
-                "username": api_config.DEFAULT_USERNAME,
-                "password": api_config.DEFAULT_PASSWORD,
-                "grant_type": "password"
-            }
-            
-            response = requests.post(
-                f"{self.api_base_url}{api_config.API_ENDPOINTS['login']}",
-                data=auth_data,
-                headers={"Content-Type": "application/x-www-form-urlencoded"},
-                timeout=api_config.REQUEST_TIMEOUT
+            self.access_token = get_auth_manager().get_token(
+                api_config.DEFAULT_USERNAME,
+                api_config.DEFAULT_PASSWORD,
+                api_config.DEFAULT_LOGIN_TYPE,
+                self.api_base_url
             )
             
-            if response.status_code == 200:
-                token_data = response.json()
-                self.access_token = token_data.get("access_token")
+            if self.access_token:
                 return True
             else:
-                print(f"认证失败: {response.status_code} - {response.text}")
+                print(f"认证失败: {api_config.DEFAULT_USERNAME}")
                 return False
                 
         except Exception as e:
             print(f"认证异常: {str(e)}")
             return False
             
+    def authorized_request(self, method, url, **kwargs):
+        """发送带认证的请求，令牌失效(401)时自动重新登录并重试"""
+        return get_auth_manager().request(
+            method, url,
+            api_config.DEFAULT_USERNAME,
+            api_config.DEFAULT_PASSWORD,
+            api_config.DEFAULT_LOGIN_TYPE,
+            self.api_base_url,
+            **kwargs
+        )
+            
     def get_my_tasks(self):
         """获取当前用户的任务"""
         try:
-            headers = {
-                "Authorization": f"Bearer {self.access_token}",
-                "Content-Type": "application/json"
-            }
-            
-            response = requests.get(
+            response = self.authorized_request(
+                "GET",
                 f"{self.api_base_url}{api_config.API_ENDPOINTS['my_tasks']}",
-                headers=headers,
+                headers={"Content-Type": "application/json"},
                 timeout=api_config.REQUEST_TIMEOUT
             )
             
-            if response.status_code == 200:
+            if response is not None and response.status_code == 200:
                 return response.json()
             else:
-                print(f"获取任务失败: {response.status_code} - {response.text}")
+                print(f"获取任务失败: {response.status_code if response is not None else '无令牌'}")
                 return []
                 
         except Exception as e:
@@ -2434,11 +2790,6 @@ class TaskSubmissionWorker(QThread):
     def submit_task(self, assignment_id):
         """提交单个任务"""
         try:
-            headers = {
-                "Authorization": f"Bearer {self.access_token}",
-                "Content-Type": "application/json"
-            }
-            
             # 更新任务状态为"已完成"，进度为100%
             update_data = {
                 "status": api_config.TASK_STATUS["COMPLETED"],
@@ -2446,17 +2797,18 @@ class TaskSubmissionWorker(QThread):
                 "comments": "通过桌面管理器选择提交完成"
             }
             
-            response = requests.put(
+            response = self.authorized_request(
+                "PUT",
                 f"{self.api_base_url}/api/my-tasks/{assignment_id}",
                 json=update_data,
-                headers=headers,
+                headers={"Content-Type": "application/json"},
                 timeout=api_config.REQUEST_TIMEOUT
             )
             
-            if response.status_code == 200:
+            if response is not None and response.status_code == 200:
                 return True
             else:
-                print(f"提交任务失败: {response.status_code} - {response.text}")
+                print(f"提交任务失败: {response.status_code if response is not None else '无令牌'}")
                 return False
                 
         except Exception as e:
@@ -2495,31 +2847,22 @@ class TaskListWorker(QThread):
             self.error_occurred.emit(f"获取任务列表失败: {str(e)}")
             
     def authenticate(self):
-        """用户认证"""
+        """用户认证（使用共享令牌缓存）"""
         try:
-            auth_data = {
-                "login_type": api_config.DEFAULT_LOGIN_TYPE,
-                "username": api_config.DEFAULT_USERNAME,
-                "password": api_config.DEFAULT_PASSWORD,
-                "grant_type": "password"
-            }
-            
-            print(f"🔐 TaskListWorker认证: {auth_data['username']} / {auth_data['login_type']}")
+            print(f"🔐 TaskListWorker认证: {api_config.DEFAULT_USERNAME} / {api_config.DEFAULT_LOGIN_TYPE}")
             
-            response = requests.post(
-                f"{self.api_base_url}{api_config.API_ENDPOINTS['login']}",
-                data=auth_data,
-                headers={"Content-Type": "application/x-www-form-urlencoded"},
-                timeout=api_config.REQUEST_TIMEOUT
+            self.access_token = get_auth_manager().get_token(
+                api_config.DEFAULT_USERNAME,
+                api_config.DEFAULT_PASSWORD,
+                api_config.DEFAULT_LOGIN_TYPE,
+                self.api_base_url
             )
             
-            if response.status_code == 200:
-                token_data = response.json()
-                self.access_token = token_data.get("access_token")
+            if self.access_token:
                 print(f"✅ TaskListWorker认证成功")
                 return True
             else:
-                print(f"❌ TaskListWorker认证失败: {response.status_code} - {response.text}")
+                print(f"❌ TaskListWorker认证失败")
                 return False
                 
         except Exception as e:
@@ -2533,25 +2876,25 @@ class TaskListWorker(QThread):
                 print("❌ TaskListWorker: 未认证，无法获取任务")
                 return []
                 
-            headers = {
-                "Authorization": f"Bearer {self.access_token}",
-                "Content-Type": "application/json"
-            }
-            
             print(f"📋 TaskListWorker: 正在获取任务列表...")
             
-            response = requests.get(
+            response = get_auth_manager().request(
+                "GET",
                 f"{self.api_base_url}{api_config.API_ENDPOINTS['my_tasks']}",
-                headers=headers,
+                api_config.DEFAULT_USERNAME,
+                api_config.DEFAULT_PASSWORD,
+                api_config.DEFAULT_LOGIN_TYPE,
+                self.api_base_url,
+                headers={"Content-Type": "application/json"},
                 timeout=api_config.REQUEST_TIMEOUT
             )
             
-            if response.status_code == 200:
+            if response is not None and response.status_code == 200:
                 tasks = response.json()
                 print(f"✅ TaskListWorker: 成功获取 {len(tasks)} 个任务")
                 return tasks
             else:
-                print(f"❌ TaskListWorker: 获取任务失败: {response.status_code} - {response.text}")
+                print(f"❌ TaskListWorker: 获取任务失败: {response.status_code if response is not None else '无令牌'}")
                 return []
                 
         except Exception as e:
@@ -3228,29 +3571,17 @@ class DeviceAddWorker(QThread):
             self.error_occurred.emit(f"设备添加失败: {str(e)}")
             
     def authenticate(self):
-        """管理员认证（使用admin账号）"""
+        """管理员认证（使用admin账号，共享令牌缓存）"""
         try:
-            # 使用admin账号进行认证
-            auth_data = {
-                "login_type": "管理员",  # 使用管理员登录类型
-                "username": "admin",     # 强制使用admin用户名
-                "password": api_config.DEFAULT_PASSWORD,
-                "grant_type": "password"
-            }
-            
-            response = requests.post(
-                f"{self.api_base_url}{api_config.API_ENDPOINTS['login']}",
-                data=auth_data,
-                headers={"Content-Type": "application/x-www-form-urlencoded"},
-                timeout=api_config.REQUEST_TIMEOUT
+            # 使用admin账号进行认证：管理员登录类型 + 强制使用admin用户名
+            self.access_token = get_auth_manager().get_token(
+                "admin", api_config.DEFAULT_PASSWORD, "管理员", self.api_base_url
             )
             
-            if response.status_code == 200:
-                token_data = response.json()
-                self.access_token = token_data.get("access_token")
+            if self.access_token:
                 return True
             else:
-                print(f"管理员认证失败: {response.status_code} - {response.text}")
+                print(f"管理员认证失败")
                 return False
                 
         except Exception as e:
@@ -3260,22 +3591,19 @@ class DeviceAddWorker(QThread):
     def add_device(self):
         """添加设备"""
         try:
-            headers = {
-                "Authorization": f"Bearer {self.access_token}",
-                "Content-Type": "application/json"
-            }
-            
-            response = requests.post(
+            response = get_auth_manager().request(
+                "POST",
                 f"{self.api_base_url}{api_config.API_ENDPOINTS['create_device']}",
+                "admin", api_config.DEFAULT_PASSWORD, "管理员", self.api_base_url,
                 json=self.device_data,
-                headers=headers,
+                headers={"Content-Type": "application/json"},
                 timeout=api_config.REQUEST_TIMEOUT
             )
             
-            if response.status_code == 200:
+            if response is not None and response.status_code == 200:
                 return True
             else:
-                print(f"添加设备失败: {response.status_code} - {response.text}")
+                print(f"添加设备失败: {response.status_code if response is not None else '无令牌'}")
                 return False
                 
         except Exception as e:
@@ -3340,29 +3668,17 @@ class BatchDeviceAddWorker(QThread):
             self.error_occurred.emit(f"批量设备添加失败: {str(e)}")
             
     def authenticate(self):
-        """管理员认证（使用admin账号）"""
+        """管理员认证（使用admin账号，共享令牌缓存）"""
         try:
-            # 使用admin账号进行认证
-            auth_data = {
-                "login_type": "管理员",  # 使用管理员登录类型
-                "username": "admin",     # 强制使用admin用户名
-                "password": api_config.DEFAULT_PASSWORD,
-                "grant_type": "password"
-            }
-            
-            response = requests.post(
-                f"{self.api_base_url}{api_config.API_ENDPOINTS['login']}",
-                data=auth_data,
-                headers={"Content-Type": "application/x-www-form-urlencoded"},
-                timeout=api_config.REQUEST_TIMEOUT
+            # 使用admin账号进行认证：管理员登录类型 + 强制使用admin用户名
+            self.access_token = get_auth_manager().get_token(
+                "admin", api_config.DEFAULT_PASSWORD, "管理员", self.api_base_url
             )
             
-            if response.status_code == 200:
-                token_data = response.json()
-                self.access_token = token_data.get("access_token")
+            if self.access_token:
                 return True
             else:
-                print(f"管理员认证失败: {response.status_code} - {response.text}")
+                print(f"管理员认证失败")
                 return False
                 
         except Exception as e:
@@ -3394,22 +3710,19 @@ class BatchDeviceAddWorker(QThread):
     def add_single_device(self, device_data):
         """添加单个设备"""
         try:
-            headers = {
-                "Authorization": f"Bearer {self.access_token}",
-                "Content-Type": "application/json"
-            }
-            
-            response = requests.post(
+            response = get_auth_manager().request(
+                "POST",
                 f"{self.api_base_url}{api_config.API_ENDPOINTS['create_device']}",
+                "admin", api_config.DEFAULT_PASSWORD, "管理员", self.api_base_url,
                 json=device_data,
-                headers=headers,
+                headers={"Content-Type": "application/json"},
                 timeout=api_config.REQUEST_TIMEOUT
             )
             
-            if response.status_code == 200:
+            if response is not None and response.status_code == 200:
                 return True
             else:
-                print(f"添加设备失败: {response.status_code} - {response.text}")
+                print(f"添加设备失败: {response.status_code if response is not None else '无令牌'}")
                 return False
                 
         except Exception as e:
@@ -4795,9 +5108,9 @@ class ToolboxDialog(QDialog):
     def sync_task_data(self):
         """同步任务数据"""
         try:
-            if hasattr(self.desktop_manager, 'refresh_task_data'):
-                self.desktop_manager.refresh_task_data()
-                QMessageBox.information(self, "成功", "任务数据同步完成")
+            if hasattr(self.desktop_manager, 'poll_scheduler'):
+                self.desktop_manager.poll_scheduler.trigger_now('task_refresh')
+                QMessageBox.information(self, "成功", "任务数据同步已在后台开始")
             else:
                 QMessageBox.warning(self, "错误", "任务数据同步功能不可用")
         except Exception as e:
@@ -4940,11 +5253,20 @@ class DesktopManager(QWidget):
         self.file_watcher = None  # 文件监视器
         self.task_worker = None  # 任务提交工作线程
         self.task_list_worker = None  # 任务列表获取工作线程
+        self.received_tasks_worker = None  # 提交任务前读取前端任务数据的工作线程
+        self.pdf_check_worker = None  # 任务完成后检查是否显示PDF预览的工作线程
         self.device_worker = None  # 设备添加工作线程
         self.batch_device_worker = None  # 批量设备添加工作线程
         self.device_dialog = None  # 设备添加对话框实例
         self.pdf_preview_dialog = None  # PDF预览对话框实例
         
+        # 任务轮询状态 - 复用API客户端的条件请求验证器，只转换发生变化的任务
+        self.task_api_client = None  # 任务轮询使用的API客户端
+        self._api_task_cache = {}  # 任务键 -> (原始数据指纹, 转换后的任务)
+        self._tasks_signature = None  # 当前任务集合签名（未知时为None）
+        self._rendered_task_key = None  # 上次渲染任务显示时的(签名, 显示索引)
+        self.task_poll_stats = {'polls': 0, 'not_modified': 0, 'unchanged': 0, 'conversions': 0, 'cache_writes': 0}
+        
         # 初始化增强的数据接收器
         self.data_receiver = DataReceiver(self)
         
@@ -5625,27 +5947,45 @@ class DesktopManager(QWidget):
         try:
             print("⏱️ 开始设置定时器...")
             
-            # 任务显示更新定时器 - 不再用于轮播，只用于状态同步
-            self.task_timer = QTimer()
-            self.task_timer.timeout.connect(self.update_task_display)
-            self.task_timer.start(10000)  # 每10秒更新（用于状态同步，不再轮播）
-            print("✅ 任务显示更新定时器已启动 (10秒间隔)")
+            # 后台工作线程 - 网络请求和文件读取不在界面线程执行
+            self.task_refresh_worker = BackgroundCallWorker(self._fetch_task_data)
+            self.task_refresh_worker.result_ready.connect(self.on_task_data_fetched)
+            self.task_refresh_worker.error_occurred.connect(self.on_task_refresh_error)
+            self.api_check_worker = BackgroundCallWorker(self._check_api_status_sync)
+            self.api_check_worker.result_ready.connect(self.on_api_status_checked)
+            self.api_check_worker.error_occurred.connect(self.on_api_status_error)
+            
+            # 统一的轮询调度器 - 失败退避、用户操作后加速、窗口最小化/会话锁定时挂起
+            self.poll_scheduler = PollScheduler(self)
+            
+            # 任务显示更新 - 不再用于轮播，只用于状态同步（纯本地操作，不退避）
+            self.poll_scheduler.add_job(
+                'task_display', self.update_task_display, api_config.TASK_DISPLAY_INTERVAL,
+                jitter=api_config.POLL_JITTER, backoff=False
+            )
+            
+            # 任务数据刷新 - 失败时指数退避，提交任务后短时间内加速
+            self.poll_scheduler.add_job(
+                'task_refresh', self.refresh_task_data, api_config.TASK_REFRESH_INTERVAL,
+                max_interval_ms=api_config.TASK_REFRESH_MAX_INTERVAL,
+                fast_interval_ms=api_config.TASK_REFRESH_FAST_INTERVAL,
+                jitter=api_config.POLL_JITTER, async_completion=True
+            )
             
-            # 任务数据刷新定时器 - 减少刷新间隔以便更及时获取状态更新
-            self.task_refresh_timer = QTimer()
-            self.task_refresh_timer.timeout.connect(self.refresh_task_data)
-            self.task_refresh_timer.start(15000)  # 每15秒刷新任务数据（原来是30秒）
-            print("✅ 任务数据刷新定时器已启动 (15秒间隔)")
+            # API状态检查 - 用于定期检查API连接状态
+            self.poll_scheduler.add_job(
+                'api_check', self.check_api_status, api_config.API_CHECK_INTERVAL,
+                max_interval_ms=api_config.API_CHECK_MAX_INTERVAL,
+                jitter=api_config.POLL_JITTER, async_completion=True
+            )
             
-            # 新增：API状态检查定时器 - 用于定期检查API连接状态
-            self.api_check_timer = QTimer()
-            self.api_check_timer.timeout.connect(self.check_api_status)
-            self.api_check_timer.start(60000)  # 每60秒检查一次API状态
-            print("✅ API状态检查定时器已启动 (60秒间隔)")
+            self.poll_scheduler.start()
+            self.register_session_notification()
+            print("✅ 轮询调度器已启动 (任务显示/任务刷新/API状态检查)")
             
             # 初始化任务显示
             print("🚀 初始化任务显示...")
-            self.refresh_task_data()
+            self.poll_scheduler.trigger_now('task_refresh')
             self.update_task_display()
             print("✅ 定时器和任务显示初始化完成")
             
@@ -5654,6 +5994,40 @@ class DesktopManager(QWidget):
             import traceback
             traceback.print_exc()
         
+    def register_session_notification(self):
+        """注册Windows会话通知，用于在锁屏时挂起轮询"""
+        if sys.platform != "win32":
+            return
+        try:
+            import ctypes
+            ctypes.windll.wtsapi32.WTSRegisterSessionNotification(int(self.winId()), 0)  # NOTIFY_FOR_THIS_SESSION
+        except Exception as e:
+            print(f"⚠️ 注册会话通知失败: {str(e)}")
+    
+    def nativeEvent(self, event_type, message):
+        """处理Windows会话锁定/解锁消息"""
+        if sys.platform == "win32" and event_type == b"windows_generic_MSG" and hasattr(self, 'poll_scheduler'):
+            try:
+                import ctypes.wintypes
+                msg = ctypes.wintypes.MSG.from_address(int(message))
+                if msg.message == 0x02B1:  # WM_WTSSESSION_CHANGE
+                    if msg.wParam == 0x7:  # WTS_SESSION_LOCK
+                        self.poll_scheduler.suspend('locked')
+                    elif msg.wParam == 0x8:  # WTS_SESSION_UNLOCK
+                        self.poll_scheduler.resume('locked')
+            except Exception as e:
+                print(f"⚠️ 处理会话消息失败: {str(e)}")
+        return False, 0
+    
+    def changeEvent(self, event):
+        """窗口最小化时挂起轮询，恢复时继续"""
+        if event.type() == QEvent.WindowStateChange and hasattr(self, 'poll_scheduler'):
+            if self.isMinimized():
+                self.poll_scheduler.suspend('minimized')
+            else:
+                self.poll_scheduler.resume('minimized')
+        super().changeEvent(event)
+        
     def setup_animations(self):
         """设置动画效果"""
         # 创建动画对象
@@ -5684,55 +6058,129 @@ class DesktopManager(QWidget):
             self.move(100, 10)
         
     def refresh_task_data(self):
-        """刷新任务数据 - 增强版：优先通过API获取，失败时从本地文件获取"""
+        """刷新任务数据 - 增强版：在后台线程优先通过API获取，失败时从本地文件获取
+        
+        结果通过信号回到界面线程处理，同一时间只有一个刷新在进行
+        """
         try:
-            print(f"🔄 开始刷新任务数据...")
-            
             # 检查必要属性是否存在
             if not hasattr(self, 'current_tasks'):
                 self.current_tasks = []
             if not hasattr(self, 'current_task_index'):
                 self.current_task_index = 0
             
-            # 尝试从API获取任务数据
-            api_tasks = self.fetch_tasks_from_api()
+            if self.task_refresh_worker.isRunning():
+                print("⏳ 任务刷新已在进行中，合并本次请求")
+                return
             
-            if api_tasks:
+            print(f"🔄 开始刷新任务数据...")
+            # 后台线程只使用启动时的状态快照，所有状态变化在 on_task_data_fetched 中应用
+            self.task_refresh_worker.args = (self._task_poll_snapshot(),)
+            self.task_refresh_worker.start()
+                
+        except Exception as e:
+            print(f"❌ 启动任务刷新失败: {str(e)}")
+            self.poll_scheduler.complete('task_refresh', False)
+    
+    def _task_poll_snapshot(self):
+        """界面线程：记录后台刷新需要的任务状态（后台线程只读取快照，不访问管理器的任务状态）"""
+        # 复用API客户端（保留条件请求验证器），同一时间只有一个刷新线程使用它
+        if self.task_api_client is None:
+            self.task_api_client = APIClient()
+        return {
+            'api_client': self.task_api_client,
+            'has_tasks': bool(self.current_tasks),
+            'tasks_signature': self._tasks_signature,
+            'task_cache': dict(self._api_task_cache),
+            'stats': dict.fromkeys(self.task_poll_stats, 0)  # 本次刷新的统计增量
+        }
+    
+    def _fetch_task_data(self, snapshot):
+        """后台线程：获取任务数据（API优先，失败时读取本地文件），不访问任何界面控件和任务状态"""
+        stats = snapshot['stats']
+        # 尝试从API获取任务数据
+        fetched = self.fetch_tasks_from_api(snapshot)
+        
+        if fetched and (fetched['not_modified'] or fetched['tasks']):
+            # 任务集合未变化时跳过缓存写入
+            changed = not (snapshot['has_tasks'] and fetched['signature'] == snapshot['tasks_signature'])
+            if changed and self.save_tasks_to_cache(fetched['tasks']):
+                stats['cache_writes'] += 1
+            return {
+                'source': 'api',
+                'tasks': fetched['tasks'],
+                'signature': fetched['signature'],
+                'task_cache': fetched['task_cache'],
+                'changed': changed,
+                'api_ok': True,
+                'stats': stats
+            }
+        
+        # API获取失败，尝试从本地文件获取
+        print("⚠️ API获取失败，尝试从本地文件获取任务...")
+        local_tasks = self.load_received_tasks()
+        return {
+            'source': 'local',
+            'tasks': local_tasks or [],
+            'signature': None,
+            'changed': True,
+            # API返回空列表视为成功，API请求失败时触发轮询退避
+            'api_ok': fetched is not None,
+            'stats': stats
+        }
+    
+    @pyqtSlot(object)
+    def on_task_data_fetched(self, result):
+        """任务数据获取完成（界面线程）- 应用后台刷新的结果和统计"""
+        try:
+            for name, count in result.get('stats', {}).items():
+                self.task_poll_stats[name] += count
+            tasks = result['tasks']
+            if result['source'] == 'api':
+                self._api_task_cache = result['task_cache']
+            if result['source'] == 'api' and not result['changed']:
+                self.task_poll_stats['unchanged'] += 1
+                print("📭 任务数据无变化，跳过缓存写入和显示刷新")
+            elif result['source'] == 'api':
                 # API获取成功，使用API数据
-                self.current_tasks = api_tasks
+                self.current_tasks = tasks
                 self.current_task_index = 0
-                print(f"✅ 通过API成功获取 {len(api_tasks)} 个任务")
-                # 保存到本地缓存
-                self.save_tasks_to_cache(api_tasks)
-                return
+                self._tasks_signature = result['signature']
+                print(f"✅ 通过API成功获取 {len(tasks)} 个任务")
+            else:
+                # 本地数据没有API签名，下次API获取成功时需要重新写入缓存
+                self._tasks_signature = None
+                self.current_tasks = tasks
+                self.current_task_index = 0
+                if tasks:
+                    print(f"✅ 从本地文件获取 {len(tasks)} 个任务")
+                else:
+                    print("⚠️ 本地文件也无任务数据，清空当前任务")
             
-            # API获取失败，尝试从本地文件获取
-            print("⚠️ API获取失败，尝试从本地文件获取任务...")
-            local_tasks = self.load_received_tasks()
+            self.update_task_display()
             
-            if local_tasks:
-                self.current_tasks = local_tasks
-                self.current_task_index = 0
-                print(f"✅ 从本地文件获取 {len(local_tasks)} 个任务")
-            else:
-                self.current_tasks = []
-                print("⚠️ 本地文件也无任务数据，清空当前任务")
-                
         except Exception as e:
             print(f"❌ 刷新任务数据失败: {str(e)}")
             import traceback
             traceback.print_exc()
-            
-            # 确保属性存在，防止后续调用出错
-            if not hasattr(self, 'current_tasks'):
-                self.current_tasks = []
-            if not hasattr(self, 'current_task_index'):
-                self.current_task_index = 0
-            else:
-                self.current_tasks = []
+        finally:
+            self.poll_scheduler.complete('task_refresh', result.get('api_ok', False))
     
-    def fetch_tasks_from_api(self):
-        """从API获取任务数据"""
+    @pyqtSlot(str)
+    def on_task_refresh_error(self, error_message):
+        """任务数据获取失败（界面线程）"""
+        print(f"❌ 刷新任务数据失败: {error_message}")
+        self.poll_scheduler.complete('task_refresh', False)
+    
+    def fetch_tasks_from_api(self, snapshot):
+        """
+        从API获取任务数据（在后台线程执行，只读取 snapshot）
+        
+        Returns:
+            {'tasks', 'not_modified', 'signature', 'task_cache'}，获取失败时返回None；
+            任务列表未变化（304）时 tasks 为None，签名沿用快照中的当前签名
+        """
+        stats = snapshot['stats']
         try:
             print("🌐 开始从API获取任务数据...")
             
@@ -5742,8 +6190,7 @@ class DesktopManager(QWidget):
                 print("❌ 无法获取用户认证信息")
                 return None
             
-            # 创建API客户端并认证
-            api_client = APIClient()
+            api_client = snapshot['api_client']
             username = user_info.get('username')
             password = user_info.get('password')
             user_type = user_info.get('type', '操作员')
@@ -5757,22 +6204,25 @@ class DesktopManager(QWidget):
             
             print("✅ API认证成功，获取任务列表...")
             
-            # 获取当前用户的任务
-            api_tasks = api_client.get_my_tasks()
+            # 获取当前用户的任务（条件请求，304表示任务列表未变化）
+            stats['polls'] += 1
+            api_tasks = api_client.get_my_tasks(conditional=bool(snapshot['has_tasks'] and snapshot['tasks_signature']))
+            
+            if api_client.not_modified:
+                stats['not_modified'] += 1
+                return {'tasks': None, 'not_modified': True,
+                        'signature': snapshot['tasks_signature'], 'task_cache': snapshot['task_cache']}
             
             if not api_tasks:
                 print("⚠️ API返回空任务列表")
-                return []
+                return {'tasks': [], 'not_modified': False, 'signature': None, 'task_cache': snapshot['task_cache']}
             
-            # 转换API任务格式为内部格式
-            converted_tasks = []
-            for task in api_tasks:
-                converted_task = self._convert_api_task_to_internal_format(task)
-                if converted_task:
-                    converted_tasks.append(converted_task)
+            # 转换API任务格式为内部格式（只转换发生变化的任务）
+            converted_tasks, task_cache, signature = self._convert_api_tasks_incremental(
+                api_tasks, snapshot['task_cache'], stats)
             
             print(f"✅ 成功转换 {len(converted_tasks)} 个API任务")
-            return converted_tasks
+            return {'tasks': converted_tasks, 'not_modified': False, 'signature': signature, 'task_cache': task_cache}
             
         except Exception as e:
             print(f"❌ 从API获取任务失败: {str(e)}")
@@ -5851,7 +6301,7 @@ class DesktopManager(QWidget):
             return None
     
     def save_tasks_to_cache(self, tasks):
-        """保存任务到本地缓存"""
+        """保存任务到本地缓存，返回是否写入成功"""
         try:
             cache_data = {
                 'action': 'api_task_cache',
@@ -5871,13 +6321,21 @@ class DesktopManager(QWidget):
                 json.dump(cache_data, f, ensure_ascii=False, indent=2)
             
             print(f"✅ 任务已缓存到本地文件: {cache_file_path}")
+            return True
             
         except Exception as e:
             print(f"❌ 保存任务缓存失败: {str(e)}")
+            return False
     
     def update_task_display(self):
         """更新任务显示 - 修改：只显示当前进行中的任务，不进行轮播"""
         try:
+            # 任务集合和显示索引都未变化时跳过重绘
+            render_key = (self._tasks_signature, getattr(self, 'current_display_task_index', 0))
+            if self._tasks_signature is not None and render_key == self._rendered_task_key:
+                return
+            self._rendered_task_key = None
+            
             print(f"🎯 开始更新任务显示...")
             
             # 检查必要的UI控件是否存在
@@ -5915,6 +6373,7 @@ class DesktopManager(QWidget):
                 print("📋 没有进行中的任务")
                 self.task_scroll_label.setText("暂无进行中的任务")
                 self.submit_current_task_button.setEnabled(False)
+                self._rendered_task_key = render_key
                 return
             
             # 确保当前显示索引有效
@@ -5946,6 +6405,7 @@ class DesktopManager(QWidget):
             
             # 保存当前显示的任务，供提交使用
             self.current_display_task = current_task
+            self._rendered_task_key = render_key
                 
         except Exception as e:
             print(f"❌ 更新任务显示失败: {str(e)}")
@@ -5977,12 +6437,10 @@ class DesktopManager(QWidget):
                 self.current_tasks = []
             
             if not self.current_tasks:
-                # 没有任务时，尝试刷新任务数据
-                print("📋 没有任务数据，尝试刷新...")
-                self.refresh_task_data()
-                if not self.current_tasks:
-                    print("⚠️ 刷新后仍无任务数据")
-                    return
+                # 没有任务时，在后台刷新任务数据，结果返回后自动更新显示
+                print("📋 没有任务数据，已在后台开始刷新...")
+                self.poll_scheduler.trigger_now('task_refresh')
+                return
             
             # 如果有任务，打开任务详情
             print(f"📊 当前有 {len(self.current_tasks)} 个任务")
@@ -6418,15 +6876,23 @@ class DesktopManager(QWidget):
             QMessageBox.information(self, "提示", "任务提交正在进行中，请稍等...")
             return
             
-        if self.task_list_worker and self.task_list_worker.isRunning():
+        if (self.task_list_worker and self.task_list_worker.isRunning()) or \
+                (self.received_tasks_worker and self.received_tasks_worker.isRunning()):
             QMessageBox.information(self, "提示", "正在获取任务列表，请稍等...")
             return
             
         # 显示加载状态
         print("正在智能获取任务列表...")
         
-        # 首先检查是否有从前端接收到的任务数据
-        received_tasks = self.load_received_tasks()
+        # 首先检查是否有从前端接收到的任务数据（可能需要访问API，在后台线程执行）
+        self.received_tasks_worker = BackgroundCallWorker(self.load_received_tasks)
+        self.received_tasks_worker.result_ready.connect(self.on_submit_received_tasks)
+        self.received_tasks_worker.error_occurred.connect(self.on_submit_received_tasks_error)
+        self.received_tasks_worker.start()
+    
+    @pyqtSlot(object)
+    def on_submit_received_tasks(self, received_tasks):
+        """前端任务数据加载完成后打开任务选择对话框（界面线程）"""
         if received_tasks:
             print(f"✓ 使用从前端接收到的智能任务数据，共 {len(received_tasks)} 个任务")
             # 延迟一下让用户看到状态信息
@@ -6444,6 +6910,12 @@ class DesktopManager(QWidget):
         # 开始获取任务列表
         self.task_list_worker.start()
     
+    @pyqtSlot(str)
+    def on_submit_received_tasks_error(self, error_message):
+        """读取前端任务数据失败时回退到API获取任务列表"""
+        print(f"❌ 读取前端任务数据失败：{error_message}")
+        self.on_submit_received_tasks(None)
+    
     def load_received_tasks(self):
         """加载从前端接收到的任务数据 - 使用增强的数据处理器"""
         try:
@@ -6599,6 +7071,36 @@ class DesktopManager(QWidget):
             traceback.print_exc()
             return None
     
+    def _convert_api_tasks_incremental(self, api_tasks, task_cache, stats):
+        """
+        增量转换API任务 - 原始数据未变化的任务复用上次的转换结果，并计算任务集合签名
+        
+        Returns:
+            (转换后的任务, 新的转换缓存, 任务集合签名)
+        """
+        converted_tasks = []
+        fingerprints = []
+        new_cache = {}
+        
+        for task in api_tasks:
+            fingerprint = json.dumps(task, sort_keys=True, ensure_ascii=False, default=str)
+            fingerprints.append(fingerprint)
+            task_key = task.get('id') if isinstance(task, dict) and task.get('id') is not None else fingerprint
+            
+            cached = task_cache.get(task_key)
+            if cached and cached[0] == fingerprint:
+                converted_task = cached[1]
+            else:
+                converted_task = self._convert_api_task_to_internal_format(task)
+                stats['conversions'] += 1
+            
+            if converted_task:
+                new_cache[task_key] = (fingerprint, converted_task)
+                converted_tasks.append(converted_task)
+        
+        signature = hashlib.md5('\n'.join(fingerprints).encode('utf-8')).hexdigest()
+        return converted_tasks, new_cache, signature
+    
     def _convert_api_task_to_internal_format(self, api_task):
         """将API返回的任务格式转换为内部格式"""
         try:
@@ -6759,6 +7261,10 @@ class DesktopManager(QWidget):
         
     def start_task_submission(self, selected_tasks):
         """开始提交选中的任务"""
+        # 提交后短时间内加快任务刷新，尽快反映后端状态变化
+        if hasattr(self, 'poll_scheduler'):
+            self.poll_scheduler.boost('task_refresh', api_config.TASK_REFRESH_BOOST_DURATION)
+        
         # 创建任务提交工作线程
         self.task_worker = TaskSubmissionWorker(selected_tasks)
         
@@ -6800,8 +7306,8 @@ class DesktopManager(QWidget):
         try:
             print("🔄 开始刷新并更新任务显示...")
             
-            # 刷新任务数据
-            self.refresh_task_data()
+            # 刷新任务数据（通过调度器，已有刷新在进行中时合并）
+            self.poll_scheduler.trigger_now('task_refresh')
             
             # 更新任务显示
             self.update_task_display()
@@ -6814,7 +7320,24 @@ class DesktopManager(QWidget):
             traceback.print_exc()
     
     def check_api_status(self):
-        """检查API连接状态"""
+        """检查API连接状态 - 在后台线程执行，结果通过信号回到界面线程"""
+        if self.api_check_worker.isRunning():
+            return
+        self.api_check_worker.start()
+    
+    @pyqtSlot(object)
+    def on_api_status_checked(self, api_ok):
+        """API状态检查完成（界面线程）"""
+        self.poll_scheduler.complete('api_check', bool(api_ok))
+    
+    @pyqtSlot(str)
+    def on_api_status_error(self, error_message):
+        """API状态检查失败（界面线程）"""
+        print(f"❌ API状态检查异常: {error_message}")
+        self.poll_scheduler.complete('api_check', False)
+    
+    def _check_api_status_sync(self):
+        """后台线程：检查API连接状态，返回API是否可用"""
         try:
             print("🔍 检查API连接状态...")
             
@@ -6822,58 +7345,72 @@ class DesktopManager(QWidget):
             user_info = self.get_user_info_for_api()
             if not user_info or not user_info.get('username'):
                 print("⚠️ 没有用户认证信息，跳过API状态检查")
-                return
+                return True
             
-            # 创建API客户端并尝试认证
-            api_client = APIClient()
+            # 认证走共享令牌缓存，令牌有效时不会重复登录
+            api_client = self.task_api_client or APIClient()
             username = user_info.get('username')
             password = user_info.get('password')
             
             if password:  # 只有在有密码的情况下才进行认证检查
                 try:
-                    if api_client.authenticate(username, password, user_info.get('type'), user_info.get('operator_type')):
-                        print("✅ API连接正常")
-                        # 可以在此处更新UI状态指示器（如果有的话）
-                    else:
+                    if not api_client.authenticate(username, password, user_info.get('type'), user_info.get('operator_type')):
                         print("⚠️ API认证失败")
+                        return False
                 except Exception as auth_error:
                     print(f"⚠️ API连接检查失败: {str(auth_error)}")
+                    return False
             else:
                 print("⚠️ 没有密码信息，无法进行完整的API状态检查")
+            
+            # 健康检查端点确认服务器可达
+            response = http_client.get(f"{api_client.base_url}/health", timeout=5)
+            if response.status_code == 200:
+                print("✅ API连接正常")
+                # 可以在此处更新UI状态指示器（如果有的话）
+                return True
+            print(f"⚠️ API健康检查失败: {response.status_code}")
+            return False
                 
         except Exception as e:
             print(f"❌ API状态检查异常: {str(e)}")
+            return False
     
     def force_refresh_from_api(self):
         """强制从API刷新任务（用于手动刷新）"""
         try:
             print("🔄 强制从API刷新任务数据...")
             
-            # 临时禁用定时器以避免冲突
-            self.task_refresh_timer.stop()
-            
-            # 执行刷新
-            self.refresh_task_data()
+            # 通过调度器立即刷新，已有刷新在进行中时合并
+            self.poll_scheduler.trigger_now('task_refresh')
             self.update_task_display()
             
-            # 重新启动定时器
-            self.task_refresh_timer.start(15000)
-            
             print("✅ 强制刷新完成")
             
         except Exception as e:
             print(f"❌ 强制刷新失败: {str(e)}")
-            # 确保定时器重新启动
-            if hasattr(self, 'task_refresh_timer'):
-                self.task_refresh_timer.start(15000)
     
     def check_and_show_pdf_preview(self):
         """检查任务完成状态并显示PDF预览"""
         try:
             print("🔍 检查是否需要显示PDF预览...")
+            if self.pdf_check_worker and self.pdf_check_worker.isRunning():
+                return
             
+            # 读取任务数据可能需要访问API，在后台线程执行
+            self.pdf_check_worker = BackgroundCallWorker(self.load_received_tasks)
+            self.pdf_check_worker.result_ready.connect(self.on_pdf_check_tasks_loaded)
+            self.pdf_check_worker.error_occurred.connect(self.on_pdf_check_error)
+            self.pdf_check_worker.start()
+                
+        except Exception as e:
+            print(f"❌ 检查PDF预览状态时出错: {str(e)}")
+    
+    @pyqtSlot(object)
+    def on_pdf_check_tasks_loaded(self, received_tasks):
+        """任务数据加载完成后检查完成状态并显示PDF预览（界面线程）"""
+        try:
             # 检查是否有已缓存的任务数据
-            received_tasks = self.load_received_tasks()
             if not received_tasks:
                 print("❌ 没有找到任务数据，无法检查完成状态")
                 return
@@ -6892,6 +7429,11 @@ class DesktopManager(QWidget):
         except Exception as e:
             print(f"❌ 检查PDF预览状态时出错: {str(e)}")
     
+    @pyqtSlot(str)
+    def on_pdf_check_error(self, error_message):
+        """读取任务数据失败，不显示PDF预览"""
+        print(f"❌ 检查PDF预览状态时出错: {error_message}")
+    
     def check_all_tasks_completed(self, tasks):
         """检查所有任务是否已完成"""
         try:
@@ -6939,7 +7481,8 @@ class DesktopManager(QWidget):
             if self.pdf_preview_dialog:
                 self.pdf_preview_dialog.close()
             
-            self.pdf_preview_dialog = PDFPreviewDialog(pdf_path, role_name, self)
+            self.pdf_preview_dialog = PDFPreviewDialog(pdf_path, role_name, self,
+                                                       manuals=self.get_role_manuals())
             self.pdf_preview_dialog.show()
             self.pdf_preview_dialog.raise_()  # 确保对话框在最前面
             self.pdf_preview_dialog.activateWindow()
@@ -6950,22 +7493,31 @@ class DesktopManager(QWidget):
             print(f"❌ 显示PDF预览时出错: {str(e)}")
             QMessageBox.critical(self, "预览失败", f"显示PDF预览时出错：{str(e)}")
     
+    # 角色名称到PDF文件名的映射
+    ROLE_PDF_MAPPING = {
+        "系统分析师": "项目任务汇报单子(系统分析师).pdf",
+        "系统架构设计师": "项目任务汇报单子(系统架构设计师).pdf", 
+        "系统规划与管理师": "项目任务汇报单子(系统规划与管理师).pdf",
+        "网络规划设计师": "项目任务汇报单子(网络规划设计师).pdf",
+        "网络工程师": "项目任务汇报单子(网络规划设计师).pdf",  # 兼容别名
+        "规划管理师": "项目任务汇报单子(系统规划与管理师).pdf",  # 兼容别名
+        "架构师": "项目任务汇报单子(系统架构设计师).pdf",  # 兼容别名
+        "分析师": "项目任务汇报单子(系统分析师).pdf"  # 兼容别名
+    }
+    
+    def get_role_manuals(self):
+        """所有角色的汇报文档 {角色名称: PDF路径}（别名与正式名称指向同一文件时只保留正式名称）"""
+        manuals = {}
+        for role_name in self.ROLE_PDF_MAPPING:
+            pdf_path = self.get_pdf_path_by_role(role_name)
+            if pdf_path and pdf_path not in manuals.values():
+                manuals[role_name] = pdf_path
+        return manuals
+    
     def get_pdf_path_by_role(self, role_name):
         """根据角色名称获取对应的PDF文件路径"""
         try:
-            # 角色名称到PDF文件名的映射
-            role_pdf_mapping = {
-                "系统分析师": "项目任务汇报单子(系统分析师).pdf",
-                "系统架构设计师": "项目任务汇报单子(系统架构设计师).pdf", 
-                "系统规划与管理师": "项目任务汇报单子(系统规划与管理师).pdf",
-                "网络规划设计师": "项目任务汇报单子(网络规划设计师).pdf",
-                "网络工程师": "项目任务汇报单子(网络规划设计师).pdf",  # 兼容别名
-                "规划管理师": "项目任务汇报单子(系统规划与管理师).pdf",  # 兼容别名
-                "架构师": "项目任务汇报单子(系统架构设计师).pdf",  # 兼容别名
-                "分析师": "项目任务汇报单子(系统分析师).pdf"  # 兼容别名
-            }
-            
-            pdf_filename = role_pdf_mapping.get(role_name)
+            pdf_filename = self.ROLE_PDF_MAPPING.get(role_name)
             if not pdf_filename:
                 print(f"❌ 未找到角色 {role_name} 的PDF映射")
                 return None
@@ -7252,6 +7804,15 @@ class DesktopManager(QWidget):
             # 立即清理JSON文件
             self.cleanup_json_files()
             
+            # 停止轮询调度器和后台轮询线程
+            if hasattr(self, 'poll_scheduler'):
+                self.poll_scheduler.stop()
+            for worker_name in ('task_refresh_worker', 'api_check_worker',
+                                'received_tasks_worker', 'pdf_check_worker'):
+                worker = getattr(self, worker_name, None)
+                if worker and worker.isRunning():
+                    worker.wait(3000)
+            
             # 停止数据接收器
             if hasattr(self, 'data_receiver') and self.data_receiver:
                 self.data_receiver.stop_all_receivers()
@@ -7342,7 +7903,22 @@ class DesktopManager(QWidget):
             print("正在智能获取任务列表...")
             
             # 使用与提交任务相同的获取方式 - 首先检查是否有从前端接收到的任务数据
-            received_tasks = self.load_received_tasks()
+            # 读取/处理任务数据可能需要访问API，在后台线程执行
+            self.notification_load_worker = BackgroundCallWorker(self.load_received_tasks)
+            self.notification_load_worker.result_ready.connect(self.on_notification_received_tasks)
+            self.notification_load_worker.error_occurred.connect(self.on_notification_task_list_error)
+            self.notification_load_worker.start()
+            
+        except Exception as e:
+            print(f"❌ 检查任务时出错: {str(e)}")
+            import traceback
+            traceback.print_exc()
+            self.show_no_task_notification()
+    
+    @pyqtSlot(object)
+    def on_notification_received_tasks(self, received_tasks):
+        """前端任务数据加载完成后弹出通知（界面线程）"""
+        try:
             if received_tasks:
                 print(f"✓ 使用从前端接收到的智能任务数据，共 {len(received_tasks)} 个任务")
                 print(f"已加载 {len(received_tasks)} 个智能推荐任务")
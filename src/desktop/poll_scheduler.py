@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import random
+import time
+from typing import Callable, Dict, Optional
+
+from PyQt5.QtCore import QObject, QTimer
+
+
+class PollJob:
+    """单个轮询任务的调度状态"""
+
+    def __init__(self, name: str, callback: Callable, interval_ms: int,
+                 max_interval_ms: Optional[int] = None, fast_interval_ms: Optional[int] = None,
+                 jitter: float = 0.1, backoff: bool = True, async_completion: bool = False):
+        self.name = name
+        self.callback = callback
+        self.interval_ms = interval_ms
+        self.max_interval_ms = max_interval_ms or interval_ms
+        self.fast_interval_ms = fast_interval_ms or interval_ms
+        self.jitter = jitter
+        self.backoff = backoff
+        self.async_completion = async_completion  # True时回调需自行调用 PollScheduler.complete()
+
+        self.failures = 0
+        self.in_flight = False
+        self.missed = False  # 挂起期间错过了轮询，恢复时立即补一次
+        self.boost_until = 0.0
+        self.timer: Optional[QTimer] = None
+        self.stats = {'issued': 0, 'skipped': 0, 'merged': 0, 'failed': 0}
+
+
+class PollScheduler(QObject):
+    """轮询调度器 - 统一管理后台轮询：失败指数退避、用户操作后加速、挂起时暂停、随机抖动、合并重叠请求"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.jobs: Dict[str, PollJob] = {}
+        self.suspend_reasons = set()
+        self.running = False
+
+    def add_job(self, name: str, callback: Callable, interval_ms: int, **options) -> PollJob:
+        """
+        注册轮询任务
+
+        Args:
+            name: 任务名称
+            callback: 轮询回调，返回False表示失败（触发退避），其他返回值视为成功
+            interval_ms: 正常轮询间隔（毫秒）
+            **options: max_interval_ms / fast_interval_ms / jitter / backoff / async_completion
+        """
+        job = PollJob(name, callback, interval_ms, **options)
+        job.timer = QTimer(self)
+        job.timer.setSingleShot(True)
+        job.timer.timeout.connect(lambda: self._on_timer(job))
+        self.jobs[name] = job
+        if self.running:
+            self._schedule(job, self._initial_delay(job))
+        return job
+
+    def start(self):
+        """启动所有轮询任务（首次触发时间随机分散，避免大量客户端同时请求）"""
+        self.running = True
+        for job in self.jobs.values():
+            self._schedule(job, self._initial_delay(job))
+        print(f"⏱️ 轮询调度器已启动: {', '.join(self.jobs)}")
+
+    def stop(self):
+        """停止所有轮询任务"""
+        self.running = False
+        for job in self.jobs.values():
+            job.timer.stop()
+        print("⏹️ 轮询调度器已停止")
+
+    @property
+    def suspended(self) -> bool:
+        return bool(self.suspend_reasons)
+
+    def suspend(self, reason: str):
+        """按原因挂起轮询（如窗口最小化、会话锁定）"""
+        if reason not in self.suspend_reasons:
+            self.suspend_reasons.add(reason)
+            print(f"⏸️ 轮询已挂起: {reason}")
+
+    def resume(self, reason: str):
+        """解除挂起原因，全部解除后立即补上挂起期间错过的轮询"""
+        if reason not in self.suspend_reasons:
+            return
+        self.suspend_reasons.discard(reason)
+        if self.suspended:
+            return
+        print(f"▶️ 轮询已恢复: {reason}")
+        for job in self.jobs.values():
+            if job.missed:
+                job.missed = False
+                job.timer.stop()
+                self._run(job)
+
+    def trigger_now(self, name: str):
+        """立即执行一次轮询；已有请求在进行中时合并到该请求"""
+        job = self.jobs.get(name)
+        if not job:
+            return
+        if self.suspended:
+            job.stats['skipped'] += 1
+            job.missed = True
+            return
+        job.timer.stop()
+        self._run(job)
+
+    def boost(self, name: str, duration_ms: int = 60000):
+        """用户操作后一段时间内使用快速轮询间隔"""
+        job = self.jobs.get(name)
+        if not job:
+            return
+        job.boost_until = time.monotonic() + duration_ms / 1000.0
+        if self.running and not job.in_flight and job.timer.remainingTime() > job.fast_interval_ms:
+            self._schedule(job, job.fast_interval_ms)
+
+    def complete(self, name: str, success: bool = True):
+        """标记轮询完成并安排下一次轮询（异步任务需在结果返回后调用）"""
+        job = self.jobs.get(name)
+        if not job:
+            return
+        job.in_flight = False
+        if success:
+            job.failures = 0
+        else:
+            job.failures += 1
+            job.stats['failed'] += 1
+        if self.running:
+            self._schedule(job)
+
+    def get_stats(self) -> Dict[str, Dict[str, int]]:
+        """获取各任务的轮询计数（已发出/已跳过/已合并/失败）"""
+        return {name: dict(job.stats) for name, job in self.jobs.items()}
+
+    def _initial_delay(self, job: PollJob) -> int:
+        return int(random.uniform(0, job.interval_ms * job.jitter))
+
+    def _next_interval(self, job: PollJob) -> int:
+        if job.backoff and job.failures:
+            interval = min(job.interval_ms * (2 ** job.failures), job.max_interval_ms)
+        elif time.monotonic() < job.boost_until:
+            interval = job.fast_interval_ms
+        else:
+            interval = job.interval_ms
+        spread = interval * job.jitter
+        return max(0, int(interval + random.uniform(-spread, spread)))
+
+    def _schedule(self, job: PollJob, delay_ms: Optional[int] = None):
+        job.timer.start(self._next_interval(job) if delay_ms is None else delay_ms)
+
+    def _on_timer(self, job: PollJob):
+        if self.suspended:
+            job.stats['skipped'] += 1
+            job.missed = True
+            self._schedule(job)
+            return
+        self._run(job)
+
+    def _run(self, job: PollJob):
+        if job.in_flight:
+            job.stats['merged'] += 1
+            return
+        job.in_flight = True
+        job.stats['issued'] += 1
+        try:
+            result = job.callback()
+        except Exception as e:
+            print(f"❌ 轮询任务 {job.name} 执行失败: {str(e)}")
+            self.complete(job.name, False)
+            return
+        if not job.async_completion:
+            self.complete(job.name, result is not False)
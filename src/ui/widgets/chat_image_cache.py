@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import requests
+from PyQt5.QtCore import QObject, QThreadPool, QRunnable, QBuffer, QByteArray, QIODevice, QSize, Qt, pyqtSignal
+from PyQt5.QtGui import QPixmap, QImage, QImageReader
+
+from resources.assets.config import online_chat_config as config
+from src.api import http_client
+
+
+class ImageFetchSignals(QObject):
+    """图片获取任务的信号"""
+    image_data_loaded = pyqtSignal(str, bytes, str)  # url, 图片数据, 来源(disk/revalidated/network)
+    load_failed = pyqtSignal(str, str)  # url, 错误信息
+
+
+class ImageFetchTask(QRunnable):
+    """图片获取任务 - 优先使用磁盘缓存，过期时带 ETag/Last-Modified 条件请求重新验证"""
+
+    def __init__(self, cache, image_url, headers, signals):
+        super().__init__()
+        self.setAutoDelete(False)  # 由缓存持有引用，排队中的任务可以被取消
+        self.cache = cache
+        self.image_url = image_url
+        self.headers = headers or {}
+        self.signals = signals
+
+    def run(self):
+        """获取图片数据"""
+        meta, data = self.cache.read_disk_entry(self.image_url)
+        if data is not None and time.time() - meta.get('checked_at', 0) < config.CHAT_IMAGE_REVALIDATE_AFTER:
+            self.signals.image_data_loaded.emit(self.image_url, data, 'disk')
+            return
+
+        try:
+            # 构建完整的图片URL
+            if self.image_url.startswith('http'):
+                full_url = self.image_url
+            else:
+                full_url = f"{config.CHAT_API_BASE_URL}{self.image_url}"
+
+            headers = dict(self.headers)
+            if data is not None:
+                if meta.get('etag'):
+                    headers['If-None-Match'] = meta['etag']
+                if meta.get('last_modified'):
+                    headers['If-Modified-Since'] = meta['last_modified']
+
+            print(f"🖼️ 开始下载图片: {full_url}")
+            response = http_client.get(full_url, headers=headers, timeout=10)
+
+            if response.status_code == 304 and data is not None:
+                self.cache.touch_disk_entry(self.image_url, meta)
+                self.signals.image_data_loaded.emit(self.image_url, data, 'revalidated')
+                return
+
+            response.raise_for_status()
+            self.cache.write_disk_entry(self.image_url, response.content,
+                                        response.headers.get('ETag'), response.headers.get('Last-Modified'))
+            self.signals.image_data_loaded.emit(self.image_url, response.content, 'network')
+
+        except requests.exceptions.RequestException as e:
+            if data is not None:
+                # 网络不可用时继续使用过期的磁盘缓存
+                self.signals.image_data_loaded.emit(self.image_url, data, 'disk')
+            elif isinstance(e, requests.exceptions.Timeout):
+                self.signals.load_failed.emit(self.image_url, "下载超时")
+            elif isinstance(e, requests.exceptions.ConnectionError):
+                self.signals.load_failed.emit(self.image_url, "网络连接失败")
+            elif isinstance(e, requests.exceptions.HTTPError):
+                self.signals.load_failed.emit(self.image_url, f"HTTP错误: {e.response.status_code}")
+            else:
+                self.signals.load_failed.emit(self.image_url, str(e))
+        except Exception as e:
+            self.signals.load_failed.emit(self.image_url, str(e))
+
+
+class ImageDecodeSignals(QObject):
+    """解码任务的信号（QRunnable 本身不能发信号）"""
+    decoded = pyqtSignal(object, QImage, int)  # 缓存键, 解码后的图片, 原始数据大小
+    failed = pyqtSignal(object, str)  # 缓存键, 错误信息
+
+
+class ImageDecodeTask(QRunnable):
+    """图片解码任务 - 在线程池中用 QImageReader 直接解码到目标尺寸"""
+
+    def __init__(self, key, data, max_size, signals):
+        super().__init__()
+        self.key = key
+        self.data = data
+        self.max_size = max_size
+        self.signals = signals
+
+    def run(self):
+        try:
+            buffer = QBuffer()
+            buffer.setData(QByteArray(self.data))
+            buffer.open(QIODevice.ReadOnly)
+            reader = QImageReader(buffer)
+            reader.setAutoTransform(True)
+
+            # 只在图片超过显示尺寸时缩小，解码器直接输出缩小后的像素
+            original_size = reader.size()
+            if (self.max_size is not None and original_size.isValid() and
+                    (original_size.width() > self.max_size.width() or
+                     original_size.height() > self.max_size.height())):
+                reader.setScaledSize(original_size.scaled(self.max_size, Qt.KeepAspectRatio))
+
+            image = reader.read()
+            if image.isNull():
+                self.signals.failed.emit(self.key, reader.errorString() or "图片格式不支持")
+            else:
+                self.signals.decoded.emit(self.key, image, len(self.data))
+        except Exception as e:
+            self.signals.failed.emit(self.key, str(e))
+
+
+class ChatImageCache(QObject):
+    """
+    聊天图片缓存
+
+    - 内存层：按字节数限制的已解码 QPixmap LRU，按 (file_url, 显示尺寸) 区分
+    - 磁盘层：CACHE_DIR/images 下按内容哈希保存图片数据，按 file_url 记录 ETag/Last-Modified
+    - 同一URL的并发请求合并为一次获取
+    - 下载在有并发上限的线程池中进行，后请求的（最新渲染的气泡）优先，气泡销毁时取消排队中的下载
+    - 解码在线程池中按显示尺寸进行，界面线程只负责 QImage -> QPixmap 转换
+    """
+
+    def __init__(self, cache_dir=None, memory_limit=config.CHAT_IMAGE_MEMORY_CACHE_BYTES, parent=None):
+        super().__init__(parent)
+        self.cache_dir = cache_dir or os.path.join(config.CACHE_DIR, 'images')
+        self.blob_dir = os.path.join(self.cache_dir, 'blobs')
+        self.index_dir = os.path.join(self.cache_dir, 'index')
+        os.makedirs(self.blob_dir, exist_ok=True)
+        os.makedirs(self.index_dir, exist_ok=True)
+
+        self.memory_limit = memory_limit
+        self.memory_bytes = 0
+        self._memory = OrderedDict()  # 缓存键 -> (QPixmap, 内存占用, 原始数据大小)
+        self._pending = {}  # 缓存键 -> [(成功回调, 失败回调, 所属对象ID)]
+        self._fetching = {}  # url -> [等待该图片数据的缓存键]
+        self._tasks = {}  # url -> ImageFetchTask
+        self._sequence = 0  # 请求序号，用作下载优先级
+        self._watched_owners = set()  # 已连接 destroyed 信号的控件ID
+        
+        self.download_pool = QThreadPool(self)
+        self.download_pool.setMaxThreadCount(config.CHAT_IMAGE_DOWNLOAD_CONCURRENCY)
+        self._fetch_signals = ImageFetchSignals(self)
+        self._fetch_signals.image_data_loaded.connect(self._on_data_loaded)
+        self._fetch_signals.load_failed.connect(self._on_load_failed)
+
+        self.decode_pool = QThreadPool(self)
+        self.decode_pool.setMaxThreadCount(config.CHAT_IMAGE_DECODE_THREADS)
+        self._decode_signals = ImageDecodeSignals(self)
+        self._decode_signals.decoded.connect(self._on_decoded)
+        self._decode_signals.failed.connect(self._on_decode_failed)
+        self._disk_lock = threading.Lock()
+        self.stats = {
+            'requests': 0, 'memory_hits': 0, 'disk_hits': 0, 'revalidated': 0,
+            'network': 0, 'merged': 0, 'failed': 0, 'cancelled': 0, 'bytes_saved': 0
+        }
+
+    def request(self, url, headers, on_loaded, on_failed=None, max_size=None, owner=None, urgent=False):
+        """
+        请求图片，结果通过回调返回（在界面线程调用）
+
+        Args:
+            url: 图片 file_url
+            headers: 下载时使用的请求头
+            on_loaded: 成功回调，参数为 QPixmap
+            on_failed: 失败回调，参数为错误信息
+            max_size: 显示尺寸上限(QSize)，超出时按比例缩小解码；None表示原图
+            owner: 发起请求的控件，控件销毁时自动取消其请求
+            urgent: 用户主动操作（如查看原图），排在所有下载之前
+        """
+        key = (url, max_size.width(), max_size.height()) if max_size is not None else (url, None)
+        self.stats['requests'] += 1
+        entry = self._memory.get(key)
+        if entry is not None:
+            self._memory.move_to_end(key)
+            self.stats['memory_hits'] += 1
+            self.stats['bytes_saved'] += entry[2]
+            self._invoke(on_loaded, entry[0])
+            return
+
+        owner_id = None
+        if owner is not None:
+            owner_id = id(owner)
+            if owner_id not in self._watched_owners:
+                # 每个控件只连接一次，同一控件的多次请求由 cancel_owner 一并取消
+                self._watched_owners.add(owner_id)
+                owner.destroyed.connect(lambda *_: self._on_owner_destroyed(owner_id))
+        
+        self._sequence += 1
+        priority = self._sequence + (1 << 30 if urgent else 0)
+        
+        if key in self._pending:
+            self.stats['merged'] += 1
+            self._pending[key].append((on_loaded, on_failed, owner_id))
+            self._promote(url, priority)
+            return
+
+        self._pending[key] = [(on_loaded, on_failed, owner_id)]
+        if url in self._fetching:
+            # 同一图片的其他尺寸正在获取，共用下载结果
+            self._fetching[url].append(key)
+            self._promote(url, priority)
+            return
+
+        self._fetching[url] = [key]
+        task = ImageFetchTask(self, url, headers, self._fetch_signals)
+        self._tasks[url] = task
+        self.download_pool.start(task, priority)
+
+    def _promote(self, url, priority):
+        """把仍在排队的下载调整到新的优先级"""
+        task = self._tasks.get(url)
+        if task is not None and self.download_pool.tryTake(task):
+            self.download_pool.start(task, priority)
+
+    def _on_owner_destroyed(self, owner_id):
+        self._watched_owners.discard(owner_id)
+        self.cancel_owner(owner_id)
+
+    def cancel_owner(self, owner_id):
+        """取消指定控件的所有请求；没有其他等待者的下载如果还在排队则直接移除"""
+        for key in list(self._pending):
+            callbacks = [item for item in self._pending[key] if item[2] != owner_id]
+            if callbacks:
+                self._pending[key] = callbacks
+                continue
+            del self._pending[key]
+            url = key[0]
+            keys = self._fetching.get(url)
+            if keys is None:
+                continue  # 已在解码中
+            if key in keys:
+                keys.remove(key)
+            if not keys:
+                task = self._tasks.get(url)
+                if task is not None and self.download_pool.tryTake(task):
+                    del self._fetching[url]
+                    del self._tasks[url]
+                    self.stats['cancelled'] += 1
+
+    def cancel_all(self):
+        """取消所有排队中的下载（聊天窗口关闭时调用）"""
+        for url, task in list(self._tasks.items()):
+            if self.download_pool.tryTake(task):
+                self._tasks.pop(url, None)
+                for key in self._fetching.pop(url, []):
+                    self._pending.pop(key, None)
+                self.stats['cancelled'] += 1
+
+    def _on_data_loaded(self, url, data, source):
+        """图片数据就绪，按各缓存键的尺寸提交解码任务"""
+        self._tasks.pop(url, None)
+        if source == 'disk':
+            self.stats['disk_hits'] += 1
+            self.stats['bytes_saved'] += len(data)
+        elif source == 'revalidated':
+            self.stats['revalidated'] += 1
+            self.stats['bytes_saved'] += len(data)
+        else:
+            self.stats['network'] += 1
+
+        for key in self._fetching.pop(url, []):
+            max_size = QSize(key[1], key[2]) if key[1] is not None else None
+            self.decode_pool.start(ImageDecodeTask(key, data, max_size, self._decode_signals))
+
+    def _on_decoded(self, key, image, data_size):
+        """解码完成，在界面线程转换为 QPixmap 并分发给等待的回调"""
+        pixmap = QPixmap.fromImage(image)
+        self._store_memory(key, pixmap, data_size)
+        for on_loaded, _, _ in self._pending.pop(key, []):
+            self._invoke(on_loaded, pixmap)
+
+    def _on_decode_failed(self, key, error_msg):
+        self.stats['failed'] += 1
+        self._fail_key(key, error_msg)
+
+    def _on_load_failed(self, url, error_msg):
+        self.stats['failed'] += 1
+        self._tasks.pop(url, None)
+        for key in self._fetching.pop(url, []):
+            self._fail_key(key, error_msg)
+
+    def _fail_key(self, key, error_msg):
+        for _, on_failed, _ in self._pending.pop(key, []):
+            if on_failed:
+                self._invoke(on_failed, error_msg)
+
+    @staticmethod
+    def _invoke(callback, value):
+        try:
+            callback(value)
+        except RuntimeError:
+            pass  # 气泡已被销毁
+
+    def _store_memory(self, key, pixmap, data_size):
+        """放入内存LRU，超出字节上限时淘汰最久未使用的图片"""
+        cost = pixmap.width() * pixmap.height() * max(pixmap.depth(), 8) // 8
+        if cost > self.memory_limit:
+            return
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self.memory_bytes -= old[1]
+        self._memory[key] = (pixmap, cost, data_size)
+        self.memory_bytes += cost
+        while self.memory_bytes > self.memory_limit and self._memory:
+            _, (_, evicted_cost, _) = self._memory.popitem(last=False)
+            self.memory_bytes -= evicted_cost
+
+    # 磁盘层（在下载线程中调用）
+    def _index_path(self, url):
+        return os.path.join(self.index_dir, hashlib.sha1(url.encode('utf-8')).hexdigest() + '.json')
+
+    def read_disk_entry(self, url):
+        """
+        读取磁盘缓存
+
+        Returns:
+            (元数据, 图片数据)，不存在时图片数据为None
+        """
+        try:
+            with open(self._index_path(url), 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            with open(os.path.join(self.blob_dir, meta['hash']), 'rb') as f:
+                return meta, f.read()
+        except (OSError, ValueError, KeyError):
+            return {}, None
+
+    def write_disk_entry(self, url, data, etag=None, last_modified=None):
+        """按内容哈希写入图片数据，并记录URL对应的验证信息"""
+        content_hash = hashlib.sha256(data).hexdigest()
+        blob_path = os.path.join(self.blob_dir, content_hash)
+        meta = {
+            'url': url,
+            'hash': content_hash,
+            'size': len(data),
+            'etag': etag,
+            'last_modified': last_modified,
+            'checked_at': time.time()
+        }
+        try:
+            with self._disk_lock:
+                if not os.path.exists(blob_path):
+                    self._write_atomic(blob_path, data)
+                self._write_atomic(self._index_path(url), json.dumps(meta).encode('utf-8'))
+        except OSError as e:
+            print(f"写入图片缓存失败: {str(e)}")
+
+    def touch_disk_entry(self, url, meta):
+        """304 验证通过后更新检查时间"""
+        meta = dict(meta, checked_at=time.time())
+        try:
+            with self._disk_lock:
+                self._write_atomic(self._index_path(url), json.dumps(meta).encode('utf-8'))
+        except OSError as e:
+            print(f"更新图片缓存失败: {str(e)}")
+
+    @staticmethod
+    def _write_atomic(path, data):
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+
+    def get_stats(self):
+        """
+        获取缓存统计（命中率、节省的下载字节数等）
+
+        hit_rate 只计算内存、磁盘和条件验证命中；合并到进行中下载的请求仍需等待网络，单独以 merge_rate 报告
+        """
+        stats = dict(self.stats)
+        hits = stats['memory_hits'] + stats['disk_hits'] + stats['revalidated']
+        stats['hit_rate'] = hits / stats['requests'] if stats['requests'] else 0.0
+        stats['merge_rate'] = stats['merged'] / stats['requests'] if stats['requests'] else 0.0
+        stats['memory_bytes'] = self.memory_bytes
+        stats['memory_items'] = len(self._memory)
+        return stats
+
+
+_default_cache = None
+
+
+def get_image_cache():
+    """获取进程级共享的聊天图片缓存（需在界面线程调用）"""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = ChatImageCache()
+    return _default_cache
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+虚拟消息列表
+按缓存的行高排列全部消息记录，滚动范围覆盖整个列表，只为可见区域附近的记录创建气泡
+"""
+
+from PyQt5.QtCore import Qt, QEvent, QTimer
+from PyQt5.QtWidgets import QWidget
+
+from resources.assets.config import online_chat_config as config
+
+# 行间距和内容边距（左, 上, 右, 下），与原先的 QVBoxLayout 一致
+ROW_SPACING = 10
+CONTENT_MARGINS = (10, 15, 10, 15)
+# 尚未测量的行的估算高度（像素），同类气泡测量过后改用最近一次的实测高度
+DEFAULT_ROW_HEIGHTS = {'text': 70, 'system': 60, 'image': 230, 'file': 110}
+# Qt 控件高度上限（QWIDGETSIZE_MAX）
+MAX_CANVAS_HEIGHT = 16777215
+
+
+class HeightIndex:
+    """行高前缀和（树状数组）- 修改单行高度、按纵坐标查找行都是 O(log n)"""
+
+    def __init__(self, heights=()):
+        self.build(heights)
+
+    def build(self, heights):
+        self._tree = [0] + list(heights)
+        size = len(self._tree)
+        for i in range(1, size):
+            parent = i + (i & -i)
+            if parent < size:
+                self._tree[parent] += self._tree[i]
+
+    def __len__(self):
+        return len(self._tree) - 1
+
+    def append(self, height):
+        i = len(self._tree)
+        # 新节点覆盖 (i - lowbit(i), i]，其中前面的部分是已有行之和
+        self._tree.append(height + self.prefix(i - 1) - self.prefix(i - (i & -i)))
+
+    def add(self, row, delta):
+        i = row + 1
+        while i < len(self._tree):
+            self._tree[i] += delta
+            i += i & -i
+
+    def prefix(self, count):
+        """前 count 行的高度之和"""
+        total = 0
+        i = count
+        while i > 0:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+
+    def find(self, offset):
+        """纵坐标 offset 所在的行（超出末尾时返回行数）"""
+        row = 0
+        step = 1 << (len(self._tree).bit_length() - 1)
+        while step:
+            nxt = row + step
+            if nxt < len(self._tree) and self._tree[nxt] <= offset:
+                row = nxt
+                offset -= self._tree[nxt]
+            step >>= 1
+        return row
+
+
+class ChatMessageList(QWidget):
+    """
+    虚拟消息列表画布 - 作为聊天滚动区域的内容，高度由全部记录的行高决定，
+    只为可见区域上下 CHAT_RENDER_OVERSCAN 像素内的记录创建气泡，移出该区域的气泡被回收；
+    气泡第一次创建时测量实际高度并缓存在记录中（record['height']），之后不再重复测量
+    """
+
+    def __init__(self, records, create_bubble, scroll_area, parent=None):
+        """
+        Args:
+            records: 消息记录列表（与聊天窗口共用，只通过本类的方法修改）
+            create_bubble: 根据记录创建气泡的函数
+            scroll_area: 所在的滚动区域
+        """
+        super().__init__(parent)
+        self.records = records
+        self.create_bubble = create_bubble
+        self.scroll_area = scroll_area
+        self.bubbles = {}  # id(记录) -> 已创建的气泡
+        self._heights = []  # 每行高度（含行间距）
+        self._index = HeightIndex()
+        self._estimates = dict(DEFAULT_ROW_HEIGHTS)
+        self._laying_out = False
+        self._last_width = 0
+        self.stats = {'created': 0, 'recycled': 0, 'measured': 0}
+
+        self.setAttribute(Qt.WA_StyledBackground, True)
+
+        # 数据变化时合并为一次布局；滚动时立即布局，保证同一帧内显示正确的气泡
+        self._layout_timer = QTimer(self)
+        self._layout_timer.setSingleShot(True)
+        self._layout_timer.timeout.connect(self.layout_visible)
+        scroll_area.verticalScrollBar().valueChanged.connect(self.layout_visible)
+        self._update_height()
+
+    # ---- 几何 ----
+
+    @staticmethod
+    def _kind(record):
+        message_type = record['message_type']
+        if message_type in ('image', 'file') and record['file_info']:
+            return message_type
+        if message_type == 'system' or record['sender_name'] == "系统":
+            return 'system'
+        return 'text'
+
+    def _row_height(self, record):
+        height = record['height'] or self._estimates[self._kind(record)]
+        return height + ROW_SPACING
+
+    def row_top(self, row):
+        return CONTENT_MARGINS[1] + self._index.prefix(row)
+
+    def row_at(self, y):
+        """纵坐标 y 处的行（限制在有效范围内）"""
+        return max(0, min(len(self.records) - 1, self._index.find(y - CONTENT_MARGINS[1])))
+
+    def content_height(self):
+        total = self._index.prefix(len(self._heights))
+        if self._heights:
+            total -= ROW_SPACING
+        return CONTENT_MARGINS[1] + total + CONTENT_MARGINS[3]
+
+    def _update_height(self):
+        self.setFixedHeight(min(self.content_height(), MAX_CANVAS_HEIGHT))
+
+    def _set_row_height(self, row, height):
+        delta = height - self._heights[row]
+        if delta:
+            self._heights[row] = height
+            self._index.add(row, delta)
+
+    def _rebuild_index(self, heights):
+        # 已有行沿用原来的高度（包括估算值），避免其余行的位置变化
+        self._heights = heights
+        self._index.build(heights)
+
+    # ---- 数据 ----
+
+    def append(self, record):
+        """在末尾追加记录"""
+        self.records.append(record)
+        height = self._row_height(record)
+        self._heights.append(height)
+        self._index.append(height)
+        self._update_height()
+        self.schedule_layout()
+
+    def prepend(self, records):
+        """在开头插入更早的记录，保持当前查看的内容位置不变"""
+        if not records:
+            return
+        scroll_bar = self.scroll_area.verticalScrollBar()
+        value = scroll_bar.value()
+        self.records[0:0] = records
+        self._rebuild_index([self._row_height(record) for record in records] + self._heights)
+        self._update_height()
+        scroll_bar.setValue(value + self._index.prefix(len(records)))
+        self.schedule_layout()
+
+    def remove_front(self, count):
+        """移除最早的 count 条记录（内存中的记录数量上限）"""
+        count = min(count, len(self.records))
+        if count <= 0:
+            return
+        scroll_bar = self.scroll_area.verticalScrollBar()
+        removed_height = self._index.prefix(count)
+        for record in self.records[:count]:
+            self._recycle(record)
+        del self.records[:count]
+        self._rebuild_index(self._heights[count:])
+        self._update_height()
+        scroll_bar.setValue(max(0, scroll_bar.value() - removed_height))
+        self.schedule_layout()
+
+    def clear(self):
+        """清空全部记录和气泡"""
+        for record in list(self.records):
+            self._recycle(record)
+        self.records.clear()
+        self._heights = []
+        self._index.build([])
+        self._update_height()
+
+    # ---- 布局 ----
+
+    def schedule_layout(self):
+        self._layout_timer.start(0)
+
+    def layout_visible(self, *args):
+        """为可见区域附近的记录创建并放置气泡，回收其余气泡"""
+        if self._laying_out:
+            return
+        self._laying_out = True
+        try:
+            # 测量新气泡后行高可能变化，重新定位后最多再布局两次
+            for _ in range(3):
+                if not self._layout_pass():
+                    break
+        finally:
+            self._laying_out = False
+
+    def _layout_pass(self):
+        """
+        执行一次布局
+
+        Returns:
+            bool: 测量后滚动位置被调整，需要再布局一次
+        """
+        self._layout_timer.stop()
+        if not self.records:
+            return False
+        scroll_bar = self.scroll_area.verticalScrollBar()
+        value = scroll_bar.value()
+        at_bottom = scroll_bar.maximum() > 0 and value >= scroll_bar.maximum()
+        view_height = self.scroll_area.viewport().height()
+        top = max(0, value - config.CHAT_RENDER_OVERSCAN)
+        bottom = value + view_height + config.CHAT_RENDER_OVERSCAN
+        width = max(1, self.width() - CONTENT_MARGINS[0] - CONTENT_MARGINS[2])
+
+        # 以可见区域顶部的行为锚点，上方的行高度变化时保持该行在屏幕上的位置
+        anchor_row = self.row_at(value)
+        anchor_offset = value - self.row_top(anchor_row)
+
+        visible = []
+        row = self.row_at(top)
+        while row < len(self.records) and self.row_top(row) < bottom:
+            record = self.records[row]
+            bubble = self.bubbles.get(id(record))
+            if bubble is None:
+                bubble = self._materialize(record)
+            if record['height'] is None:
+                self._measure(row, bubble, width)
+            visible.append((row, bubble))
+            row += 1
+
+        keep = {id(bubble.record) for _, bubble in visible}
+        for key in [key for key in self.bubbles if key not in keep]:
+            self._recycle(self.bubbles[key].record)
+
+        self._update_height()
+        for row, bubble in visible:
+            bubble.setGeometry(CONTENT_MARGINS[0], self.row_top(row), width, bubble.record['height'])
+            if not bubble.isVisible():
+                bubble.show()
+
+        if at_bottom:
+            target = scroll_bar.maximum()
+        else:
+            target = self.row_top(anchor_row) + anchor_offset
+        if target != scroll_bar.value():
+            scroll_bar.setValue(target)
+            return True
+        return False
+
+    def _materialize(self, record):
+        bubble = self.create_bubble(record)
+        bubble.setParent(self)
+        bubble.installEventFilter(self)
+        self.bubbles[id(record)] = bubble
+        self.stats['created'] += 1
+        return bubble
+
+    @staticmethod
+    def _bubble_height(bubble, width):
+        """气泡在宽度 width 下的高度（与放在 QVBoxLayout 中时相同）"""
+        bubble.ensurePolished()
+        if bubble.hasHeightForWidth():
+            height = bubble.heightForWidth(width)
+        else:
+            height = bubble.sizeHint().height()
+        return max(height, bubble.minimumSizeHint().height(), 1)
+
+    def _measure(self, row, bubble, width):
+        """测量气泡在当前宽度下的高度并缓存"""
+        height = self._bubble_height(bubble, width)
+        bubble.record['height'] = height
+        self._estimates[self._kind(bubble.record)] = height
+        self._set_row_height(row, height + ROW_SPACING)
+        self.stats['measured'] += 1
+
+    def _recycle(self, record):
+        bubble = self.bubbles.pop(id(record), None)
+        if bubble is not None:
+            bubble.removeEventFilter(self)
+            bubble.hide()
+            bubble.deleteLater()
+            self.stats['recycled'] += 1
+
+    def eventFilter(self, watched, event):
+        # 气泡内容变化（如图片加载完成）后重新测量该行
+        if event.type() == QEvent.LayoutRequest and getattr(watched, 'record', None) is not None:
+            record = watched.record
+            if (self.bubbles.get(id(record)) is watched and record['height'] is not None
+                    and self._bubble_height(watched, watched.width()) != record['height']):
+                record['height'] = None
+                self.schedule_layout()
+        return super().eventFilter(watched, event)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        if event.size().width() != self._last_width:
+            # 宽度变化后已创建的气泡需要按新宽度重新测量
+            self._last_width = event.size().width()
+            for bubble in self.bubbles.values():
+                bubble.record['height'] = None
+            self.schedule_layout()
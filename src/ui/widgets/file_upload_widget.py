@@ -1,13 +1,70 @@
 import os
+import json
+import time
 import hashlib
 import mimetypes
+import heapq
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
                            QProgressBar, QFrame, QScrollArea, QFileDialog, QMessageBox,
                            QApplication, QSizePolicy)
-from PyQt5.QtCore import Qt, QThread, pyqtSignal, QTimer, QMimeData
+from PyQt5.QtCore import Qt, QObject, QThread, pyqtSignal, QTimer, QMimeData
 from PyQt5.QtGui import QFont, QPixmap, QDragEnterEvent, QDropEvent, QPainter, QColor
 import requests
 from resources.assets.config import online_chat_config as config
+from src.api import http_client
+from src.api.upload_dedup import dedup_supported, get_upload_index, probe_blob, send_reference
+
+class BandwidthLimiter:
+    """上传带宽限制（按发送字节排队），多个上传线程共享；暂停时阻塞新的数据发送"""
+    
+    def __init__(self, bytes_per_second=0):
+        """
+        Args:
+            bytes_per_second: 每秒最多发送的字节数，0 表示不限制
+        """
+        self.bytes_per_second = bytes_per_second
+        self._lock = threading.Lock()
+        self._next_send = time.monotonic()
+        self._running = threading.Event()
+        self._running.set()
+    
+    @property
+    def paused(self):
+        return not self._running.is_set()
+    
+    def pause(self):
+        self._running.clear()
+    
+    def resume(self):
+        self._running.set()
+    
+    def consume(self, nbytes, is_cancelled=None):
+        """
+        发送数据前调用，按带宽限制等待
+        
+        Returns:
+            False 表示等待期间上传被取消
+        """
+        while not self._running.wait(0.2):
+            if is_cancelled and is_cancelled():
+                return False
+        if self.bytes_per_second <= 0:
+            return True
+        
+        with self._lock:
+            now = time.monotonic()
+            send_at = max(now, self._next_send)
+            self._next_send = send_at + nbytes / self.bytes_per_second
+        while True:
+            remaining = send_at - time.monotonic()
+            if remaining <= 0:
+                return True
+            if is_cancelled and is_cancelled():
+                return False
+            time.sleep(min(remaining, 0.2))
 
 class FileUploadThread(QThread):
     """文件上传线程"""
@@ -15,12 +72,14 @@ class FileUploadThread(QThread):
     upload_completed = pyqtSignal(dict)  # 上传完成
     upload_failed = pyqtSignal(str)  # 上传失败
     
-    def __init__(self, file_path, upload_url, headers=None):
+    def __init__(self, file_path, upload_url, headers=None, bandwidth_limiter=None):
         super().__init__()
         self.file_path = file_path
         self.upload_url = upload_url
         self.headers = headers or {}
+        self.bandwidth_limiter = bandwidth_limiter
         self.is_cancelled = False
+        self.retriable = True  # 失败后是否值得重试（文件类型、大小或认证错误时为False）
         
     def run(self):
         """执行文件上传"""
@@ -30,31 +89,37 @@ class FileUploadThread(QThread):
             
             # 检查文件大小
             if file_size > config.UPLOAD_MAX_SIZE:
+                self.retriable = False
                 self.upload_failed.emit(f"文件 {filename} 超过大小限制 {config.format_file_size(config.UPLOAD_MAX_SIZE)}")
                 return
                 
             # 检查文件类型
             if not config.is_file_allowed(filename):
+                self.retriable = False
                 self.upload_failed.emit(f"不支持的文件类型: {filename}")
                 return
             
-            # 计算文件哈希
-            file_hash = self.calculate_file_hash(self.file_path)
+            # 如果文件较大，使用分块上传（哈希在读取数据块时同步计算）
+            if file_size > config.UPLOAD_CHUNK_SIZE:
+                if not self.upload_by_reference(filename, file_size):
+                    self.upload_large_file(filename, file_size)
+                return
             
-            # 准备上传数据
+            # 小文件一次读入内存，哈希和上传共用同一份数据
             with open(self.file_path, 'rb') as file:
-                files = {'file': (filename, file, self.get_mime_type(filename))}
-                data = {
-                    'file_hash': file_hash,
-                    'file_size': file_size,
-                    'chunk_size': config.UPLOAD_CHUNK_SIZE
-                }
-                
-                # 如果文件较大，使用分块上传
-                if file_size > config.UPLOAD_CHUNK_SIZE:
-                    self.upload_large_file(file, filename, file_hash, file_size)
-                else:
-                    self.upload_small_file(files, data)
+                file_data = file.read()
+            file_hash = hashlib.md5(file_data).hexdigest()
+            if self.upload_by_reference(filename, file_size, file_hash):
+                return
+            if not self.throttle(file_size):
+                return
+            files = {'file': (filename, file_data, self.get_mime_type(filename))}
+            data = {
+                'file_hash': file_hash,
+                'file_size': file_size,
+                'chunk_size': config.UPLOAD_CHUNK_SIZE
+            }
+            self.upload_small_file(files, data)
                     
         except Exception as e:
             self.upload_failed.emit(f"上传失败: {str(e)}")
@@ -73,7 +138,7 @@ class FileUploadThread(QThread):
             
             print(f"🔄 上传请求headers: {list(upload_headers.keys())}")
             
-            response = requests.post(
+            response = http_client.post(
                 self.upload_url,
                 files=files,
                 data=data,
@@ -83,9 +148,11 @@ class FileUploadThread(QThread):
             
             if response.status_code == 200:
                 result = response.json()
+                get_upload_index().remember(self.file_path, data['file_hash'], data['file_size'])
                 self.progress_updated.emit(100)
                 self.upload_completed.emit(result)
             elif response.status_code == 401:
+                self.retriable = False
                 try:
                     error_detail = response.json().get('detail', '认证失败')
                     self.upload_failed.emit(f"认证失败 (401): {error_detail}")
@@ -101,57 +168,153 @@ class FileUploadThread(QThread):
         except Exception as e:
             self.upload_failed.emit(f"上传失败: {str(e)}")
     
-    def upload_large_file(self, file, filename, file_hash, file_size):
-        """分块上传大文件"""
+    def upload_by_reference(self, filename, file_size, file_hash=None):
+        """
+        去重上传：本地索引命中或服务器已有相同文件时只发送文件引用
+        
+        大文件首次上传时哈希要在上传过程中才能得到，此时跳过探测直接上传；
+        已知服务器没有 /exists 接口时跳过探测和引用
+        
+        Returns:
+            True 表示已通过引用完成上传
+        """
+        upload_index = get_upload_index()
+        if not dedup_supported(self.upload_url):
+            upload_index.record('probe_skipped')
+            return False
+        entry = upload_index.lookup(self.file_path)
+        if entry:
+            upload_index.record('index_hits')
+            file_hash = entry['file_hash']
+        elif file_hash is None:
+            return False
+        elif probe_blob(self.upload_url, file_hash, file_size, self.headers):
+            upload_index.record('probe_hits')
+        else:
+            upload_index.record('probe_misses')
+            return False
+        
+        result = send_reference(self.upload_url, file_hash, file_size, filename, self.headers)
+        if result is None:
+            upload_index.forget(self.file_path)
+            return False
+        upload_index.record('bytes_skipped', file_size)
+        upload_index.remember(self.file_path, file_hash, file_size)
+        print(f"♻️ 服务器已有相同文件，跳过上传: {filename}")
+        self.progress_updated.emit(100)
+        self.upload_completed.emit(result)
+        return True
+    
+    def get_upload_headers(self):
+        """multipart请求使用的请求头（移除Content-Type，由requests自动设置）"""
+        upload_headers = dict(self.headers)
+        upload_headers.pop('Content-Type', None)
+        upload_headers.pop('content-type', None)
+        return upload_headers
+    
+    def get_upload_id(self, file_size):
+        """
+        分块上传会话ID（由路径、大小和修改时间生成）
+        
+        完整文件哈希要到最后一块读完才能得到，数据块和续传清单因此使用该ID关联
+        """
+        mtime_ns = os.stat(self.file_path).st_mtime_ns
+        fingerprint = f"{os.path.abspath(self.file_path)}|{file_size}|{mtime_ns}"
+        return hashlib.md5(fingerprint.encode('utf-8')).hexdigest()
+    
+    def get_file_hash(self, chunk_size):
+        """
+        计算完整文件哈希（服务器不支持按 upload_id 分块上传时，每个数据块都要携带 file_hash）
+        
+        这是上传前额外的一遍完整读取，首个数据块要等它完成：50MB文件（文件已在页缓存中）约125ms，
+        边读边算哈希时首块约25ms（tests/test_file_upload.py 中的 StreamingHashBenchmark）
+        """
+        file_hasher = hashlib.md5()
+        with open(self.file_path, 'rb') as file:
+            for chunk_data in iter(lambda: file.read(chunk_size), b''):
+                file_hasher.update(chunk_data)
+        return file_hasher.hexdigest()
+    
+    def upload_large_file(self, filename, file_size):
+        """
+        分块上传大文件
+        
+        按顺序读取每个数据块一次，同时送入文件哈希和上传线程池；多个数据块并发上传（共享连接池），
+        单块失败自动重试。已完成的块记录在续传清单中，取消或崩溃后重新上传时跳过这些块
+        
+        数据块使用 upload_id 关联，并在文件哈希已知时附带 file_hash。服务器提供 /chunks 查询接口时
+        认为其支持按 upload_id 合并，哈希在上传过程中计算；否则按原有协议先计算文件哈希，每个数据块都携带 file_hash
+        
+        注意：API.json 中只有 /api/chat/upload，/chunks 不在接口定义中（原有的 /chunk、/merge 同样没有），
+        当前服务器上 /chunks 查询总是失败，实际总是走原有协议：先额外读一遍文件计算哈希，续传只依赖本地清单
+        """
         try:
             chunk_size = config.UPLOAD_CHUNK_SIZE
             chunks_total = (file_size + chunk_size - 1) // chunk_size
+            upload_id = self.get_upload_id(file_size)
             
-            for chunk_index in range(chunks_total):
-                if self.is_cancelled:
-                    return
-                    
-                # 读取数据块
-                file.seek(chunk_index * chunk_size)
-                chunk_data = file.read(chunk_size)
-                
-                # 上传数据块
-                files = {'chunk': (f"{filename}.part{chunk_index}", chunk_data)}
-                data = {
-                    'file_hash': file_hash,
-                    'chunk_index': chunk_index,
-                    'chunks_total': chunks_total,
-                    'filename': filename
-                }
-                
-                # 为multipart请求准备headers
-                upload_headers = {}
-                if self.headers:
-                    upload_headers = self.headers.copy()
-                    upload_headers.pop('Content-Type', None)
-                    upload_headers.pop('content-type', None)
-                
-                response = requests.post(
-                    f"{self.upload_url}/chunk",
-                    files=files,
-                    data=data,
-                    headers=upload_headers,
-                    timeout=config.CHAT_API_TIMEOUT
-                )
-                
-                if response.status_code != 200:
-                    self.upload_failed.emit(f"上传块 {chunk_index + 1}/{chunks_total} 失败")
+            manifest = self.load_manifest(upload_id, file_size, chunk_size, chunks_total)
+            server_chunks = self.query_server_chunks(upload_id)
+            file_hash = manifest.get('file_hash')
+            if server_chunks is None and file_hash is None:
+                file_hash = self.get_file_hash(chunk_size)
+                manifest['file_hash'] = file_hash
+            completed = set(manifest['completed']) | (server_chunks or set())
+            manifest['completed'] = sorted(completed)
+            if completed:
+                print(f"⏩ 断点续传: 已完成 {len(completed)}/{chunks_total} 块，继续上传剩余 {chunks_total - len(completed)} 块")
+                self.progress_updated.emit(int(len(completed) * 100 / chunks_total))
+            
+            manifest_lock = threading.Lock()
+            # 限制已读取但未上传完成的数据块数量，控制内存占用
+            in_flight = threading.BoundedSemaphore(config.UPLOAD_CHUNK_CONCURRENCY * 2)
+            upload_headers = self.get_upload_headers()
+            failed_chunks = []
+            file_hasher = hashlib.md5()
+            
+            def on_chunk_done(index, future):
+                in_flight.release()
+                if future.cancelled() or future.exception() or not future.result():
+                    failed_chunks.append(index)
                     return
-                
+                with manifest_lock:
+                    completed.add(index)
+                    manifest['completed'] = sorted(completed)
+                    self.save_manifest(upload_id, manifest)
+                    progress = int(len(completed) * 100 / chunks_total)
                 # 更新进度
-                progress = int((chunk_index + 1) * 100 / chunks_total)
                 self.progress_updated.emit(progress)
             
+            with ThreadPoolExecutor(max_workers=config.UPLOAD_CHUNK_CONCURRENCY) as executor:
+                # 缓冲读取保证每次 read 返回完整的数据块（文件末尾除外），块边界与 chunk_index 对齐
+                with open(self.file_path, 'rb', buffering=chunk_size) as file:
+                    for index in range(chunks_total):
+                        if self.is_cancelled or failed_chunks:
+                            break
+                        chunk_data = file.read(chunk_size)
+                        file_hasher.update(chunk_data)
+                        if index in completed:
+                            continue
+                        in_flight.acquire()
+                        future = executor.submit(
+                            self.upload_chunk, filename, upload_id, file_hash, index, chunks_total,
+                            chunk_data, hashlib.md5(chunk_data).hexdigest(), upload_headers
+                        )
+                        future.add_done_callback(lambda f, index=index: on_chunk_done(index, f))
+            
+            if self.is_cancelled:
+                print(f"⏸️ 上传已取消，已完成的 {len(completed)}/{chunks_total} 块可在下次续传")
+                return
+            if failed_chunks:
+                self.upload_failed.emit(f"上传块 {min(failed_chunks) + 1}/{chunks_total} 失败")
+                return
+            
             # 完成上传，请求合并文件
-            response = requests.post(
+            response = http_client.post(
                 f"{self.upload_url}/merge",
                 json={
-                    'file_hash': file_hash,
+                    'upload_id': upload_id,
+                    'file_hash': file_hasher.hexdigest(),
                     'filename': filename,
                     'chunks_total': chunks_total
                 },
@@ -160,6 +323,8 @@ class FileUploadThread(QThread):
             )
             
             if response.status_code == 200:
+                self.remove_manifest(upload_id)
+                get_upload_index().remember(self.file_path, file_hasher.hexdigest(), file_size)
                 result = response.json()
                 self.upload_completed.emit(result)
             else:
@@ -168,19 +333,112 @@ class FileUploadThread(QThread):
         except Exception as e:
             self.upload_failed.emit(f"分块上传失败: {str(e)}")
     
-    def calculate_file_hash(self, file_path):
-        """计算文件哈希值"""
-        hash_md5 = hashlib.md5()
-        with open(file_path, "rb") as f:
-            for chunk in iter(lambda: f.read(4096), b""):
-                hash_md5.update(chunk)
-        return hash_md5.hexdigest()
+    def upload_chunk(self, filename, upload_id, file_hash, chunk_index, chunks_total, chunk_data, chunk_hash,
+                     upload_headers):
+        """上传单个数据块（在线程池中执行），附带块哈希供服务器校验，失败时按指数退避重试"""
+        data = {
+            'upload_id': upload_id,
+            'chunk_index': chunk_index,
+            'chunk_hash': chunk_hash,
+            'chunks_total': chunks_total,
+            'filename': filename
+        }
+        if file_hash:
+            data['file_hash'] = file_hash
+        for attempt in range(config.UPLOAD_CHUNK_RETRIES + 1):
+            if not self.throttle(len(chunk_data)):
+                return False
+            try:
+                response = http_client.post(
+                    f"{self.upload_url}/chunk",
+                    files={'chunk': (f"{filename}.part{chunk_index}", chunk_data)},
+                    data=data,
+                    headers=upload_headers,
+                    timeout=config.CHAT_API_TIMEOUT
+                )
+                if response.status_code == 200:
+                    return True
+                if response.status_code in (401, 403, 413):
+                    self.retriable = False
+                    print(f"❌ 上传块 {chunk_index + 1}/{chunks_total} 被拒绝: HTTP {response.status_code}")
+                    return False
+                print(f"⚠️ 上传块 {chunk_index + 1}/{chunks_total} 失败: HTTP {response.status_code}")
+            except requests.exceptions.RequestException as e:
+                print(f"⚠️ 上传块 {chunk_index + 1}/{chunks_total} 异常: {str(e)}")
+            
+            if attempt < config.UPLOAD_CHUNK_RETRIES:
+                time.sleep(config.UPLOAD_RETRY_BACKOFF * (2 ** attempt))
+        return False
+    
+    def query_server_chunks(self, upload_id):
+        """询问服务器已收到的数据块，服务器不支持该接口（不在 API.json 中）时返回None"""
+        try:
+            response = http_client.get(
+                f"{self.upload_url}/chunks",
+                params={'upload_id': upload_id},
+                headers=self.headers,
+                timeout=config.CHAT_API_TIMEOUT
+            )
+            if response.status_code == 200:
+                return {int(index) for index in response.json().get('chunks', [])}
+        except (requests.exceptions.RequestException, ValueError, TypeError, AttributeError) as e:
+            print(f"⚠️ 查询已上传块失败: {str(e)}")
+        return None
+    
+    def manifest_path(self, upload_id):
+        return os.path.join(config.UPLOAD_MANIFEST_DIR, f"{upload_id}.json")
+    
+    def load_manifest(self, upload_id, file_size, chunk_size, chunks_total):
+        """读取续传清单；文件或分块参数变化时重新开始"""
+        manifest = {
+            'file_path': self.file_path,
+            'file_size': file_size,
+            'chunk_size': chunk_size,
+            'chunks_total': chunks_total,
+            'upload_url': self.upload_url,
+            'completed': []
+        }
+        try:
+            with open(self.manifest_path(upload_id), 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+            if (saved.get('file_size') == file_size and saved.get('chunk_size') == chunk_size
+                    and saved.get('upload_url') == self.upload_url):
+                manifest['completed'] = [index for index in saved.get('completed', []) if 0 <= index < chunks_total]
+                if saved.get('file_hash'):
+                    manifest['file_hash'] = saved['file_hash']
+        except (OSError, ValueError):
+            pass
+        return manifest
+    
+    def save_manifest(self, upload_id, manifest):
+        try:
+            os.makedirs(config.UPLOAD_MANIFEST_DIR, exist_ok=True)
+            temp_path = self.manifest_path(upload_id) + '.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f)
+            os.replace(temp_path, self.manifest_path(upload_id))
+        except OSError as e:
+            print(f"⚠️ 保存续传清单失败: {str(e)}")
+    
+    def remove_manifest(self, upload_id):
+        try:
+            os.remove(self.manifest_path(upload_id))
+        except OSError:
+            pass
     
     def get_mime_type(self, filename):
         """获取文件MIME类型"""
         mime_type, _ = mimetypes.guess_type(filename)
         return mime_type or 'application/octet-stream'
     
+    def throttle(self, nbytes):
+        """按共享带宽限制等待发送，返回False表示已取消"""
+        if self.is_cancelled:
+            return False
+        if self.bandwidth_limiter is None:
+            return True
+        return self.bandwidth_limiter.consume(nbytes, lambda: self.is_cancelled)
+    
     def cancel(self):
         """取消上传"""
         self.is_cancelled = True
@@ -358,7 +616,13 @@ class FileUploadItem(QFrame):
         print("❌ 未找到认证头，将尝试直接获取token")
         return headers
         
-    def start_upload(self):
+    def set_queued(self):
+        """进入上传队列等待"""
+        self.action_btn.setText("排队中")
+        self.action_btn.setEnabled(False)
+        self.status_label.setText(f"{config.format_file_size(os.path.getsize(self.file_path))} • 排队中")
+    
+    def start_upload(self, bandwidth_limiter=None):
         """开始上传"""
         if self.is_uploaded:
             return
@@ -392,7 +656,7 @@ class FileUploadItem(QFrame):
         else:
             print("✅ 找到Authorization认证头")
         
-        self.upload_thread = FileUploadThread(self.file_path, upload_url, headers)
+        self.upload_thread = FileUploadThread(self.file_path, upload_url, headers, bandwidth_limiter)
         
         # 连接信号
         self.upload_thread.progress_updated.connect(self.on_progress_updated)
@@ -453,6 +717,163 @@ class FileUploadItem(QFrame):
             self.upload_thread.quit()
             self.upload_thread.wait()
 
+class UploadQueue(QObject):
+    """上传队列 - 限制同时上传的文件数量和总带宽，小文件优先，支持暂停/继续、失败自动重试和总体进度统计"""
+    queue_progress = pyqtSignal(int, float)  # 总体进度百分比, 吞吐量(字节/秒)
+    queue_finished = pyqtSignal(int, int)  # 成功数量, 失败数量
+    
+    def __init__(self, max_concurrent=config.UPLOAD_MAX_CONCURRENT,
+                 bandwidth_limit=config.UPLOAD_BANDWIDTH_LIMIT,
+                 max_retries=config.UPLOAD_ITEM_RETRIES, parent=None):
+        super().__init__(parent)
+        self.max_concurrent = max_concurrent
+        self.max_retries = max_retries
+        self.limiter = BandwidthLimiter(bandwidth_limit)
+        self.paused = False
+        
+        self._waiting = []  # (文件大小, 序号, 上传项目) 小顶堆
+        self._sequence = 0
+        self._active = set()
+        self._retrying = set()
+        self._attempts = {}
+        self._sizes = {}  # 本批次所有项目的文件大小
+        self._done_bytes = {}
+        self._succeeded = 0
+        self._failed = 0
+        self._samples = deque(maxlen=10)  # (时间, 已完成字节) 用于计算吞吐量
+        
+        self.report_timer = QTimer(self)
+        self.report_timer.timeout.connect(self._report)
+    
+    @property
+    def waiting_count(self):
+        return len(self._waiting) + len(self._retrying)
+    
+    @property
+    def active_count(self):
+        return len(self._active)
+    
+    def is_queued(self, item):
+        """项目是否在等待、上传中或等待重试"""
+        return item in self._active or item in self._retrying or any(entry[2] is item for entry in self._waiting)
+    
+    def enqueue(self, *items):
+        """加入上传队列（已在队列中或已上传的项目忽略），同一批加入的文件按大小排序后开始上传"""
+        for item in items:
+            if item.is_uploaded or self.is_queued(item):
+                continue
+            if not self._sizes:
+                # 新的批次
+                self._succeeded = 0
+                self._failed = 0
+                self._samples.clear()
+                self.report_timer.start(1000)
+            size = os.path.getsize(item.file_path)
+            self._sizes[item] = size
+            self._done_bytes[item] = 0
+            self._attempts.setdefault(item, 0)
+            self._push(item, size)
+            item.set_queued()
+        self._dispatch()
+    
+    def remove(self, item):
+        """从队列中移除项目（进行中的上传由调用方取消）"""
+        self._waiting = [entry for entry in self._waiting if entry[2] is not item]
+        heapq.heapify(self._waiting)
+        self._active.discard(item)
+        self._retrying.discard(item)
+        self._attempts.pop(item, None)
+        self._sizes.pop(item, None)
+        self._done_bytes.pop(item, None)
+        self._dispatch()
+        self._check_finished()
+    
+    def pause(self):
+        """暂停：不再启动新的上传，进行中的上传在下一个数据块前等待"""
+        self.paused = True
+        self.limiter.pause()
+        print("⏸️ 上传队列已暂停")
+    
+    def resume(self):
+        """继续上传"""
+        self.paused = False
+        self.limiter.resume()
+        print("▶️ 上传队列已继续")
+        self._dispatch()
+    
+    def _push(self, item, size):
+        self._sequence += 1
+        heapq.heappush(self._waiting, (size, self._sequence, item))
+    
+    def _dispatch(self):
+        while not self.paused and self._waiting and len(self._active) < self.max_concurrent:
+            _, _, item = heapq.heappop(self._waiting)
+            self._active.add(item)
+            self._attempts[item] += 1
+            item.start_upload(self.limiter)
+            thread = item.upload_thread
+            thread.progress_updated.connect(lambda progress, item=item: self._on_progress(item, progress))
+            thread.upload_completed.connect(lambda result, item=item: self._on_completed(item))
+            thread.upload_failed.connect(lambda message, item=item, thread=thread: self._on_failed(item, thread, message))
+    
+    def _on_progress(self, item, progress):
+        if item in self._sizes:
+            self._done_bytes[item] = self._sizes[item] * progress // 100
+    
+    def _on_completed(self, item):
+        if item not in self._active:
+            return
+        self._active.discard(item)
+        self._done_bytes[item] = self._sizes[item]
+        self._succeeded += 1
+        self._dispatch()
+        self._check_finished()
+    
+    def _on_failed(self, item, thread, message):
+        if item not in self._active:
+            return
+        self._active.discard(item)
+        if thread.retriable and not thread.is_cancelled and self._attempts[item] <= self.max_retries:
+            delay = config.UPLOAD_ITEM_RETRY_DELAY * (2 ** (self._attempts[item] - 1))
+            print(f"🔁 {os.path.basename(item.file_path)} 上传失败，{delay // 1000} 秒后重试: {message}")
+            self._retrying.add(item)
+            QTimer.singleShot(delay, lambda item=item: self._retry(item))
+        else:
+            self._failed += 1
+            self._done_bytes[item] = 0
+        self._dispatch()
+        self._check_finished()
+    
+    def _retry(self, item):
+        if item not in self._retrying:
+            return
+        self._retrying.discard(item)
+        self._done_bytes[item] = 0
+        self._push(item, self._sizes[item])
+        item.set_queued()
+        self._dispatch()
+    
+    def _check_finished(self):
+        if self._sizes and not self._active and not self.waiting_count:
+            self._report()
+            self.report_timer.stop()
+            print(f"📦 上传队列完成: 成功 {self._succeeded}，失败 {self._failed}")
+            self.queue_finished.emit(self._succeeded, self._failed)
+            self._sizes.clear()
+            self._done_bytes.clear()
+            self._attempts.clear()
+    
+    def _report(self):
+        """汇总本批次的总体进度和吞吐量"""
+        total = sum(self._sizes.values())
+        done = sum(self._done_bytes.values())
+        now = time.monotonic()
+        self._samples.append((now, done))
+        first_time, first_done = self._samples[0]
+        throughput = (done - first_done) / (now - first_time) if now > first_time else 0.0
+        percent = int(done * 100 / total) if total else 100
+        self.queue_progress.emit(percent, max(throughput, 0.0))
+
 class FileUploadWidget(QWidget):
     """文件上传组件"""
     file_uploaded = pyqtSignal(dict)  # 文件上传完成信号
@@ -462,6 +883,10 @@ class FileUploadWidget(QWidget):
         self.upload_items = []
         self.headers = {}  # JWT认证头
         
+        self.upload_queue = UploadQueue(parent=self)
+        self.upload_queue.queue_progress.connect(self.on_queue_progress)
+        self.upload_queue.queue_finished.connect(self.on_queue_finished)
+        
         self.setup_ui()
         self.setAcceptDrops(True)  # 启用拖拽
         
@@ -545,6 +970,13 @@ class FileUploadWidget(QWidget):
         self.scroll_area.setWidget(self.file_list_widget)
         layout.addWidget(self.scroll_area)
         
+        # 队列总体进度
+        self.queue_status_label = QLabel("")
+        self.queue_status_label.setFont(QFont(config.FONTS['default'], 9))
+        self.queue_status_label.setStyleSheet("color: #6c757d;")
+        self.queue_status_label.setVisible(False)
+        layout.addWidget(self.queue_status_label)
+        
         # 操作按钮
         button_layout = QHBoxLayout()
         
@@ -569,6 +1001,28 @@ class FileUploadWidget(QWidget):
         self.upload_all_btn.clicked.connect(self.upload_all_files)
         self.upload_all_btn.setEnabled(False)
         
+        self.pause_btn = QPushButton("暂停")
+        self.pause_btn.setFixedHeight(40)
+        self.pause_btn.setFont(QFont(config.FONTS['default'], 10))
+        self.pause_btn.setStyleSheet("""
+            QPushButton {
+                background-color: #ffc107;
+                color: #212529;
+                border: none;
+                border-radius: 20px;
+                padding: 8px 20px;
+            }
+            QPushButton:hover {
+                background-color: #e0a800;
+            }
+            QPushButton:disabled {
+                background-color: #6c757d;
+                color: white;
+            }
+        """)
+        self.pause_btn.clicked.connect(self.toggle_pause)
+        self.pause_btn.setEnabled(False)
+        
         self.clear_all_btn = QPushButton("清空列表")
         self.clear_all_btn.setFixedHeight(40)
         self.clear_all_btn.setFont(QFont(config.FONTS['default'], 10))
@@ -587,6 +1041,7 @@ class FileUploadWidget(QWidget):
         self.clear_all_btn.clicked.connect(self.clear_all_files)
         
         button_layout.addWidget(self.upload_all_btn)
+        button_layout.addWidget(self.pause_btn)
         button_layout.addWidget(self.clear_all_btn)
         button_layout.addStretch()
         
@@ -659,6 +1114,9 @@ class FileUploadWidget(QWidget):
             # 创建上传项目
             upload_item = FileUploadItem(file_path)
             upload_item.remove_requested.connect(self.remove_file_item)
+            # 单个文件的上传/重试也经过队列，受并发和带宽限制
+            upload_item.action_btn.clicked.disconnect()
+            upload_item.action_btn.clicked.connect(lambda checked=False, item=upload_item: self.enqueue_item(item))
             
             self.upload_items.append(upload_item)
             self.file_list_layout.addWidget(upload_item)
@@ -668,6 +1126,7 @@ class FileUploadWidget(QWidget):
     def remove_file_item(self, item):
         """移除文件项目"""
         if item in self.upload_items:
+            self.upload_queue.remove(item)
             item.cancel_upload()
             self.upload_items.remove(item)
             self.file_list_layout.removeWidget(item)
@@ -676,13 +1135,41 @@ class FileUploadWidget(QWidget):
         self.update_buttons()
     
     def upload_all_files(self):
-        """上传所有文件"""
-        for item in self.upload_items:
-            if not item.is_uploaded:
-                # 设置认证头 - 直接传递给start_upload方法
-                item.start_upload()
+        """上传所有文件（由上传队列按小文件优先的顺序限流上传）"""
+        self.upload_queue.enqueue(*[item for item in self.upload_items if not item.is_uploaded])
                 
         self.upload_all_btn.setEnabled(False)
+        self.pause_btn.setEnabled(True)
+    
+    def enqueue_item(self, item):
+        """上传单个文件"""
+        self.upload_queue.enqueue(item)
+        self.pause_btn.setEnabled(True)
+    
+    def toggle_pause(self):
+        """暂停/继续上传队列"""
+        if self.upload_queue.paused:
+            self.upload_queue.resume()
+            self.pause_btn.setText("暂停")
+        else:
+            self.upload_queue.pause()
+            self.pause_btn.setText("继续")
+    
+    def on_queue_progress(self, percent, throughput):
+        """更新队列总体进度"""
+        state = "已暂停" if self.upload_queue.paused else f"{config.format_file_size(int(throughput))}/s"
+        self.queue_status_label.setText(
+            f"总进度 {percent}% • {state} • 上传中 {self.upload_queue.active_count}，"
+            f"等待 {self.upload_queue.waiting_count}"
+        )
+        self.queue_status_label.setVisible(True)
+    
+    def on_queue_finished(self, succeeded, failed):
+        """上传队列全部结束"""
+        self.queue_status_label.setText(f"上传完成: 成功 {succeeded} 个" + (f"，失败 {failed} 个" if failed else ""))
+        self.pause_btn.setEnabled(False)
+        self.pause_btn.setText("暂停")
+        self.update_buttons()
     
     def clear_all_files(self):
         """清空所有文件"""
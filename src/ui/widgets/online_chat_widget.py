@@ -17,9 +17,20 @@ import platform
 import mimetypes
 import tempfile
 import uuid
+import random
+import queue
+import hashlib
+import threading
+from collections import OrderedDict
 from datetime import datetime
 from resources.assets.config import online_chat_config as config
 from src.api.token_manager import TokenManager
+from src.api import http_client
+from src.api.chat_history_store import ChatHistoryStore
+from src.api.upload_dedup import dedup_supported, get_upload_index, probe_blob, send_reference
+from src.api.range_downloader import RangeDownloader
+from src.ui.widgets.chat_image_cache import get_image_cache
+from src.ui.widgets.chat_message_list import ChatMessageList
 from src.ui.widgets.file_upload_widget import FileUploadWidget
 from resources.assets.images.file_icons import get_file_icon_path
 
@@ -455,11 +466,12 @@ class ImageChatBubble(QFrame):
             self.image_label.hide()
             return
         
-        # 在新线程中下载图片
-        self.download_thread = ImageDownloadThread(self.file_url, self.get_api_headers())
-        self.download_thread.image_loaded.connect(self.on_image_loaded)
-        self.download_thread.load_failed.connect(self.on_image_load_failed)
-        self.download_thread.start()
+        # 通过共享图片缓存获取（内存/磁盘命中时不再下载）
+        # 按气泡显示尺寸解码，原图只在打开查看器时获取
+        get_image_cache().request(self.file_url, self.get_api_headers(),
+                                  self.on_image_loaded, self.on_image_load_failed,
+                                  max_size=QSize(self.max_image_width, self.max_image_height),
+                                  owner=self)
     
     def get_api_headers(self):
         """获取API请求头"""
@@ -475,19 +487,19 @@ class ImageChatBubble(QFrame):
         """图片加载成功"""
         self.loading_label.hide()
         
-        # 计算合适的显示尺寸
+        # 计算合适的显示尺寸（缓存返回的图片已按显示尺寸解码，通常无需再缩放）
         original_size = pixmap.size()
         scaled_size = self.calculate_display_size(original_size)
         
-        # 缩放图片
-        scaled_pixmap = pixmap.scaled(
-            scaled_size,
-            Qt.KeepAspectRatio,
-            Qt.SmoothTransformation
-        )
+        if scaled_size != original_size:
+            pixmap = pixmap.scaled(
+                scaled_size,
+                Qt.KeepAspectRatio,
+                Qt.SmoothTransformation
+            )
         
         # 设置图片
-        self.image_label.setPixmap(scaled_pixmap)
+        self.image_label.setPixmap(pixmap)
         self.image_label.setFixedSize(scaled_size)
         self.image_label.show()
         
@@ -586,8 +598,17 @@ class ImageChatBubble(QFrame):
         container_layout.addLayout(controls_layout)
     
     def view_full_image(self):
-        """查看大图"""
-        if hasattr(self.image_label, 'pixmap') and self.image_label.pixmap() and not self.image_label.pixmap().isNull():
+        """查看大图（按需获取原始分辨率图片）"""
+        if not self.file_url:
+            return
+        get_image_cache().request(self.file_url, self.get_api_headers(),
+                                  self.show_full_image, self.on_full_image_failed,
+                                  owner=self, urgent=True)
+    
+    def on_full_image_failed(self, error_msg):
+        """原图获取失败时使用气泡中的缩略图"""
+        print(f"❌ 原图加载失败: {self.file_name} - {error_msg}")
+        if self.image_label.pixmap() and not self.image_label.pixmap().isNull():
             self.show_full_image(self.image_label.pixmap())
     
     def on_image_clicked(self, event):
@@ -650,48 +671,6 @@ class ImageChatBubble(QFrame):
             i += 1
         return f"{size_bytes:.1f} {size_names[i]}"
 
-class ImageDownloadThread(QThread):
-    """图片下载线程"""
-    image_loaded = pyqtSignal(QPixmap)
-    load_failed = pyqtSignal(str)
-    
-    def __init__(self, image_url, headers=None):
-        super().__init__()
-        self.image_url = image_url
-        self.headers = headers or {}
-    
-    def run(self):
-        """下载图片"""
-        try:
-            # 构建完整的图片URL
-            from resources.assets.config.online_chat_config import CHAT_API_BASE_URL
-            if self.image_url.startswith('http'):
-                full_url = self.image_url
-            else:
-                full_url = f"{CHAT_API_BASE_URL}{self.image_url}"
-            
-            print(f"🖼️ 开始下载图片: {full_url}")
-            
-            # 下载图片数据
-            response = requests.get(full_url, headers=self.headers, timeout=10)
-            response.raise_for_status()
-            
-            # 创建QPixmap
-            pixmap = QPixmap()
-            if pixmap.loadFromData(response.content):
-                self.image_loaded.emit(pixmap)
-            else:
-                self.load_failed.emit("图片格式不支持")
-                
-        except requests.exceptions.Timeout:
-            self.load_failed.emit("下载超时")
-        except requests.exceptions.ConnectionError:
-            self.load_failed.emit("网络连接失败")
-        except requests.exceptions.HTTPError as e:
-            self.load_failed.emit(f"HTTP错误: {e.response.status_code}")
-        except Exception as e:
-            self.load_failed.emit(str(e))
-
 class ImageViewDialog(QDialog):
     """现代化图片查看器 - 移动应用风格设计"""
     def __init__(self, pixmap, filename, parent=None):
@@ -1989,12 +1968,176 @@ class FileUploadDialog(QDialog):
         # 不调用父类的closeEvent，防止事件传播
         # super().closeEvent(event)  # 注释掉这行
 
+class ChatPushChannel(QThread):
+    """聊天推送通道 - 通过SSE订阅聊天室的新消息和在线状态变化，断线后从最后一条消息ID继续"""
+    message_pushed = pyqtSignal(dict)
+    presence_changed = pyqtSignal(list)
+    connected = pyqtSignal()
+    disconnected = pyqtSignal(str)
+    push_unsupported = pyqtSignal(str)
+    
+    # 这些状态码说明服务器没有提供推送端点，不再重连
+    UNSUPPORTED_STATUS_CODES = (404, 405, 501)
+    
+    def __init__(self, api, parent=None):
+        super().__init__(parent)
+        self.api = api
+        self.last_event_id = None
+        self.reconnect_interval = config.RECONNECT_INTERVAL
+        self._running = False
+        self._response = None
+        self.stats = {'bytes': 0, 'events': 0, 'reconnects': 0}
+    
+    def update_last_id(self, message_id):
+        """记录已收到的最新消息ID（重连时从该ID之后继续）"""
+        if message_id:
+            self.last_event_id = str(message_id)
+    
+    def run(self):
+        """连接事件流，断开后按指数退避重连"""
+        self._running = True
+        failures = 0
+        while self._running:
+            try:
+                if self._listen():
+                    failures = 0
+            except requests.exceptions.RequestException as e:
+                if self._running:
+                    print(f"推送通道连接中断: {str(e)}")
+                    self.disconnected.emit(str(e))
+            except _PushUnsupported as e:
+                print(f"服务器不支持推送，继续使用轮询: {str(e)}")
+                self.push_unsupported.emit(str(e))
+                break
+            except Exception as e:
+                print(f"推送通道异常: {str(e)}")
+                self.disconnected.emit(str(e))
+            finally:
+                self._response = None
+            
+            if not self._running:
+                break
+            failures += 1
+            self.stats['reconnects'] += 1
+            delay = min(self.reconnect_interval * (2 ** (failures - 1)), config.CHAT_PUSH_MAX_RECONNECT_INTERVAL)
+            delay = int(delay * random.uniform(0.8, 1.2))
+            print(f"推送通道将在 {delay / 1000:.1f} 秒后重连")
+            # 分段休眠，便于及时响应停止请求
+            for _ in range(max(1, delay // 100)):
+                if not self._running:
+                    break
+                self.msleep(100)
+    
+    def _listen(self):
+        """
+        打开事件流并持续读取
+        
+        Returns:
+            bool: 本次连接是否成功收到过事件
+        """
+        headers = {'Accept': 'text/event-stream', 'Cache-Control': 'no-cache'}
+        if self.api.token:
+            headers['Authorization'] = f'Bearer {self.api.token}'
+        params = {'room_id': self.api.room_id}
+        if self.last_event_id:
+            headers['Last-Event-ID'] = self.last_event_id
+            params['last_id'] = self.last_event_id
+        
+        response = http_client.get(
+            f"{self.api.base_url}{config.CHAT_PUSH_PATH}",
+            headers=headers,
+            params=params,
+            stream=True,
+            timeout=(config.CHAT_API_TIMEOUT, config.CHAT_PUSH_READ_TIMEOUT)
+        )
+        self._response = response
+        try:
+            if response.status_code in self.UNSUPPORTED_STATUS_CODES:
+                raise _PushUnsupported(f"HTTP {response.status_code}")
+            response.raise_for_status()
+            content_type = response.headers.get('Content-Type', '')
+            if 'text/event-stream' not in content_type:
+                raise _PushUnsupported(f"Content-Type: {content_type or '未知'}")
+            
+            # SSE 事件流固定为UTF-8；未声明 charset 时 requests 会按 ISO-8859-1 解码 text/* 响应
+            response.encoding = 'utf-8'
+            print(f"📡 推送通道已连接 (从消息ID {self.last_event_id or '最新'} 继续)")
+            self.connected.emit()
+            received = False
+            event_type, data_lines, event_id = 'message', [], None
+            for line in response.iter_lines(decode_unicode=True):
+                if not self._running:
+                    return received
+                if line is None:
+                    continue
+                self.stats['bytes'] += len(line.encode('utf-8')) + 1
+                if line == '':
+                    # 空行表示一个事件结束
+                    if data_lines:
+                        self._dispatch(event_type, '\n'.join(data_lines), event_id)
+                        received = True
+                    event_type, data_lines, event_id = 'message', [], None
+                    continue
+                if line.startswith(':'):
+                    continue  # 心跳注释
+                field, _, value = line.partition(':')
+                if value.startswith(' '):
+                    value = value[1:]
+                if field == 'event':
+                    event_type = value
+                elif field == 'data':
+                    data_lines.append(value)
+                elif field == 'id':
+                    event_id = value
+                elif field == 'retry' and value.isdigit():
+                    self.reconnect_interval = int(value)
+            if self._running:
+                self.disconnected.emit("服务器关闭了事件流")
+            return received
+        finally:
+            response.close()
+    
+    def _dispatch(self, event_type, data, event_id):
+        """分发单个事件"""
+        try:
+            payload = json.loads(data)
+        except ValueError:
+            print(f"推送事件数据无法解析: {data[:100]}")
+            return
+        self.stats['events'] += 1
+        if event_type == 'message' and isinstance(payload, dict):
+            self.update_last_id(event_id or payload.get('id'))
+            self.message_pushed.emit(payload)
+        elif event_type == 'presence':
+            users = payload.get('users', []) if isinstance(payload, dict) else payload
+            if isinstance(users, list):
+                self.presence_changed.emit(users)
+    
+    def stop(self, timeout_ms=3000):
+        """停止推送通道"""
+        self._running = False
+        response = self._response
+        if response is not None:
+            try:
+                response.close()  # 中断阻塞中的读取
+            except Exception:
+                pass
+        if self.isRunning():
+            self.wait(timeout_ms)
+
+
+class _PushUnsupported(Exception):
+    """服务器未提供推送端点"""
+
+
 class OnlineChatAPI(QThread):
-    """在线聊天API处理线程"""
+    """在线聊天API处理线程 - 请求进入队列由后台线程依次执行，结果通过信号返回界面线程"""
     message_received = pyqtSignal(dict)
     messages_loaded = pyqtSignal(list)
     online_users_loaded = pyqtSignal(list)
     error_occurred = pyqtSignal(str)
+    health_checked = pyqtSignal(bool, str)  # 服务器健康检查结果(是否正常, 错误信息)
+    latency_measured = pyqtSignal(str, float)  # 请求往返耗时(端点, 毫秒)
     
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -2004,6 +2147,143 @@ class OnlineChatAPI(QThread):
         self.token_manager = TokenManager()  # 添加Token管理器
         self.auto_load_token()  # 自动加载token
         
+        # 请求队列 - 轮询类请求按键合并，关闭窗口时取消未执行的请求
+        self._requests = queue.Queue()
+        self._pending_keys = set()
+        self._pending_lock = threading.Lock()
+        self._generation = 0  # 取消时递增，旧批次的请求和结果都会被丢弃
+        self._current = threading.local()
+        self.coalesced_count = 0
+        self.traffic_bytes = {}  # 端点 -> 累计接收字节数
+        self.latency_stats = {}  # 端点 -> {'count', 'last_ms', 'avg_ms', 'max_ms'}
+    
+    def run(self):
+        """后台线程事件循环：依次执行队列中的请求"""
+        while True:
+            item = self._requests.get()
+            if item is None:
+                break
+            endpoint, key, generation, func, args = item
+            with self._pending_lock:
+                self._pending_keys.discard(key)
+                if generation != self._generation:
+                    continue
+            
+            self._current.generation = generation
+            start_time = time.perf_counter()
+            try:
+                func(*args)
+            except Exception as e:
+                print(f"聊天请求执行失败 {endpoint}: {str(e)}")
+            self._record_latency(endpoint, (time.perf_counter() - start_time) * 1000)
+    
+    def _submit(self, endpoint, func, *args, key=None):
+        """
+        提交请求到后台队列
+        
+        endpoint: 端点名称（用于耗时统计）
+        key: 合并键，相同键的请求尚未执行时新请求被合并
+        """
+        with self._pending_lock:
+            if key is not None:
+                if key in self._pending_keys:
+                    self.coalesced_count += 1
+                    return False
+                self._pending_keys.add(key)
+            self._requests.put((endpoint, key, self._generation, func, args))
+        if not self.isRunning():
+            self.start()
+        return True
+    
+    def _is_cancelled(self):
+        """当前请求所属批次是否已被取消"""
+        return getattr(self._current, 'generation', self._generation) != self._generation
+    
+    def _emit(self, signal, *args):
+        """只有请求未被取消时才发出结果信号"""
+        if not self._is_cancelled():
+            signal.emit(*args)
+    
+    def _record_latency(self, endpoint, elapsed_ms):
+        """记录端点往返耗时"""
+        stats = self.latency_stats.setdefault(endpoint, {'count': 0, 'last_ms': 0.0, 'avg_ms': 0.0, 'max_ms': 0.0})
+        stats['count'] += 1
+        stats['last_ms'] = elapsed_ms
+        stats['avg_ms'] += (elapsed_ms - stats['avg_ms']) / stats['count']
+        stats['max_ms'] = max(stats['max_ms'], elapsed_ms)
+        self._emit(self.latency_measured, endpoint, elapsed_ms)
+    
+    def _record_traffic(self, endpoint, response):
+        """累计端点响应字节数"""
+        self.traffic_bytes[endpoint] = self.traffic_bytes.get(endpoint, 0) + len(response.content)
+    
+    def get_latency_stats(self):
+        """获取各端点往返耗时统计"""
+        return {endpoint: dict(stats) for endpoint, stats in self.latency_stats.items()}
+    
+    def cancel_pending(self):
+        """取消所有未执行的请求，正在执行的请求结果将被丢弃"""
+        with self._pending_lock:
+            self._generation += 1
+            self._pending_keys.clear()
+            while True:
+                try:
+                    self._requests.get_nowait()
+                except queue.Empty:
+                    break
+    
+    def stop(self, timeout_ms=3000):
+        """取消请求并停止后台线程"""
+        self.cancel_pending()
+        if self.isRunning():
+            self._requests.put(None)
+            self.wait(timeout_ms)
+    
+    # 异步请求接口（在界面线程调用，立即返回）
+    def send_message(self, content, message_type="text", reply_to=None, file_info=None):
+        """发送消息"""
+        return self._submit("/api/chat/send", self._send_message_sync, content, message_type, reply_to, file_info)
+    
+    def load_messages(self, limit=50, before=None, anchor_id=None, anchor_timestamp=None, max_pages=None):
+        """
+        加载消息历史（相同参数的未执行请求会被合并）
+        
+        anchor_id: 本地已有的最新消息ID，服务器返回的最新一页没有覆盖到它时向前补齐
+        anchor_timestamp: 该消息的发送时间，补齐到比它更早的消息时停止（该消息已在服务器删除时）
+        max_pages: 补齐时最多请求的页数，默认 MESSAGE_SYNC_MAX_PAGES
+        """
+        return self._submit("/api/chat/messages", self._load_messages_sync,
+                            limit, before, anchor_id, anchor_timestamp, max_pages,
+                            key=("messages", limit, before, anchor_id, max_pages))
+    
+    def load_online_users(self):
+        """加载在线用户列表"""
+        return self._submit("/api/chat/online-users", self._load_online_users_sync, key="online_users")
+    
+    def send_heartbeat(self):
+        """发送心跳保持在线状态"""
+        return self._submit("/api/chat/heartbeat", self._send_heartbeat_sync, key="heartbeat")
+    
+    def upload_file_and_send(self, file_path, room_id="global"):
+        """上传文件并发送消息"""
+        return self._submit("/api/chat/upload", self._upload_file_and_send_sync, file_path, room_id)
+    
+    def check_health(self):
+        """检查服务器健康状态，结果通过 health_checked 信号返回"""
+        return self._submit("/health", self._check_health_sync, key="health")
+    
+    def _check_health_sync(self):
+        """通过健康检查端点测试服务器连接"""
+        try:
+            response = http_client.probe(f"{self.base_url}/health", timeout=3)
+            if response.status_code == 200:
+                self._emit(self.health_checked, True, "")
+            else:
+                self._emit(self.health_checked, False, "服务器健康检查失败")
+        except Exception as e:
+            print(f"服务器连接失败: {str(e)}")
+            self._emit(self.health_checked, False, f"服务器连接失败: {str(e)}")
+        
     def auto_load_token(self):
         """自动从JSON文件加载token"""
         try:
@@ -2042,7 +2322,7 @@ class OnlineChatAPI(QThread):
             headers['Authorization'] = f'Bearer {self.token}'
         return headers
     
-    def send_message(self, content, message_type="text", reply_to=None, file_info=None):
+    def _send_message_sync(self, content, message_type="text", reply_to=None, file_info=None):
         """发送消息 - 根据分析报告优化"""
         try:
             url = f"{self.base_url}/api/chat/send"
@@ -2066,7 +2346,7 @@ class OnlineChatAPI(QThread):
                 
             print(f"发送消息请求: URL={url}, 参数={params}, 数据={data}")
                 
-            response = requests.post(url, json=data, headers=self.get_headers(), 
+            response = http_client.post(url, json=data, headers=self.get_headers(), 
                                    params=params, timeout=config.CHAT_API_TIMEOUT)
             response.raise_for_status()
             
@@ -2079,76 +2359,113 @@ class OnlineChatAPI(QThread):
                     print(f"警告: 响应缺少必需字段 '{field}'")
             
             print(f"消息发送成功: ID={message_data.get('id', 'N/A')}")
-            self.message_received.emit(message_data)
+            self._emit(self.message_received, message_data)
             
         except requests.exceptions.Timeout:
-            self.error_occurred.emit("发送消息超时，请检查网络连接")
+            self._emit(self.error_occurred, "发送消息超时，请检查网络连接")
         except requests.exceptions.ConnectionError:
-            self.error_occurred.emit("无法连接到服务器，请检查网络设置")
+            self._emit(self.error_occurred, "无法连接到服务器，请检查网络设置")
         except requests.exceptions.HTTPError as e:
             if e.response.status_code == 401:
-                self.error_occurred.emit("认证失败，请重新登录")
+                self._emit(self.error_occurred, "认证失败，请重新登录")
             elif e.response.status_code == 403:
-                self.error_occurred.emit("权限不足，无法发送消息")
+                self._emit(self.error_occurred, "权限不足，无法发送消息")
             elif e.response.status_code == 413:
-                self.error_occurred.emit("消息内容过大，请减少内容长度")
+                self._emit(self.error_occurred, "消息内容过大，请减少内容长度")
             else:
-                self.error_occurred.emit(f"发送消息失败: HTTP {e.response.status_code}")
+                self._emit(self.error_occurred, f"发送消息失败: HTTP {e.response.status_code}")
         except Exception as e:
-            self.error_occurred.emit(f"发送消息失败: {str(e)}")
+            self._emit(self.error_occurred, f"发送消息失败: {str(e)}")
     
-    def load_messages(self, limit=50, before=None):
-        """加载消息历史 - 根据分析报告优化"""
+    def _load_messages_sync(self, limit=50, before=None, anchor_id=None, anchor_timestamp=None, max_pages=None):
+        """加载消息历史 - 根据分析报告优化，anchor_id 指定时补齐该消息之后遗漏的消息"""
         try:
-            url = f"{self.base_url}/api/chat/messages"
-            
-            # 根据分析报告优化参数构建
-            params = {
-                "room_id": self.room_id,
-                "limit": min(limit, 100)  # 限制单次加载量，避免过载
-            }
-            
-            # 分页支持（基于消息ID）
-            if before:
-                params["before"] = before
-                
-            print(f"加载消息请求: URL={url}, 参数={params}")
-                
-            response = requests.get(url, headers=self.get_headers(), 
-                                  params=params, timeout=config.CHAT_API_TIMEOUT)
-            response.raise_for_status()
-            
-            messages = response.json()
-            
-            # 验证消息数据结构
-            if not isinstance(messages, list):
-                print("警告: 服务器返回的不是消息列表格式")
-                messages = []
-            
-            # 验证每条消息的数据完整性
-            valid_messages = []
-            for msg in messages:
-                if self._validate_message_structure(msg):
-                    valid_messages.append(msg)
-                else:
-                    print(f"跳过无效消息: {msg}")
+            valid_messages = self._fetch_messages_page(limit, before)
+            
+            # 服务器只支持 before 分页（API.json 中没有 after 参数），总是返回最新一页；
+            # 这一页里没有本地最新的消息时说明中间还有遗漏，用 before 向前补齐
+            if anchor_id:
+                limit = min(limit, 100)
+                max_pages = max_pages or config.MESSAGE_SYNC_MAX_PAGES
+                page = valid_messages
+                pages = 1
+                reached = self._page_reaches_anchor(page, anchor_id, anchor_timestamp)
+                while not reached and len(page) >= limit and pages < max_pages:
+                    if self._is_cancelled():
+                        return
+                    page = self._fetch_messages_page(limit, before=page[-1].get('id'))
+                    valid_messages.extend(page)
+                    pages += 1
+                    reached = self._page_reaches_anchor(page, anchor_id, anchor_timestamp)
+                # 不满一页说明已到服务器最早的消息
+                if not reached and len(page) >= limit:
+                    print(f"⚠️ 补齐遗漏消息已达到 {pages} 页上限，更早的遗漏消息未补齐")
+                elif pages > 1:
+                    print(f"📥 补齐遗漏消息: {pages} 页，共 {len(valid_messages)} 条")
             
             print(f"成功加载 {len(valid_messages)} 条消息")
-            self.messages_loaded.emit(valid_messages)
+            self._emit(self.messages_loaded, valid_messages)
             
         except requests.exceptions.Timeout:
-            self.error_occurred.emit("加载消息超时，请检查网络连接")
+            self._emit(self.error_occurred, "加载消息超时，请检查网络连接")
         except requests.exceptions.ConnectionError:
-            self.error_occurred.emit("无法连接到服务器，请检查网络设置")
+            self._emit(self.error_occurred, "无法连接到服务器，请检查网络设置")
         except requests.exceptions.HTTPError as e:
             if e.response.status_code == 401:
-                self.error_occurred.emit("认证失败，请重新登录")
+                self._emit(self.error_occurred, "认证失败，请重新登录")
             elif e.response.status_code == 403:
-                self.error_occurred.emit("权限不足，无法获取消息")
+                self._emit(self.error_occurred, "权限不足，无法获取消息")
             else:
-                self.error_occurred.emit(f"加载消息失败: HTTP {e.response.status_code}")
+                self._emit(self.error_occurred, f"加载消息失败: HTTP {e.response.status_code}")
         except Exception as e:
-            self.error_occurred.emit(f"加载消息失败: {str(e)}")
+            self._emit(self.error_occurred, f"加载消息失败: {str(e)}")
+    
+    @staticmethod
+    def _page_reaches_anchor(page, anchor_id, anchor_timestamp):
+        """这一页是否已包含本地最新的消息，或已早于它的发送时间（该消息在服务器已被删除）"""
+        for msg in page:
+            if str(msg.get('id')) == str(anchor_id):
+                return True
+            if anchor_timestamp and str(msg.get('timestamp') or '') < anchor_timestamp:
+                return True
+        return False
+    
+    def _fetch_messages_page(self, limit, before=None):
+        """请求一页消息（最新的在前），返回通过结构校验的消息"""
+        url = f"{self.base_url}/api/chat/messages"
+        
+        # 根据分析报告优化参数构建
+        params = {
+            "room_id": self.room_id,
+            "limit": min(limit, 100)  # 限制单次加载量，避免过载
+        }
+        
+        # 分页支持（基于消息ID）
+        if before:
+            params["before"] = before
+            
+        print(f"加载消息请求: URL={url}, 参数={params}")
+            
+        response = http_client.get(url, headers=self.get_headers(), 
+                              params=params, timeout=config.CHAT_API_TIMEOUT)
+        self._record_traffic("/api/chat/messages", response)
+        response.raise_for_status()
+        
+        messages = response.json()
+        
+        # 验证消息数据结构
+        if not isinstance(messages, list):
+            print("警告: 服务器返回的不是消息列表格式")
+            messages = []
+        
+        # 验证每条消息的数据完整性
+        valid_messages = []
+        for msg in messages:
+            if self._validate_message_structure(msg):
+                valid_messages.append(msg)
+            else:
+                print(f"跳过无效消息: {msg}")
+        return valid_messages
     
     def _validate_message_structure(self, message):
         """验证消息数据结构完整性 - 根据分析报告的ChatMessage模型"""
@@ -2182,18 +2499,19 @@ class OnlineChatAPI(QThread):
         
         return True
     
-    def load_online_users(self):
+    def _load_online_users_sync(self):
         """加载在线用户列表"""
         try:
             url = f"{self.base_url}/api/chat/online-users"
-            response = requests.get(url, headers=self.get_headers(), timeout=config.CHAT_API_TIMEOUT)
+            response = http_client.get(url, headers=self.get_headers(), timeout=config.CHAT_API_TIMEOUT)
+            self._record_traffic("/api/chat/online-users", response)
             response.raise_for_status()
             
             users = response.json()
-            self.online_users_loaded.emit(users)
+            self._emit(self.online_users_loaded, users)
             
         except Exception as e:
-            self.error_occurred.emit(f"加载在线用户失败: {str(e)}")
+            self._emit(self.error_occurred, f"加载在线用户失败: {str(e)}")
     
     def is_image_file(self, filename):
         """判断文件是否为图片"""
@@ -2204,21 +2522,21 @@ class OnlineChatAPI(QThread):
         ext = os.path.splitext(filename.lower())[1]
         return ext in image_extensions
     
-    def upload_file_and_send(self, file_path, room_id="global"):
+    def _upload_file_and_send_sync(self, file_path, room_id="global"):
         """上传文件并发送消息 - 根据分析报告实现"""
         try:
             url = f"{self.base_url}/api/chat/upload"
             
             # 检查文件是否存在
             if not os.path.exists(file_path):
-                self.error_occurred.emit("文件不存在")
+                self._emit(self.error_occurred, "文件不存在")
                 return
             
             # 检查文件大小
             file_size = os.path.getsize(file_path)
             max_size = 10 * 1024 * 1024  # 10MB 限制（按照分析报告）
             if file_size > max_size:
-                self.error_occurred.emit(f"文件大小超过限制({max_size // (1024*1024)}MB)")
+                self._emit(self.error_occurred, f"文件大小超过限制({max_size // (1024*1024)}MB)")
                 return
             
             # 获取文件信息
@@ -2254,32 +2572,37 @@ class OnlineChatAPI(QThread):
                 elif ext in ['.xls', '.xlsx']:
                     content_type = 'application/vnd.ms-excel'
                 else:
-                    self.error_occurred.emit(f"不支持的文件类型: {ext}")
+                    self._emit(self.error_occurred, f"不支持的文件类型: {ext}")
                     return
             
-            print(f"📤 开始上传文件: {filename}, 大小: {file_size}, 类型: {content_type}")
-            
-            # 准备multipart/form-data请求
-            headers = self.get_headers()
-            # 移除Content-Type，让requests自动设置multipart边界
-            if 'Content-Type' in headers:
-                del headers['Content-Type']
+            # 去重：本地索引命中或服务器已有相同文件时只发送引用消息
+            message_data, file_data, file_hash = self._send_file_reference(url, file_path, filename, file_size, room_id)
             
-            with open(file_path, 'rb') as f:
+            if message_data is None:
+                print(f"📤 开始上传文件: {filename}, 大小: {file_size}, 类型: {content_type}")
+                
+                # 准备multipart/form-data请求
+                headers = self.get_headers()
+                # 移除Content-Type，让requests自动设置multipart边界
+                if 'Content-Type' in headers:
+                    del headers['Content-Type']
+                
                 files = {
-                    'file': (filename, f, content_type)
+                    'file': (filename, file_data, content_type)
                 }
                 data = {
-                    'room_id': room_id
+                    'room_id': room_id,
+                    'file_hash': file_hash
                 }
                 
-                response = requests.post(url, files=files, data=data, headers=headers, 
+                response = http_client.post(url, files=files, data=data, headers=headers, 
                                        timeout=config.CHAT_API_TIMEOUT * 2)  # 文件上传需要更长时间
-            
-            response.raise_for_status()
-            
-            # 解析响应 - 应该返回ChatMessage格式
-            message_data = response.json()
+                
+                response.raise_for_status()
+                get_upload_index().remember(file_path, file_hash, file_size)
+                
+                # 解析响应 - 应该返回ChatMessage格式
+                message_data = response.json()
             
             # 自动设置消息类型：如果是图片文件，设置为image类型
             if self.is_image_file(message_data.get('file_name', filename)):
@@ -2299,31 +2622,72 @@ class OnlineChatAPI(QThread):
             print(f"   消息类型: {message_data.get('message_type', 'N/A')}")
             
             # 发出消息接收信号
-            self.message_received.emit(message_data)
+            self._emit(self.message_received, message_data)
             
         except requests.exceptions.Timeout:
-            self.error_occurred.emit("文件上传超时，请检查网络连接或文件大小")
+            self._emit(self.error_occurred, "文件上传超时，请检查网络连接或文件大小")
         except requests.exceptions.ConnectionError:
-            self.error_occurred.emit("无法连接到服务器，请检查网络设置")
+            self._emit(self.error_occurred, "无法连接到服务器，请检查网络设置")
         except requests.exceptions.HTTPError as e:
             if e.response.status_code == 413:
-                self.error_occurred.emit("文件大小超过服务器限制(10MB)")
+                self._emit(self.error_occurred, "文件大小超过服务器限制(10MB)")
             elif e.response.status_code == 415:
-                self.error_occurred.emit("不支持的文件类型")
+                self._emit(self.error_occurred, "不支持的文件类型")
             elif e.response.status_code == 401:
-                self.error_occurred.emit("认证失败，请重新登录")
+                self._emit(self.error_occurred, "认证失败，请重新登录")
             elif e.response.status_code == 403:
-                self.error_occurred.emit("权限不足，无法上传文件")
+                self._emit(self.error_occurred, "权限不足，无法上传文件")
             else:
-                self.error_occurred.emit(f"文件上传失败: HTTP {e.response.status_code}")
+                self._emit(self.error_occurred, f"文件上传失败: HTTP {e.response.status_code}")
         except Exception as e:
-            self.error_occurred.emit(f"文件上传失败: {str(e)}")
+            self._emit(self.error_occurred, f"文件上传失败: {str(e)}")
     
-    def send_heartbeat(self):
+    def _send_file_reference(self, url, file_path, filename, file_size, room_id):
+        """
+        尝试以引用方式发送服务器上已有的文件
+        
+        Returns:
+            (引用消息数据或None, 需要上传时的文件内容, 文件哈希)
+        """
+        upload_index = get_upload_index()
+        # 已知服务器没有 /exists 接口时跳过索引和探测，直接上传
+        entry = upload_index.lookup(file_path) if dedup_supported(url) else None
+        file_data = None
+        if entry:
+            upload_index.record('index_hits')
+            file_hash = entry['file_hash']
+        else:
+            # 文件一次读入内存，哈希和上传共用同一份数据
+            with open(file_path, 'rb') as f:
+                file_data = f.read()
+            file_hash = hashlib.md5(file_data).hexdigest()
+            if not dedup_supported(url):
+                upload_index.record('probe_skipped')
+                return None, file_data, file_hash
+            if not probe_blob(url, file_hash, file_size, self.get_headers()):
+                upload_index.record('probe_misses')
+                return None, file_data, file_hash
+            upload_index.record('probe_hits')
+        
+        message_data = send_reference(url, file_hash, file_size, filename, self.get_headers(), room_id=room_id)
+        if message_data is None:
+            upload_index.forget(file_path)
+            if file_data is None:
+                with open(file_path, 'rb') as f:
+                    file_data = f.read()
+            return None, file_data, file_hash
+        
+        upload_index.record('bytes_skipped', file_size)
+        upload_index.remember(file_path, file_hash, file_size)
+        print(f"♻️ 服务器已有相同文件，发送引用消息: {filename}")
+        return message_data, None, file_hash
+    
+    def _send_heartbeat_sync(self):
         """发送心跳保持在线状态"""
         try:
             url = f"{self.base_url}/api/chat/heartbeat"
-            response = requests.post(url, headers=self.get_headers(), timeout=config.CHAT_API_TIMEOUT)
+            response = http_client.post(url, headers=self.get_headers(), timeout=config.CHAT_API_TIMEOUT)
+            self._record_traffic("/api/chat/heartbeat", response)
             response.raise_for_status()
             
         except Exception as e:
@@ -2337,7 +2701,7 @@ class OnlineChatAPI(QThread):
             
             print(f"🗑️ 删除消息请求: ID={message_id}, 房间={room_id}")
             
-            response = requests.delete(url, headers=self.get_headers(), 
+            response = http_client.delete(url, headers=self.get_headers(), 
                                      params=params, timeout=config.CHAT_API_TIMEOUT)
             response.raise_for_status()
             
@@ -2348,19 +2712,19 @@ class OnlineChatAPI(QThread):
         except requests.exceptions.HTTPError as e:
             if e.response.status_code == 403:
                 print("❌ 消息删除失败: 只能删除自己的消息")
-                self.error_occurred.emit("只能删除自己的消息")
+                self._emit(self.error_occurred, "只能删除自己的消息")
             elif e.response.status_code == 404:
                 print("❌ 消息删除失败: 消息不存在")
-                self.error_occurred.emit("消息不存在或已被删除")
+                self._emit(self.error_occurred, "消息不存在或已被删除")
             elif e.response.status_code == 401:
                 print("❌ 消息删除失败: 认证失败")
-                self.error_occurred.emit("认证失败，请重新登录")
+                self._emit(self.error_occurred, "认证失败，请重新登录")
             else:
                 print(f"❌ 消息删除失败: HTTP {e.response.status_code}")
-                self.error_occurred.emit(f"删除消息失败: HTTP {e.response.status_code}")
+                self._emit(self.error_occurred, f"删除消息失败: HTTP {e.response.status_code}")
         except Exception as e:
             print(f"❌ 消息删除失败: {str(e)}")
-            self.error_occurred.emit(f"删除消息失败: {str(e)}")
+            self._emit(self.error_occurred, f"删除消息失败: {str(e)}")
         
         return False
     
@@ -2369,7 +2733,7 @@ class OnlineChatAPI(QThread):
         try:
             url = f"{self.base_url}/api/chat/stats"
             
-            response = requests.get(url, headers=self.get_headers(), 
+            response = http_client.get(url, headers=self.get_headers(), 
                                   timeout=config.CHAT_API_TIMEOUT)
             response.raise_for_status()
             
@@ -2414,26 +2778,15 @@ class OnlineChatAPI(QThread):
             if self.token:
                 headers['Authorization'] = f'Bearer {self.token}'
             
-            response = requests.get(full_url, headers=headers, 
-                                  timeout=config.CHAT_API_TIMEOUT * 3,  # 下载需要更长时间
-                                  stream=True)  # 流式下载，支持大文件
-            response.raise_for_status()
+            def print_progress(downloaded_size, total_size):
+                if total_size > 0:
+                    progress = (downloaded_size / total_size) * 100
+                    print(f"📥 下载进度: {progress:.1f}% ({downloaded_size}/{total_size} 字节)")
             
-            # 获取文件大小
-            total_size = int(response.headers.get('content-length', 0))
-            
-            # 写入文件
-            with open(save_path, 'wb') as f:
-                downloaded_size = 0
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
-                        downloaded_size += len(chunk)
-                        
-                        # 打印下载进度
-                        if total_size > 0:
-                            progress = (downloaded_size / total_size) * 100
-                            print(f"📥 下载进度: {progress:.1f}% ({downloaded_size}/{total_size} 字节)")
+            # 断点续传下载（先写入 .part 文件，大文件分段并行）
+            RangeDownloader(full_url, save_path, headers=headers,
+                            progress_callback=print_progress,
+                            timeout=config.CHAT_API_TIMEOUT * 3).run()  # 下载需要更长时间
             
             print(f"✅ 文件下载成功: {save_path}")
             return save_path
@@ -2474,6 +2827,28 @@ class OnlineChatWidget(QWidget):
         # 初始化API
         self.api = OnlineChatAPI()
         
+        # 消息列表模型 - 全部记录只保存数据，由虚拟消息列表为可见区域内的记录创建气泡
+        self.message_records = []
+        self._paging = False
+        self.local_history_exhausted = False  # 本地已没有更早的记录
+        
+        # 消息ID索引（有界，按插入顺序淘汰），用于O(1)去重
+        self.message_id_index = OrderedDict()
+        self.message_signature_index = OrderedDict()
+        self.newest_message_id = None
+        self.newest_message_timestamp = None
+        
+        # 初始化本地聊天记录存储（打开时先从本地渲染，再从服务器补齐缺口）
+        try:
+            self.history_store = ChatHistoryStore()
+        except Exception as e:
+            print(f"聊天记录存储初始化失败，仅使用服务器数据: {str(e)}")
+            self.history_store = None
+        
+        # 初始化推送通道（连接成功后代替轮询）
+        self.push_channel = ChatPushChannel(self.api)
+        self.push_active = False
+        
         # 初始化Token管理器
         self.token_manager = TokenManager()
         
@@ -2481,6 +2856,10 @@ class OnlineChatWidget(QWidget):
         self.user_profession_cache = {}  # 用户名 -> 职业映射
         self.user_avatar_cache = {}      # 用户名 -> 头像路径映射
         
+        # 预先渲染职业头像
+        if config.AVATAR_CACHE_WARMUP:
+            config.warm_avatar_cache()
+        
         # 初始化心跳定时器
         self.heartbeat_timer = QTimer()
         
@@ -2793,12 +3172,8 @@ class OnlineChatWidget(QWidget):
             }
         """)
         
-        self.chat_area = QWidget()
-        self.chat_area.setStyleSheet("background-color: #F0F2F5;")
-        self.chat_layout = QVBoxLayout(self.chat_area)
-        self.chat_layout.setAlignment(Qt.AlignTop)
-        self.chat_layout.setSpacing(10)
-        self.chat_layout.setContentsMargins(10, 15, 10, 15)
+        self.chat_area = ChatMessageList(self.message_records, self._create_bubble, self.scroll)
+        self.chat_area.setStyleSheet("ChatMessageList { background-color: #F0F2F5; }")
         
         self.scroll.setWidget(self.chat_area)
         chat_layout.addWidget(self.scroll)
@@ -3030,6 +3405,17 @@ class OnlineChatWidget(QWidget):
         self.api.messages_loaded.connect(self.on_messages_loaded)
         self.api.online_users_loaded.connect(self.on_online_users_loaded)
         self.api.error_occurred.connect(self.on_error_occurred)
+        self.api.health_checked.connect(self.on_health_checked)
+        
+        # 聊天区域滚动时按需渲染消息
+        self.scroll.verticalScrollBar().valueChanged.connect(self.on_chat_scrolled)
+        
+        # 推送通道信号连接
+        self.push_channel.message_pushed.connect(self.on_message_pushed)
+        self.push_channel.presence_changed.connect(self.on_online_users_loaded)
+        self.push_channel.connected.connect(self.on_push_connected)
+        self.push_channel.disconnected.connect(self.on_push_disconnected)
+        self.push_channel.push_unsupported.connect(self.on_push_unsupported)
         
         # 自动刷新定时器连接
         self.auto_refresh_timer.timeout.connect(self.auto_refresh_messages)
@@ -3040,24 +3426,61 @@ class OnlineChatWidget(QWidget):
             self.heartbeat_timer.timeout.connect(self.send_heartbeat)
             self.heartbeat_timer.start(config.HEARTBEAT_INTERVAL)
             
-            # 启动自动刷新定时器
+            # 启动自动刷新定时器（推送通道连接后停止）
+            self.auto_refresh_timer.start(config.AUTO_REFRESH_INTERVAL)
+            
+            # 启动推送通道
+            if config.CHAT_PUSH_ENABLED and not self.push_channel.isRunning():
+                self.push_channel.start()
+    
+    def on_push_connected(self):
+        """推送通道已连接，停止轮询"""
+        self.push_active = True
+        if self.auto_refresh_timer.isActive():
+            self.auto_refresh_timer.stop()
+        print("📡 已切换到推送模式，停止消息轮询")
+    
+    def on_push_disconnected(self, reason):
+        """推送通道断开，重连期间回退到轮询"""
+        self.push_active = False
+        if not self.connection_error and not self.auto_refresh_timer.isActive():
             self.auto_refresh_timer.start(config.AUTO_REFRESH_INTERVAL)
+            print(f"推送通道断开，临时回退到轮询: {reason}")
+    
+    def on_push_unsupported(self, reason):
+        """服务器不支持推送，保持轮询"""
+        self.push_active = False
+        if not self.connection_error and not self.auto_refresh_timer.isActive():
+            self.auto_refresh_timer.start(config.AUTO_REFRESH_INTERVAL)
+    
+    def on_message_pushed(self, message):
+        """收到推送的新消息"""
+        if self.api._validate_message_structure(message):
+            self.on_messages_loaded([message])
+    
+    def get_traffic_stats(self):
+        """获取聊天网络流量统计（轮询与推送分别统计）"""
+        return {
+            'polling_bytes': dict(self.api.traffic_bytes),
+            'push': dict(self.push_channel.stats),
+            'push_active': self.push_active
+        }
     
     def check_server_connection(self):
-        """检查服务器连接"""
-        try:
-            # 通过健康检查端点测试服务器连接
-            response = requests.get(f"{self.api.base_url}/health", timeout=3)
-            if response.status_code == 200:
-                self.connection_error = False
-                self.status_label.setText("正在连接...")
-                self.setup_heartbeat()
-                self.load_initial_data()
-            else:
-                self.handle_connection_error("服务器健康检查失败")
-        except Exception as e:
-            print(f"服务器连接失败: {str(e)}")
-            self.handle_connection_error(f"服务器连接失败: {str(e)}")
+        """检查服务器连接（在后台线程执行，结果由 on_health_checked 处理）"""
+        # 等待服务器响应期间先显示本地记录
+        self.render_cached_history()
+        self.api.check_health()
+    
+    def on_health_checked(self, healthy, error_message):
+        """服务器健康检查结果处理"""
+        if healthy:
+            self.connection_error = False
+            self.status_label.setText("正在连接...")
+            self.setup_heartbeat()
+            self.load_initial_data()
+        else:
+            self.handle_connection_error(error_message)
     
     def handle_connection_error(self, error_message):
         """处理连接错误"""
@@ -3088,8 +3511,13 @@ class OnlineChatWidget(QWidget):
         self.loading_indicator.show()
         self.status_label.setText("正在加载...")
         
-        # 加载消息历史
-        self.api.load_messages()
+        # 先显示本地记录，再从服务器补齐本地最新消息之后的部分
+        self.render_cached_history()
+        if self.newest_message_id:
+            self.api.load_messages(limit=config.MESSAGE_HISTORY_LIMIT, anchor_id=self.newest_message_id,
+                                   anchor_timestamp=self.newest_message_timestamp)
+        else:
+            self.api.load_messages()
         
         # 加载在线用户
         self.api.load_online_users()
@@ -3109,21 +3537,76 @@ class OnlineChatWidget(QWidget):
         if not timestamp:
             timestamp = datetime.now().strftime("%H:%M")
         
+        self._append_message_record(self._make_message_record(
+            content, is_user, sender_name, timestamp, message_type, file_info, profession
+        ))
+        
+        # 智能滚动到底部（只有用户在底部时才滚动）
+        self.force_scroll_to_bottom()
+    
+    def _make_message_record(self, content, is_user, sender_name, timestamp, message_type="text",
+                             file_info=None, profession="", message_id=None):
+        """构建消息记录（消息列表的数据模型，气泡按需从记录创建）"""
+        return {
+            'content': content,
+            'is_user': is_user,
+            'sender_name': sender_name,
+            'timestamp': timestamp,
+            'message_type': message_type,
+            'file_info': file_info,
+            'profession': profession,
+            'message_id': message_id,
+            'height': None  # 气泡第一次显示时测量的高度，未测量时按同类气泡估算
+        }
+    
+    def _create_bubble(self, record):
+        """根据消息记录创建气泡"""
+        message_type = record['message_type']
+        file_info = record['file_info']
         # 根据消息类型和文件信息选择合适的气泡
         if message_type == "image" and file_info:
-            # 图片消息使用ImageChatBubble
-            bubble = ImageChatBubble(file_info, is_user, sender_name, timestamp, profession)
+            bubble = ImageChatBubble(file_info, record['is_user'], record['sender_name'],
+                                     record['timestamp'], record['profession'])
         elif message_type == "file" and file_info:
-            # 文件消息使用FileChatBubble
-            bubble = FileChatBubble(file_info, is_user, sender_name, timestamp, profession)
+            bubble = FileChatBubble(file_info, record['is_user'], record['sender_name'],
+                                    record['timestamp'], record['profession'])
         else:
-            # 普通文本消息使用OnlineChatBubble
-            bubble = OnlineChatBubble(content, is_user, sender_name, timestamp, profession, message_type)
-            
-        self.chat_layout.addWidget(bubble)
+            bubble = OnlineChatBubble(record['content'], record['is_user'], record['sender_name'],
+                                      record['timestamp'], record['profession'], message_type)
         
-        # 智能滚动到底部（只有用户在底部时才滚动）
-        self.force_scroll_to_bottom()
+        # 设置消息ID和其他属性用于去重和管理
+        if record['message_id']:
+            bubble.message_id = record['message_id']
+        bubble.text = record['content']
+        bubble.timestamp = record['timestamp']
+        bubble.sender_name = record['sender_name']
+        bubble.message_type = message_type
+        bubble.record = record
+        return bubble
+    
+    def _append_message_record(self, record):
+        """
+        追加消息记录
+        
+        只追加数据和行高，可见区域内的气泡由虚拟消息列表创建；
+        记录数超出 CHAT_LIST_MAX_RECORDS 一定数量后移除最早的记录。
+        """
+        self.chat_area.append(record)
+        overflow = len(self.message_records) - config.CHAT_LIST_MAX_RECORDS
+        if overflow >= config.CHAT_LIST_TRIM_SLACK:
+            self.chat_area.remove_front(overflow)
+    
+    def on_chat_scrolled(self, value):
+        """滚动到列表顶部时从本地记录加载更早的消息"""
+        if self._paging:
+            return
+        scroll_bar = self.scroll.verticalScrollBar()
+        self._paging = True
+        try:
+            if value <= config.CHAT_RENDER_EDGE_THRESHOLD and scroll_bar.maximum() > 0:
+                self.load_older_history()
+        finally:
+            self._paging = False
         
     def is_user_at_bottom(self):
         """检测用户是否在聊天底部附近"""
@@ -3241,8 +3724,8 @@ class OnlineChatWidget(QWidget):
         print(f"API base_url: {self.api.base_url}")
         
         try:
-            # 通过健康检查端点快速测试连接
-            response = requests.get(f"{self.api.base_url}/health", timeout=2)
+            # 通过健康检查端点快速测试连接（不重试，服务器不可用时最多等待超时时间）
+            response = http_client.probe(f"{self.api.base_url}/health", timeout=2)
             print(f"健康检查响应状态码: {response.status_code}")
             
             if response.status_code == 200:
@@ -3355,9 +3838,13 @@ class OnlineChatWidget(QWidget):
         
     def auto_refresh_messages(self):
         """自动刷新消息（只加载新消息，不清空现有消息）"""
-        if not self.connection_error:
-            # 静默加载最新消息，避免频繁的UI更新
-            self.api.load_messages(limit=20)  # 加载最新的20条消息进行比较
+        if not self.connection_error and not self.push_active:
+            # 服务器没有 after 参数，每次返回最新20条；已显示的消息由ID索引O(1)去重，
+            # 不再遍历所有气泡，每次轮询的开销与历史消息数量无关。
+            # 定时轮询只补齐少量遗漏，避免一次轮询连续请求几十页
+            self.api.load_messages(limit=20, anchor_id=self.newest_message_id,
+                                   anchor_timestamp=self.newest_message_timestamp,
+                                   max_pages=config.MESSAGE_SYNC_POLL_MAX_PAGES)
         
     def reset_connection(self):
         """重置连接状态并重新连接"""
@@ -3368,6 +3855,8 @@ class OnlineChatWidget(QWidget):
             self.heartbeat_timer.stop()
         if self.auto_refresh_timer.isActive():
             self.auto_refresh_timer.stop()
+        self.push_channel.stop()
+        self.push_active = False
         
         # 重置连接状态
         self.connection_error = False
@@ -3401,10 +3890,12 @@ class OnlineChatWidget(QWidget):
         
     def clear_messages(self):
         """清空消息"""
-        while self.chat_layout.count():
-            child = self.chat_layout.takeAt(0)
-            if child.widget():
-                child.widget().deleteLater()
+        self.chat_area.clear()
+        self.local_history_exhausted = False
+        self.message_id_index.clear()
+        self.message_signature_index.clear()
+        self.newest_message_id = None
+        self.newest_message_timestamp = None
                 
     def clear_online_users(self):
         """清空在线用户列表"""
@@ -3551,137 +4042,171 @@ class OnlineChatWidget(QWidget):
         # 获取当前用户职业信息
         current_user_profession = self._get_user_profession(sender_role)
         
-        # 创建消息气泡并设置message_id
-        if message_type == "image" and file_info:
-            bubble = ImageChatBubble(file_info, True, sender_name, formatted_time, current_user_profession)
-        elif message_type == "file" and file_info:
-            bubble = FileChatBubble(file_info, True, sender_name, formatted_time, current_user_profession)
-        else:
-            bubble = OnlineChatBubble(content, True, sender_name, formatted_time, current_user_profession, message_type)
-        
-        # 设置消息ID和其他属性用于去重和管理
-        if message_id:
-            bubble.message_id = message_id
-        bubble.text = content
-        bubble.timestamp = formatted_time
-        bubble.sender_name = sender_name
-        bubble.message_type = message_type
-            
-        self.chat_layout.addWidget(bubble)
+        # 加入消息列表（随后滚动到底部，正在查看历史时也跳回最新消息）
+        self._append_message_record(self._make_message_record(
+            content, True, sender_name, formatted_time, message_type,
+            file_info, current_user_profession, message_id
+        ))
+        self._remember_message(message_id, f"{content}_{formatted_time}_{sender_name}")
+        if self.history_store:
+            try:
+                self.history_store.save_messages(self.api.room_id, [message_data])
+            except Exception as e:
+                print(f"保存聊天记录失败: {str(e)}")
         
         # 强制滚动到底部（发送消息）
         self.force_scroll_to_bottom(force_send=True)
         
         print(f"✅ 消息发送成功: '{content[:30]}...' | 类型: '{message_type}' | 发送者: '{sender_name}' | 角色: '{sender_role}' | ID: '{message_id}'")
         
+    def render_cached_history(self):
+        """从本地存储渲染最近的聊天记录（仅在当前没有消息时）"""
+        if not self.history_store or self.message_records:
+            return
+        start_time = time.perf_counter()
+        try:
+            messages = self.history_store.load_latest(self.api.room_id, config.MESSAGE_HISTORY_LIMIT)
+        except Exception as e:
+            print(f"读取本地聊天记录失败: {str(e)}")
+            return
+        if not messages:
+            return
+        self._add_messages(messages)
+        self.force_scroll_to_bottom(force_always=True)
+        elapsed_ms = (time.perf_counter() - start_time) * 1000
+        print(f"💾 从本地记录渲染 {len(messages)} 条消息，耗时 {elapsed_ms:.1f}ms")
+    
+    def load_older_history(self):
+        """滚动到最早的消息时，从本地存储加载更早的一页"""
+        if not self.history_store or not self.message_records or self.local_history_exhausted:
+            return False
+        oldest_id = next((record['message_id'] for record in self.message_records if record['message_id']), None)
+        if not oldest_id:
+            return False
+        try:
+            messages = self.history_store.load_before(self.api.room_id, oldest_id, config.CHAT_RENDER_PAGE)
+        except Exception as e:
+            print(f"读取更早的聊天记录失败: {str(e)}")
+            return False
+        if not messages:
+            self.local_history_exhausted = True
+            return False
+        
+        possible_user_names = self._get_possible_user_names()
+        records = [self._message_to_record(message, possible_user_names) for message in reversed(messages)]
+        self.chat_area.prepend(records)
+        return True
+    
     def on_messages_loaded(self, messages):
         """消息加载完成处理 - 根据分析报告优化"""
         self.loading_indicator.hide()
         self.connection_error = False  # 成功加载说明连接正常
         self.status_label.setText("已连接")
         
-        # 获取已存在的消息ID，避免重复添加
-        existing_messages = set()
-        existing_message_signatures = set()  # 基于内容和时间戳的签名
-        
-        for i in range(self.chat_layout.count()):
-            item = self.chat_layout.itemAt(i)
-            widget = item.widget() if item else None
-            if widget:
-                # 基于ID去重
-                if hasattr(widget, 'message_id') and widget.message_id:
-                    existing_messages.add(widget.message_id)
-                
-                # 基于内容和时间戳去重（作为备用机制）
-                if hasattr(widget, 'text') and hasattr(widget, 'timestamp'):
-                    signature = f"{widget.text}_{widget.timestamp}_{getattr(widget, 'sender_name', '')}"
-                    existing_message_signatures.add(signature)
+        # 只保存新加入的消息，已显示（已保存）的消息不再重复写入
+        added = self._add_messages(messages)
+        if self.history_store and added:
+            try:
+                self.history_store.save_messages(self.api.room_id, added)
+            except Exception as e:
+                print(f"保存聊天记录失败: {str(e)}")
+    
+    def _message_to_record(self, message, possible_user_names):
+        """把服务器消息转换为消息记录"""
+        content = message.get('content', '')
+        sender_name = message.get('sender_name', '未知用户')
+        message_type = message.get('message_type', 'text')
+        
+        # 自动识别图片类型：如果服务器没有正确设置消息类型，客户端自动识别
+        if message_type == 'file' and message.get('file_name'):
+            # 检查文件名是否为图片
+            if self._is_image_file(message.get('file_name')):
+                message_type = 'image'
+        
+        # 构建文件信息（如果是文件消息）
+        file_info = None
+        if message_type in ["file", "image"]:
+            file_info = {
+                'file_name': message.get('file_name', '未知文件'),
+                'file_url': message.get('file_url', ''),
+                'file_size': message.get('file_size', 0),
+                'content': content
+            }
         
+        return self._make_message_record(
+            content,
+            sender_name in possible_user_names,  # 增强的用户身份判断逻辑
+            sender_name,
+            self._format_timestamp(message.get('timestamp', '')),
+            message_type,
+            file_info,
+            self._get_user_profession(message.get('sender_role', '')),  # 获取发送者职业信息
+            message.get('id', '')
+        )
+    
+    def _add_messages(self, messages):
+        """把消息（最新的在前）去重后加入消息列表，返回实际加入的消息"""
         # 获取当前用户的所有可能标识
         possible_user_names = self._get_possible_user_names()
         
         print(f"📋 开始加载 {len(messages)} 条消息，当前用户标识: {possible_user_names}")
         
+        # 记录最新消息ID，补齐遗漏消息和推送通道重连时从这里继续
+        if messages and messages[0].get('id'):
+            self.newest_message_id = messages[0].get('id')
+            self.newest_message_timestamp = messages[0].get('timestamp')
+            self.push_channel.update_last_id(self.newest_message_id)
+        
+        added = []
+        
         # 添加消息到界面
         for message in reversed(messages):  # 倒序显示，最新的在下面
             message_id = message.get('id', '')
-            content = message.get('content', '')
-            sender_name = message.get('sender_name', '未知用户')
-            sender_role = message.get('sender_role', '')  # 添加角色信息支持
-            timestamp = message.get('timestamp', '')
-            sender_id = message.get('sender_id', 0)
-            message_type = message.get('message_type', 'text')
-            
-            # 格式化时间戳
-            formatted_time = self._format_timestamp(timestamp)
-            
-            # 自动识别图片类型：如果服务器没有正确设置消息类型，客户端自动识别
-            if message_type == 'file' and message.get('file_name'):
-                # 检查文件名是否为图片
-                if self._is_image_file(message.get('file_name')):
-                    message_type = 'image'
-                    print(f"🖼️ 自动识别图片文件: {message.get('file_name')}")
             
             # 创建消息签名用于去重
-            message_signature = f"{content}_{formatted_time}_{sender_name}"
+            message_signature = f"{message.get('content', '')}_{self._format_timestamp(message.get('timestamp', ''))}_{message.get('sender_name', '未知用户')}"
             
             # 多重去重检查
             should_skip = False
             
             # 1. 基于消息ID去重
-            if message_id and message_id in existing_messages:
-                print(f"跳过重复消息 (ID): {message_id}")
+            if message_id and message_id in self.message_id_index:
                 should_skip = True
             
             # 2. 基于消息签名去重（备用机制）
-            elif message_signature in existing_message_signatures:
-                print(f"跳过重复消息 (签名): {message_signature[:50]}...")
+            elif message_signature in self.message_signature_index:
                 should_skip = True
             
             if should_skip:
                 continue
-                
-            # 增强的用户身份判断逻辑
-            is_user = sender_name in possible_user_names
-            
-            # 构建文件信息（如果是文件消息）
-            file_info = None
-            if message_type in ["file", "image"]:
-                file_info = {
-                    'file_name': message.get('file_name', '未知文件'),
-                    'file_url': message.get('file_url', ''),
-                    'file_size': message.get('file_size', 0),
-                    'content': content
-                }
-                
-            # 获取发送者职业信息
-            sender_profession = self._get_user_profession(sender_role)
-            
-            # 创建消息气泡并添加消息ID
-            if message_type == "image" and file_info:
-                bubble = ImageChatBubble(file_info, is_user, sender_name, formatted_time, sender_profession)
-            elif message_type == "file" and file_info:
-                bubble = FileChatBubble(file_info, is_user, sender_name, formatted_time, sender_profession)
-            else:
-                bubble = OnlineChatBubble(content, is_user, sender_name, formatted_time, sender_profession, message_type)
-                
-            # 设置消息ID和其他属性用于去重和管理
-            if message_id:
-                bubble.message_id = message_id
-            bubble.text = content
-            bubble.timestamp = formatted_time
-            bubble.sender_name = sender_name
-            bubble.message_type = message_type
             
-            self.chat_layout.addWidget(bubble)
+            # 加入消息列表（只有可见区域内的消息才创建气泡）
+            record = self._message_to_record(message, possible_user_names)
+            self._append_message_record(record)
+            self._remember_message(message_id, message_signature)
+            added.append(message)
             
             # 调试输出
-            print(f"📝 添加消息: '{content[:20]}...' | 类型: '{message_type}' | 发送者: '{sender_name}' | 角色: '{sender_role}' | ID: '{message_id}' | 是当前用户: {is_user}")
+            print(f"📝 添加消息: '{record['content'][:20]}...' | 类型: '{record['message_type']}' | 发送者: '{record['sender_name']}' | ID: '{message_id}' | 是当前用户: {record['is_user']}")
+        
+        if not added:
+            return added
         
         # 强制滚动到底部（接收消息）
         self.force_scroll_to_bottom(force_receive=True)
         
-        print(f"✅ 消息加载完成，共显示 {self.chat_layout.count()} 条消息")
+        print(f"✅ 消息加载完成，新增 {len(added)} 条，共 {len(self.message_records)} 条消息（已创建气泡 {len(self.chat_area.bubbles)} 个）")
+        return added
+    
+    def _remember_message(self, message_id, signature):
+        """记录已显示的消息，索引超过 MESSAGE_CACHE_SIZE 时淘汰最早的记录"""
+        if message_id:
+            self.message_id_index[message_id] = True
+            if len(self.message_id_index) > config.MESSAGE_CACHE_SIZE:
+                self.message_id_index.popitem(last=False)
+        self.message_signature_index[signature] = True
+        if len(self.message_signature_index) > config.MESSAGE_CACHE_SIZE:
+            self.message_signature_index.popitem(last=False)
     
     def _format_timestamp(self, timestamp):
         """格式化时间戳 - 支持ISO格式"""
@@ -3829,6 +4354,18 @@ class OnlineChatWidget(QWidget):
             self.heartbeat_timer.stop()
         if self.auto_refresh_timer.isActive():
             self.auto_refresh_timer.stop()
+        # 停止推送通道，取消未完成的请求并停止后台线程
+        self.push_channel.stop()
+        self.api.stop()
+        if self.history_store:
+            self.history_store.close()
+            self.history_store = None
+        get_image_cache().cancel_all()
+        stats = get_image_cache().get_stats()
+        print(f"🖼️ 图片缓存命中率: {stats['hit_rate']:.0%}（合并下载 {stats['merge_rate']:.0%}），节省下载 {stats['bytes_saved'] / 1024:.1f} KB")
+        upload_stats = get_upload_index().get_stats()
+        if upload_stats['bytes_skipped']:
+            print(f"♻️ 去重上传节省 {config.format_file_size(upload_stats['bytes_skipped'])}")
         event.accept() 
 
     def handle_pasted_files(self, file_paths):
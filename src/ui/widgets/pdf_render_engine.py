@@ -0,0 +1,578 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PDF页面渲染引擎
+后台线程渲染页面/图块，渲染结果按 (页码, 缩放) 缓存，并预取相邻页面
+"""
+
+import threading
+from bisect import bisect_right
+from collections import OrderedDict
+
+import fitz  # PyMuPDF
+from PyQt5.QtCore import Qt, QObject, QThread, QTimer, QRect, QRectF, QSize, pyqtSignal
+from PyQt5.QtGui import QPixmap, QImage, QPainter, QColor
+from PyQt5.QtWidgets import QWidget
+
+# 渲染缓存上限（字节）
+RENDER_CACHE_BYTES = 256 * 1024 * 1024
+# 图块边长（像素）
+TILE_SIZE = 512
+# 页面渲染后超过该像素数时按图块渲染，只渲染可见区域
+TILE_MIN_PIXELS = 2048 * 2048
+# 低分辨率预览的缩放比例，整页渲染完成前先显示预览
+PREVIEW_ZOOM = 0.25
+# 连续缩放（如Ctrl+滚轮）停止该毫秒数后才渲染新的缩放比例，期间缩放显示已有图像
+ZOOM_RENDER_DELAY = 150
+# 连续滚动模式的页面间距（像素）
+PAGE_GAP = 10
+
+
+def zoom_key(zoom):
+    """缩放比例的缓存键（百分比整数）"""
+    return int(round(zoom * 100))
+
+
+def pixmap_to_qimage(pix):
+    """
+    将 fitz.Pixmap 转为QImage，直接引用 Pixmap 的像素缓冲区，不经过PPM编码/解码
+
+    返回的QImage持有 Pixmap 的引用（_pdf_pixmap），在转为QPixmap或 copy() 之前
+    不要只保留QImage的C++副本（如经 QImage 类型的信号传递），否则缓冲区可能已被释放
+    """
+    if pix.alpha:
+        if pix.n != 4:
+            pix = fitz.Pixmap(fitz.csRGB, pix)
+        image_format = QImage.Format_RGBA8888
+    else:
+        if pix.n != 3:
+            pix = fitz.Pixmap(fitz.csRGB, pix)  # 灰度/CMYK 转为RGB
+        image_format = QImage.Format_RGB888
+    image = QImage(pix.samples_mv, pix.width, pix.height, pix.stride, image_format)
+    image._pdf_pixmap = pix
+    return image
+
+
+def render_page_image(page, zoom, clip=None):
+    """将页面（或页面中的 clip 区域）渲染为QImage"""
+    matrix = fitz.Matrix(zoom, zoom)
+    pix = page.get_pixmap(matrix=matrix, clip=clip, alpha=False)
+    return pixmap_to_qimage(pix)
+
+
+class PDFRenderWorker(QThread):
+    """渲染工作线程 - 使用独立打开的文档按顺序执行最新的一组渲染任务"""
+    # 渲染结果以 object 传递，使QImage引用的像素缓冲区在界面线程转换为QPixmap前保持有效
+    rendered = pyqtSignal(object, object)  # 缓存键, 渲染结果(QImage)
+    render_failed = pyqtSignal(object, str)  # 缓存键, 错误信息
+
+    def __init__(self, pdf_path):
+        super().__init__()
+        self.pdf_path = pdf_path
+        self._jobs = []  # [(缓存键, 页码, 缩放, clip)]，排在前面的先渲染
+        self._condition = threading.Condition()
+        self._running = True
+        self.current_key = None
+
+    def set_jobs(self, jobs):
+        """替换待渲染任务（尚未开始的旧任务被丢弃）"""
+        with self._condition:
+            self._jobs = list(jobs)
+            self._condition.notify()
+
+    def run(self):
+        # PyMuPDF 文档对象不能跨线程共享，工作线程使用自己的文档
+        document = fitz.open(self.pdf_path)
+        try:
+            while True:
+                with self._condition:
+                    while self._running and not self._jobs:
+                        self._condition.wait()
+                    if not self._running:
+                        break
+                    key, page_num, zoom, clip = self._jobs.pop(0)
+                    self.current_key = key
+                try:
+                    image = render_page_image(document[page_num], zoom, clip)
+                    self.rendered.emit(key, image)
+                except Exception as e:
+                    self.render_failed.emit(key, f"渲染第{page_num + 1}页时出错: {str(e)}")
+                finally:
+                    self.current_key = None
+        finally:
+            document.close()
+
+    def stop(self):
+        """停止工作线程"""
+        with self._condition:
+            self._running = False
+            self._jobs = []
+            self._condition.notify()
+        self.wait(2000)
+
+
+class PDFRenderEngine(QObject):
+    """
+    PDF渲染引擎 - 渲染结果缓存（按字节限制），预取相邻页面，高缩放时按图块渲染可见区域
+    超出缓存上限时优先淘汰其他缩放比例的图像和距离当前页面最远的页面，同等条件下按LRU淘汰
+    """
+    page_ready = pyqtSignal(int, int)  # 页码, 缩放键
+    tile_ready = pyqtSignal(int, int, int, int)  # 页码, 缩放键, 列, 行
+    render_error = pyqtSignal(int, str)  # 页码, 错误信息
+
+    def __init__(self, pdf_path, page_sizes, cache_bytes=RENDER_CACHE_BYTES, parent=None):
+        """
+        Args:
+            pdf_path: PDF文件路径
+            page_sizes: 每页尺寸 [(宽, 高)]（单位: 点）
+            cache_bytes: 渲染缓存上限（字节）
+        """
+        super().__init__(parent)
+        self.page_sizes = page_sizes
+        self.cache_bytes = cache_bytes
+        self._cache = OrderedDict()  # 缓存键 -> QPixmap
+        self._cache_used = 0
+        self._focus = None  # (当前页码, 当前缩放键)，决定淘汰顺序
+        self.stats = {'hits': 0, 'misses': 0, 'renders': 0, 'evictions': 0}
+
+        self.worker = PDFRenderWorker(pdf_path)
+        self.worker.rendered.connect(self._on_rendered)
+        self.worker.render_failed.connect(self._on_render_failed)
+        self.worker.start()
+
+    # ---- 几何 ----
+
+    def page_pixel_size(self, page_num, zoom):
+        width, height = self.page_sizes[page_num]
+        return QSize(max(1, int(width * zoom)), max(1, int(height * zoom)))
+
+    def use_tiles(self, page_num, zoom):
+        """渲染后的页面是否足够大，需要按图块渲染"""
+        size = self.page_pixel_size(page_num, zoom)
+        return size.width() * size.height() > TILE_MIN_PIXELS
+
+    def tiles_in(self, page_num, zoom, rect):
+        """与 rect 相交的图块 (列, 行, 图块区域)"""
+        size = self.page_pixel_size(page_num, zoom)
+        rect = rect.intersected(QRect(0, 0, size.width(), size.height()))
+        if rect.isEmpty():
+            return []
+        tiles = []
+        for row in range(rect.top() // TILE_SIZE, rect.bottom() // TILE_SIZE + 1):
+            for col in range(rect.left() // TILE_SIZE, rect.right() // TILE_SIZE + 1):
+                x, y = col * TILE_SIZE, row * TILE_SIZE
+                tiles.append((col, row, QRect(x, y, min(TILE_SIZE, size.width() - x),
+                                              min(TILE_SIZE, size.height() - y))))
+        return tiles
+
+    # ---- 请求 ----
+
+    def cached(self, key):
+        """获取缓存的渲染结果"""
+        pixmap = self._cache.get(key)
+        if pixmap is not None:
+            self._cache.move_to_end(key)
+        return pixmap
+
+    def cached_page(self, page_num, zoom):
+        return self.cached(('page', page_num, zoom_key(zoom)))
+
+    def cached_tile(self, page_num, zoom, col, row):
+        return self.cached(('tile', page_num, zoom_key(zoom), col, row))
+
+    def cached_preview(self, page_num):
+        return self.cached(('page', page_num, zoom_key(PREVIEW_ZOOM)))
+
+    def cached_any_zoom(self, page_num):
+        """该页面任意缩放比例的整页图像（最近使用的优先，不改变LRU顺序），用于缩放时的预览"""
+        for key in reversed(self._cache):
+            if key[0] == 'page' and key[1] == page_num:
+                return self._cache[key]
+        return None
+
+    def is_preview(self, page_zoom):
+        """page_ready 的缩放键是否对应低分辨率预览"""
+        return page_zoom == zoom_key(PREVIEW_ZOOM)
+
+    def request_page(self, page_num, zoom, with_preview=True):
+        """
+        请求整页渲染，并在后台预取前后页
+
+        Args:
+            with_preview: 未缓存时先渲染低分辨率预览（同样通过 page_ready 通知，可用 is_preview 区分）
+
+        Returns:
+            已缓存时直接返回QPixmap，否则返回None，渲染完成后发出 page_ready
+        """
+        self._focus = (page_num, zoom_key(zoom))
+        pixmap = self.cached_page(page_num, zoom)
+        jobs = []
+        if pixmap is not None:
+            self.stats['hits'] += 1
+        else:
+            self.stats['misses'] += 1
+            preview_key = ('page', page_num, zoom_key(PREVIEW_ZOOM))
+            if with_preview and zoom > PREVIEW_ZOOM and preview_key not in self._cache:
+                jobs.append((preview_key, page_num, PREVIEW_ZOOM, None))
+            jobs.append((('page', page_num, zoom_key(zoom)), page_num, zoom, None))
+        for neighbor in (page_num + 1, page_num - 1):
+            if 0 <= neighbor < len(self.page_sizes) and not self.use_tiles(neighbor, zoom):
+                key = ('page', neighbor, zoom_key(zoom))
+                if key not in self._cache:
+                    jobs.append((key, neighbor, zoom, None))
+        self._schedule(jobs)
+        return pixmap
+
+    def request_tiles(self, page_num, zoom, visible_rect):
+        """请求渲染可见区域内的图块（外加一圈预取），可见区域中心附近的图块先渲染"""
+        self._focus = (page_num, zoom_key(zoom))
+        self._schedule(self._tile_jobs(page_num, zoom, visible_rect))
+
+    def request_region(self, visible, prefetch, zoom):
+        """
+        连续滚动模式的渲染请求（取代之前尚未开始的请求）
+
+        Args:
+            visible: [(页码, 页面内的可见区域QRect)]，排在前面的先渲染；按图块渲染的页面只渲染可见区域的图块
+            prefetch: 可见区域之外预取的页码
+            zoom: 缩放比例
+        """
+        if visible:
+            self._focus = (visible[len(visible) // 2][0], zoom_key(zoom))
+        jobs = []
+        for page_num, rect in visible:
+            if self.use_tiles(page_num, zoom):
+                jobs.extend(self._tile_jobs(page_num, zoom, rect))
+            elif ('page', page_num, zoom_key(zoom)) not in self._cache:
+                jobs.append((('page', page_num, zoom_key(zoom)), page_num, zoom, None))
+        for page_num in prefetch:
+            key = ('page', page_num, zoom_key(zoom))
+            if not self.use_tiles(page_num, zoom) and key not in self._cache:
+                jobs.append((key, page_num, zoom, None))
+        self._schedule(jobs)
+
+    def _tile_jobs(self, page_num, zoom, visible_rect):
+        """可见区域内（外加一圈预取）尚未缓存的图块渲染任务"""
+        margin = visible_rect.adjusted(-TILE_SIZE, -TILE_SIZE, TILE_SIZE, TILE_SIZE)
+        center = visible_rect.center()
+        tiles = sorted(
+            self.tiles_in(page_num, zoom, margin),
+            key=lambda tile: (not tile[2].intersects(visible_rect),
+                              (tile[2].center() - center).manhattanLength())
+        )
+        jobs = []
+        for col, row, rect in tiles:
+            key = ('tile', page_num, zoom_key(zoom), col, row)
+            if key in self._cache:
+                continue
+            clip = fitz.Rect(rect.left() / zoom, rect.top() / zoom,
+                             (rect.right() + 1) / zoom, (rect.bottom() + 1) / zoom)
+            jobs.append((key, page_num, zoom, clip))
+        return jobs
+
+    def cancel_pending(self):
+        """丢弃尚未开始的渲染任务"""
+        self.worker.set_jobs([])
+
+    def _schedule(self, jobs):
+        current = self.worker.current_key
+        self.worker.set_jobs([job for job in jobs if job[0] != current])
+
+    # ---- 结果 ----
+
+    def _on_rendered(self, key, image):
+        pixmap = QPixmap.fromImage(image)
+        self.stats['renders'] += 1
+        self._store(key, pixmap)
+        if key[0] == 'page':
+            self.page_ready.emit(key[1], key[2])
+        else:
+            self.tile_ready.emit(key[1], key[2], key[3], key[4])
+
+    def _on_render_failed(self, key, message):
+        print(f"❌ {message}")
+        self.render_error.emit(key[1], message)
+
+    def _store(self, key, pixmap):
+        cost = pixmap.width() * pixmap.height() * max(pixmap.depth(), 8) // 8
+        if key in self._cache:
+            old = self._cache.pop(key)
+            self._cache_used -= old.width() * old.height() * max(old.depth(), 8) // 8
+        self._cache[key] = pixmap
+        self._cache_used += cost
+        while self._cache_used > self.cache_bytes and len(self._cache) > 1:
+            old = self._cache.pop(self._eviction_victim(key))
+            self._cache_used -= old.width() * old.height() * max(old.depth(), 8) // 8
+            self.stats['evictions'] += 1
+
+    def _eviction_victim(self, keep):
+        """选择要淘汰的缓存键：其他缩放比例优先，其次距离当前页面最远，同等条件下最久未使用"""
+        candidates = (key for key in self._cache if key != keep)
+        if self._focus is None:
+            return next(candidates)
+        focus_page, focus_zoom = self._focus
+        return max(candidates, key=lambda key: (key[2] != focus_zoom, abs(key[1] - focus_page)))
+
+    def get_stats(self):
+        """缓存统计（命中/未命中/渲染次数/淘汰次数/占用字节）"""
+        return dict(self.stats, cached=len(self._cache), bytes=self._cache_used)
+
+    def stop(self):
+        """停止后台渲染并释放缓存"""
+        self.worker.stop()
+        self._cache.clear()
+        self._cache_used = 0
+
+
+class PDFPageCanvas(QWidget):
+    """页面画布 - 绘制整页图像或已渲染的图块，等待渲染时将上一次的图像缩放后作为预览"""
+
+    def __init__(self, engine, parent=None):
+        super().__init__(parent)
+        self.engine = engine
+        self.page_num = -1
+        self.zoom = 1.0
+        self.pixmap = None
+        self.preview = None
+        self.message = ""
+        self.tiled = False
+        self.highlights = []  # 搜索高亮区域 [(x0, y0, x1, y1)]（单位: 点）
+
+    def show_page(self, page_num, zoom):
+        """切换到指定页面和缩放"""
+        if page_num == self.page_num and self.pixmap is not None:
+            self.preview = self.pixmap  # 同一页改变缩放时，旧图像作为预览
+        elif page_num != self.page_num:
+            self.preview = self.engine.cached_page(page_num, zoom)
+            if self.preview is None:
+                self.preview = self.engine.cached_preview(page_num)
+        self.page_num = page_num
+        self.zoom = zoom
+        self.pixmap = None
+        self.message = ""
+        self.tiled = self.engine.use_tiles(page_num, zoom)
+        self.setFixedSize(self.engine.page_pixel_size(page_num, zoom))
+        self.update()
+
+    def set_pixmap(self, pixmap):
+        self.pixmap = pixmap
+        self.preview = None
+        self.update()
+
+    def set_preview(self, pixmap):
+        """整页图像渲染完成前显示的预览"""
+        if self.pixmap is None:
+            self.preview = pixmap
+            self.message = ""
+            self.update()
+
+    def set_highlights(self, rects):
+        """设置当前页面的搜索高亮区域"""
+        self.highlights = list(rects or [])
+        self.update()
+
+    def set_message(self, text):
+        self.message = text
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(event.rect(), QColor(Qt.white))
+        if self.pixmap is not None:
+            painter.drawPixmap(0, 0, self.pixmap)
+        else:
+            if self.preview is not None:
+                painter.drawPixmap(self.rect(), self.preview)
+            if self.tiled:
+                for col, row, rect in self.engine.tiles_in(self.page_num, self.zoom, event.rect()):
+                    tile = self.engine.cached_tile(self.page_num, self.zoom, col, row)
+                    if tile is not None:
+                        painter.drawPixmap(rect.topLeft(), tile)
+        for x0, y0, x1, y1 in self.highlights:
+            painter.fillRect(QRectF(x0 * self.zoom, y0 * self.zoom, (x1 - x0) * self.zoom, (y1 - y0) * self.zoom),
+                             QColor(255, 213, 0, 110))
+        if self.message:
+            painter.setPen(QColor("#666666"))
+            painter.drawText(self.rect(), Qt.AlignCenter, self.message)
+
+
+class PDFContinuousCanvas(QWidget):
+    """
+    连续滚动画布 - 按预先读取的页面尺寸纵向排列全部页面，
+    只渲染与可见区域相交的页面（外加一屏预取），远离可见区域的图像由渲染引擎按缓存上限淘汰
+    """
+    current_page_changed = pyqtSignal(int)  # 可见区域中的当前页码
+
+    def __init__(self, engine, scroll_area, parent=None):
+        super().__init__(parent)
+        self.engine = engine
+        self.scroll_area = scroll_area
+        self.zoom = 1.0
+        self.current_page = 0
+        self.highlights = {}  # 页码 -> 搜索高亮区域 [(x0, y0, x1, y1)]（单位: 点）
+        self._page_rects = []
+        self._page_tops = []
+
+        # 滚动时合并渲染请求，缩放时可延迟到缩放停止后再渲染
+        self._request_timer = QTimer(self)
+        self._request_timer.setSingleShot(True)
+        self._request_timer.timeout.connect(self.request_visible)
+
+        engine.page_ready.connect(self._on_page_ready)
+        engine.tile_ready.connect(self._on_tile_ready)
+        scroll_area.horizontalScrollBar().valueChanged.connect(self._on_scrolled)
+        scroll_area.verticalScrollBar().valueChanged.connect(self._on_scrolled)
+        self._layout_pages()
+
+    # ---- 布局 ----
+
+    def _layout_pages(self):
+        sizes = [self.engine.page_pixel_size(page_num, self.zoom) for page_num in range(len(self.engine.page_sizes))]
+        width = max((size.width() for size in sizes), default=0) + PAGE_GAP * 2
+        self._page_rects = []
+        top = PAGE_GAP
+        for size in sizes:
+            self._page_rects.append(QRect((width - size.width()) // 2, top, size.width(), size.height()))
+            top += size.height() + PAGE_GAP
+        self._page_tops = [rect.top() for rect in self._page_rects]
+        self.setFixedSize(width, top)
+
+    def page_rect(self, page_num):
+        return self._page_rects[page_num]
+
+    def page_at(self, y):
+        """纵坐标 y 处（或其上方最近）的页码"""
+        return max(0, bisect_right(self._page_tops, y) - 1)
+
+    def pages_in(self, rect):
+        """与 rect 相交的页码"""
+        if not self._page_rects:
+            return range(0)
+        last = min(self.page_at(rect.bottom()), len(self._page_rects) - 1)
+        return range(self.page_at(rect.top()), last + 1)
+
+    def visible_rect(self):
+        """画布中当前可见的区域"""
+        viewport = self.scroll_area.viewport().rect()
+        return viewport.translated(-self.pos()).intersected(self.rect())
+
+    # ---- 缩放与定位 ----
+
+    def set_zoom(self, zoom, defer_render=False):
+        """
+        改变缩放比例，保持可见区域中心所在的页面位置不变
+
+        Args:
+            defer_render: 连续缩放时为True，缩放停止 ZOOM_RENDER_DELAY 毫秒后才渲染（期间缩放显示已有图像）
+        """
+        if zoom_key(zoom) == zoom_key(self.zoom):
+            return
+        view = self.visible_rect()
+        anchor_page = self.page_at(view.center().y())
+        anchor_rect = self._page_rects[anchor_page] if self._page_rects else QRect()
+        fraction = (view.center().y() - anchor_rect.top()) / max(1, anchor_rect.height())
+
+        self.zoom = zoom
+        self._layout_pages()
+        if self._page_rects:
+            anchor_rect = self._page_rects[anchor_page]
+            viewport = self.scroll_area.viewport()
+            self.scroll_area.verticalScrollBar().setValue(
+                int(anchor_rect.top() + fraction * anchor_rect.height() - viewport.height() / 2))
+            self.scroll_area.horizontalScrollBar().setValue(
+                (self.width() - viewport.width()) // 2)
+        self.update()
+        self.schedule_request(ZOOM_RENDER_DELAY if defer_render else 0)
+
+    def scroll_to_page(self, page_num):
+        """滚动到指定页面顶部"""
+        if 0 <= page_num < len(self._page_rects):
+            self.scroll_area.verticalScrollBar().setValue(self._page_rects[page_num].top() - PAGE_GAP)
+            self._set_current_page(page_num)
+            self.schedule_request()
+
+    def set_highlights(self, highlights):
+        """设置各页面的搜索高亮区域 {页码: [(x0, y0, x1, y1)]}"""
+        self.highlights = dict(highlights or {})
+        self.update()
+
+    def _set_current_page(self, page_num):
+        if page_num != self.current_page:
+            self.current_page = page_num
+            self.current_page_changed.emit(page_num)
+
+    # ---- 渲染请求 ----
+
+    def schedule_request(self, delay=0):
+        """合并短时间内的多次滚动，只按最终位置请求渲染"""
+        if self.scroll_area.widget() is not self:
+            return
+        if delay <= 0 and self._request_timer.isActive() and self._request_timer.interval() > 0:
+            return  # 延迟渲染（缩放中）期间不提前渲染
+        self._request_timer.start(max(0, delay))
+
+    def _on_scrolled(self, value):
+        self.schedule_request()
+
+    def request_visible(self):
+        """请求渲染可见页面（靠近可见区域中心的先渲染）和上下一屏内的页面"""
+        if self.scroll_area.widget() is not self or not self._page_rects:
+            return
+        view = self.visible_rect()
+        if view.isEmpty():
+            view = QRect(0, 0, self.scroll_area.viewport().width(), self.scroll_area.viewport().height())
+        center = view.center().y()
+        self._set_current_page(self.page_at(view.top() + view.height() // 3))
+
+        visible_pages = sorted(self.pages_in(view),
+                               key=lambda page_num: abs(self._page_rects[page_num].center().y() - center))
+        visible = [(page_num, view.intersected(self._page_rects[page_num]).translated(
+                    -self._page_rects[page_num].topLeft())) for page_num in visible_pages]
+        margin = view.adjusted(0, -view.height(), 0, view.height())
+        prefetch = [page_num for page_num in self.pages_in(margin) if page_num not in visible_pages]
+        prefetch.sort(key=lambda page_num: abs(page_num - self.current_page))
+        self.engine.request_region(visible, prefetch, self.zoom)
+
+    def _on_page_ready(self, page_num, page_zoom):
+        if page_zoom == zoom_key(self.zoom) and page_num < len(self._page_rects):
+            self.update(self._page_rects[page_num])
+
+    def _on_tile_ready(self, page_num, page_zoom, col, row):
+        if page_zoom == zoom_key(self.zoom) and page_num < len(self._page_rects):
+            origin = self._page_rects[page_num].topLeft()
+            self.update(QRect(origin.x() + col * TILE_SIZE, origin.y() + row * TILE_SIZE, TILE_SIZE, TILE_SIZE))
+
+    # ---- 绘制 ----
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(event.rect(), QColor("#e9ecef"))
+        for page_num in self.pages_in(event.rect()):
+            rect = self._page_rects[page_num]
+            if not rect.intersects(event.rect()):
+                continue
+            painter.fillRect(rect, QColor(Qt.white))
+            if self.engine.use_tiles(page_num, self.zoom):
+                preview = self.engine.cached_any_zoom(page_num)
+                if preview is not None:
+                    painter.drawPixmap(rect, preview)
+                local = event.rect().intersected(rect).translated(-rect.topLeft())
+                for col, row, tile_rect in self.engine.tiles_in(page_num, self.zoom, local):
+                    tile = self.engine.cached_tile(page_num, self.zoom, col, row)
+                    if tile is not None:
+                        painter.drawPixmap(tile_rect.topLeft() + rect.topLeft(), tile)
+            else:
+                pixmap = self.engine.cached_page(page_num, self.zoom)
+                if pixmap is not None:
+                    painter.drawPixmap(rect.topLeft(), pixmap)
+                else:
+                    preview = self.engine.cached_any_zoom(page_num)
+                    if preview is not None:
+                        painter.drawPixmap(rect, preview)
+                    else:
+                        painter.setPen(QColor("#adb5bd"))
+                        painter.drawText(rect, Qt.AlignCenter, f"第 {page_num + 1} 页")
+            for x0, y0, x1, y1 in self.highlights.get(page_num, []):
+                painter.fillRect(QRectF(rect.left() + x0 * self.zoom, rect.top() + y0 * self.zoom,
+                                        (x1 - x0) * self.zoom, (y1 - y0) * self.zoom),
+                                 QColor(255, 213, 0, 110))
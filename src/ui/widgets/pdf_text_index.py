@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PDF全文索引
+打开PDF时在后台线程提取每页文字及位置，索引按文件内容哈希保存到磁盘；
+查询直接在索引中匹配，返回命中页面和高亮区域，索引建立过程中逐页提供结果
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+from array import array
+from bisect import bisect_right
+
+import fitz  # PyMuPDF
+from PyQt5.QtCore import QObject, QThread, pyqtSignal
+from PyQt5.QtWidgets import QApplication
+
+from src.core import api_config
+
+# 索引文件格式版本，格式变化时旧索引自动重建
+INDEX_VERSION = 1
+
+
+def normalize_query(query):
+    """查询文本规范化：忽略大小写，连续空白视为一个空格"""
+    return ' '.join(query.lower().split())
+
+
+def hash_file(file_path):
+    """文件内容哈希（索引文件名）"""
+    content_hash = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(api_config.DOWNLOAD_CHUNK_SIZE), b''):
+            content_hash.update(chunk)
+    return content_hash.hexdigest()
+
+
+class PageText:
+    """单页文字索引：单词以空格连接成的文本，以及每个单词的位置（单位: 点）"""
+
+    __slots__ = ('text', 'lowered', 'starts', 'boxes', 'lines')
+
+    def __init__(self, text, boxes, lines):
+        self.text = text
+        self.lowered = text.lower()
+        self.boxes = array('f', boxes)  # 每个单词 x0, y0, x1, y1
+        self.lines = array('i', lines)  # 每个单词所在的行（用于合并同一行的高亮区域）
+        self.starts = array('i')  # 每个单词在 text 中的起始位置
+        position = 0
+        for word in text.split(' ') if text else []:
+            self.starts.append(position)
+            position += len(word) + 1
+        if len(self.lowered) != len(self.text):
+            self.lowered = self.text  # 少数字符转小写后长度变化，此时按原文匹配
+
+    @classmethod
+    def from_page(cls, page):
+        """从PyMuPDF页面提取单词"""
+        words, boxes, lines = [], [], []
+        for x0, y0, x1, y1, word, block_no, line_no, _ in page.get_text("words"):
+            words.append(word)
+            boxes.extend((round(x0, 2), round(y0, 2), round(x1, 2), round(y1, 2)))
+            lines.append(block_no * 10000 + line_no)
+        return cls(' '.join(words), boxes, lines)
+
+    def to_dict(self):
+        return {'text': self.text, 'boxes': list(self.boxes), 'lines': list(self.lines)}
+
+    def search(self, query):
+        """
+        查找规范化后的查询文本
+
+        Returns:
+            [(x0, y0, x1, y1)] 每处匹配在每一行上的区域；单词内部的部分匹配按字符位置估算
+        """
+        rects = []
+        length = len(query)
+        pos = self.lowered.find(query)
+        while pos != -1:
+            end = pos + length
+            index = bisect_right(self.starts, pos) - 1
+            match_rects = {}
+            while index < len(self.starts) and self.starts[index] < end:
+                start = self.starts[index]
+                word_length = len(self.text) - start if index + 1 == len(self.starts) \
+                    else self.starts[index + 1] - start - 1
+                first, last = max(pos, start) - start, min(end, start + word_length) - start
+                if last > first and word_length > 0:
+                    x0, y0, x1, y1 = self.boxes[index * 4:index * 4 + 4]
+                    char_width = (x1 - x0) / word_length
+                    rect = [x0 + char_width * first, y0, x0 + char_width * last, y1]
+                    line = self.lines[index]
+                    if line in match_rects:
+                        merged = match_rects[line]
+                        rect = [min(merged[0], rect[0]), min(merged[1], rect[1]),
+                                max(merged[2], rect[2]), max(merged[3], rect[3])]
+                    match_rects[line] = rect
+                index += 1
+            rects.extend(tuple(rect) for rect in match_rects.values())
+            pos = self.lowered.find(query, end)
+        return rects
+
+
+class PDFTextIndex(QObject):
+    """单个PDF文档的全文索引 - 后台建立，建立过程中已索引的页面即可查询"""
+    page_indexed = pyqtSignal(int)  # 页码（0开始）
+    index_ready = pyqtSignal()
+    index_failed = pyqtSignal(str)
+
+    def __init__(self, pdf_path, index_dir=api_config.PDF_TEXT_INDEX_DIR):
+        super().__init__()
+        self.pdf_path = pdf_path
+        self.index_dir = index_dir
+        self.total_pages = 0
+        self.complete = False
+        self.error = None
+        self._pages = {}  # 页码 -> PageText
+        self._lock = threading.Lock()
+        self.worker = None
+
+    def start(self):
+        """启动后台索引"""
+        if self.worker is None:
+            self.worker = PDFTextIndexer(self)
+            self.worker.start()
+
+    def stop(self):
+        """停止后台索引"""
+        if self.worker is not None and self.worker.isRunning():
+            self.worker.stop()
+
+    @property
+    def indexed_count(self):
+        with self._lock:
+            return len(self._pages)
+
+    def add_page(self, page_num, page_text):
+        with self._lock:
+            self._pages[page_num] = page_text
+
+    def search_page(self, page_num, query):
+        """
+        在单页中查询
+
+        Returns:
+            高亮区域列表，页面尚未索引时返回None
+        """
+        query = normalize_query(query)
+        with self._lock:
+            page_text = self._pages.get(page_num)
+        if page_text is None or not query:
+            return None
+        return page_text.search(query)
+
+    def search(self, query):
+        """
+        在已索引的页面中查询
+
+        Returns:
+            [(页码, 高亮区域列表)]，按页码排序
+        """
+        query = normalize_query(query)
+        if not query:
+            return []
+        with self._lock:
+            pages = sorted(self._pages.items())
+        results = []
+        for page_num, page_text in pages:
+            rects = page_text.search(query)
+            if rects:
+                results.append((page_num, rects))
+        return results
+
+    def snippet(self, page_num, query, width=30):
+        """命中位置附近的文字（用于结果列表）"""
+        query = normalize_query(query)
+        with self._lock:
+            page_text = self._pages.get(page_num)
+        if page_text is None or not query:
+            return ""
+        pos = page_text.lowered.find(query)
+        if pos == -1:
+            return ""
+        start = max(0, pos - width)
+        text = page_text.text[start:pos + len(query) + width]
+        return ("..." if start > 0 else "") + text
+
+    # ---- 持久化 ----
+
+    def index_path(self, file_hash):
+        return os.path.join(self.index_dir, f"{file_hash[:32]}.json.gz")
+
+    def load(self, file_hash):
+        """读取已保存的索引，成功返回True"""
+        try:
+            with gzip.open(self.index_path(file_hash), 'rt', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') != INDEX_VERSION:
+                return False
+            pages = {int(page_num): PageText(page['text'], page['boxes'], page['lines'])
+                     for page_num, page in data['pages'].items()}
+            if len(pages) != data['total_pages']:
+                return False
+        except (OSError, ValueError, KeyError, TypeError, EOFError):
+            return False
+        with self._lock:
+            self.total_pages = data['total_pages']
+            self._pages = pages
+        return True
+
+    def save(self, file_hash):
+        with self._lock:
+            data = {
+                'version': INDEX_VERSION,
+                'total_pages': self.total_pages,
+                'pages': {str(page_num): page.to_dict() for page_num, page in self._pages.items()}
+            }
+        try:
+            os.makedirs(self.index_dir, exist_ok=True)
+            path = self.index_path(file_hash)
+            temp_path = path + '.tmp'
+            with gzip.open(temp_path, 'wt', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(temp_path, path)
+        except OSError as e:
+            print(f"⚠️ 保存PDF全文索引失败: {str(e)}")
+
+
+class PDFTextIndexer(QThread):
+    """索引工作线程 - 有已保存的索引时直接读取，否则逐页提取文字"""
+
+    def __init__(self, index):
+        super().__init__()
+        self.index = index
+        self._running = True
+
+    def run(self):
+        index = self.index
+        try:
+            file_hash = hash_file(index.pdf_path)
+            if index.load(file_hash):
+                print(f"📚 已读取PDF全文索引: {os.path.basename(index.pdf_path)} ({index.total_pages}页)")
+            else:
+                # PyMuPDF 文档对象不能跨线程共享，索引线程使用自己的文档
+                document = fitz.open(index.pdf_path)
+                try:
+                    index.total_pages = len(document)
+                    for page_num in range(index.total_pages):
+                        if not self._running:
+                            return
+                        index.add_page(page_num, PageText.from_page(document[page_num]))
+                        index.page_indexed.emit(page_num)
+                finally:
+                    document.close()
+                index.save(file_hash)
+                print(f"📚 PDF全文索引已建立: {os.path.basename(index.pdf_path)} ({index.total_pages}页)")
+            index.complete = True
+            index.index_ready.emit()
+        except Exception as e:
+            index.error = str(e)
+            print(f"❌ 建立PDF全文索引失败: {str(e)}")
+            index.index_failed.emit(str(e))
+
+    def stop(self):
+        self._running = False
+        self.wait(2000)
+
+
+_indexes = {}
+
+
+def _stop_all():
+    for index in _indexes.values():
+        index.stop()
+
+
+def get_text_index(pdf_path):
+    """获取PDF的全文索引（同一文件共享一个索引，首次获取时开始在后台建立）"""
+    stat = os.stat(pdf_path)
+    key = (os.path.abspath(pdf_path), stat.st_size, stat.st_mtime_ns)
+    index = _indexes.get(key)
+    if index is None:
+        if not _indexes:
+            app = QApplication.instance()
+            if app is not None:
+                app.aboutToQuit.connect(_stop_all)
+        index = PDFTextIndex(pdf_path)
+        _indexes[key] = index
+        index.start()
+    return index
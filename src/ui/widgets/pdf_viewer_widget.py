@@ -12,72 +12,12 @@ from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QPushButton,
                            QLabel, QScrollArea, QSpinBox, QSlider, QLineEdit,
                            QMessageBox, QProgressBar, QFrame, QToolBar, QAction,
                            QSizePolicy, QWidget, QApplication, QStatusBar)
-from PyQt5.QtCore import Qt, QThread, pyqtSignal, QTimer, QSize
-from PyQt5.QtGui import QPixmap, QImage, QPainter, QFont, QIcon, QKeySequence
+from PyQt5.QtCore import Qt, QTimer, QSize
+from PyQt5.QtGui import QFont, QIcon, QKeySequence
 
-
-class PDFRenderThread(QThread):
-    """PDF渲染线程，避免界面阻塞"""
-    page_rendered = pyqtSignal(int, QPixmap)  # 页码, 渲染的图像
-    render_progress = pyqtSignal(int)  # 渲染进度
-    render_error = pyqtSignal(str)  # 渲染错误
-    
-    def __init__(self, pdf_document, page_num, zoom_factor=1.0):
-        super().__init__()
-        self.pdf_document = pdf_document
-        self.page_num = page_num
-        self.zoom_factor = zoom_factor
-        self._stop_flag = False
-    
-    def run(self):
-        """渲染PDF页面"""
-        try:
-            if self._stop_flag:
-                return
-                
-            # 获取PDF页面
-            page = self.pdf_document[self.page_num]
-            
-            # 设置渲染参数
-            mat = fitz.Matrix(self.zoom_factor, self.zoom_factor)
-            
-            self.render_progress.emit(25)
-            
-            if self._stop_flag:
-                return
-                
-            # 渲染为图像
-            pix = page.get_pixmap(matrix=mat, alpha=False)
-            
-            self.render_progress.emit(50)
-            
-            if self._stop_flag:
-                return
-            
-            # 转换为QImage
-            img_data = pix.tobytes("ppm")
-            qimg = QImage.fromData(img_data)
-            
-            self.render_progress.emit(75)
-            
-            if self._stop_flag:
-                return
-            
-            # 转换为QPixmap
-            pixmap = QPixmap.fromImage(qimg)
-            
-            self.render_progress.emit(100)
-            
-            if not self._stop_flag:
-                self.page_rendered.emit(self.page_num, pixmap)
-                
-        except Exception as e:
-            if not self._stop_flag:
-                self.render_error.emit(f"渲染第{self.page_num + 1}页时出错: {str(e)}")
-    
-    def stop(self):
-        """停止渲染"""
-        self._stop_flag = True
+from src.ui.widgets.pdf_render_engine import (PDFRenderEngine, PDFPageCanvas, PDFContinuousCanvas,
+                                              TILE_SIZE, zoom_key)
+from src.ui.widgets.pdf_text_index import get_text_index, normalize_query
 
 
 class PDFViewerWidget(QDialog):
@@ -90,7 +30,11 @@ class PDFViewerWidget(QDialog):
         self.current_page = 0
         self.total_pages = 0
         self.zoom_factor = 1.0
-        self.render_thread = None
+        self.render_engine = None
+        self.continuous_canvas = None  # 连续滚动模式的画布（首次切换时创建）
+        self.text_index = None
+        self.search_query = ""
+        self.search_hits = {}  # 页码 -> 高亮区域
         
         # 设置窗口属性
         self.setWindowTitle("PDF预览 - 加载中...")
@@ -126,6 +70,18 @@ class PDFViewerWidget(QDialog):
                 QMessageBox.critical(self, "错误", "PDF文件为空或损坏")
                 return False
             
+            # 渲染引擎在后台线程中使用独立的文档，页面尺寸预先读取
+            page_sizes = [(page.rect.width, page.rect.height) for page in self.pdf_document]
+            self.render_engine = PDFRenderEngine(self.pdf_path, page_sizes, parent=self)
+            self.render_engine.page_ready.connect(self.on_page_rendered)
+            self.render_engine.tile_ready.connect(self.on_tile_rendered)
+            self.render_engine.render_error.connect(self.on_render_error)
+            
+            # 全文索引在后台建立（已有保存的索引时直接读取）
+            self.text_index = get_text_index(self.pdf_path)
+            self.text_index.page_indexed.connect(self.on_page_indexed)
+            self.text_index.index_ready.connect(self.on_index_ready)
+            
             print(f"✅ PDF加载成功，共 {self.total_pages} 页")
             return True
             
@@ -184,6 +140,10 @@ class PDFViewerWidget(QDialog):
         self.fit_page_btn = QPushButton("适应页面")
         self.fit_page_btn.clicked.connect(self.fit_page)
         
+        self.continuous_btn = QPushButton("连续滚动")
+        self.continuous_btn.setCheckable(True)
+        self.continuous_btn.toggled.connect(self.set_continuous_mode)
+        
         # 搜索控件
         self.search_edit = QLineEdit()
         self.search_edit.setPlaceholderText("搜索文本...")
@@ -208,6 +168,7 @@ class PDFViewerWidget(QDialog):
         toolbar_layout.addWidget(self.zoom_label)
         toolbar_layout.addWidget(self.fit_width_btn)
         toolbar_layout.addWidget(self.fit_page_btn)
+        toolbar_layout.addWidget(self.continuous_btn)
         toolbar_layout.addWidget(QFrame())  # 分隔符
         toolbar_layout.addWidget(self.search_edit)
         toolbar_layout.addWidget(self.search_btn)
@@ -216,15 +177,16 @@ class PDFViewerWidget(QDialog):
         
         # PDF显示区域
         self.scroll_area = QScrollArea()
-        self.scroll_area.setWidgetResizable(True)
+        self.scroll_area.setWidgetResizable(False)
         self.scroll_area.setAlignment(Qt.AlignCenter)
         
-        self.pdf_label = QLabel()
-        self.pdf_label.setAlignment(Qt.AlignCenter)
-        self.pdf_label.setStyleSheet("background-color: white; border: 1px solid #ccc;")
-        self.pdf_label.setText("正在加载PDF...")
+        self.page_canvas = PDFPageCanvas(self.render_engine)
+        self.page_canvas.set_message("正在加载PDF...")
         
-        self.scroll_area.setWidget(self.pdf_label)
+        self.scroll_area.setWidget(self.page_canvas)
+        # 高缩放按图块渲染时，滚动后渲染新露出的区域
+        self.scroll_area.horizontalScrollBar().valueChanged.connect(self.request_visible_tiles)
+        self.scroll_area.verticalScrollBar().valueChanged.connect(self.request_visible_tiles)
         
         # 进度条
         self.progress_bar = QProgressBar()
@@ -316,8 +278,47 @@ class PDFViewerWidget(QDialog):
         """缩放改变"""
         self.zoom_factor = value / 100.0
         self.zoom_label.setText(f"{value}%")
+        if self.continuous_mode:
+            # 拖动滑块时只缩放已有图像，停止后再渲染
+            self.continuous_canvas.set_zoom(self.zoom_factor, defer_render=True)
+            self.update_status()
+            return
         self.render_current_page()
     
+    @property
+    def continuous_mode(self):
+        return self.continuous_canvas is not None and self.scroll_area.widget() is self.continuous_canvas
+    
+    def set_continuous_mode(self, enabled):
+        """切换连续滚动模式（全部页面纵向排列，只渲染可见页面）"""
+        if not self.render_engine or enabled == self.continuous_mode:
+            return
+        # takeWidget 保留另一种模式的画布，切换回来时继续使用
+        self.scroll_area.takeWidget()
+        if enabled:
+            if self.continuous_canvas is None:
+                self.continuous_canvas = PDFContinuousCanvas(self.render_engine, self.scroll_area)
+                self.continuous_canvas.current_page_changed.connect(self.on_continuous_page_changed)
+            self.scroll_area.setWidget(self.continuous_canvas)
+            self.progress_bar.setVisible(False)
+            self.continuous_canvas.set_zoom(self.zoom_factor)
+            self.continuous_canvas.set_highlights(self.search_hits)
+            # 等滚动区域完成布局后再定位
+            QTimer.singleShot(0, lambda: self.continuous_canvas.scroll_to_page(self.current_page))
+        else:
+            self.scroll_area.setWidget(self.page_canvas)
+            self.render_current_page()
+        print(f"📄 {'连续滚动' if enabled else '单页'}模式")
+    
+    def on_continuous_page_changed(self, page_num):
+        """连续滚动时可见区域中的当前页面变化"""
+        self.current_page = page_num
+        self.page_spinbox.blockSignals(True)
+        self.page_spinbox.setValue(page_num + 1)
+        self.page_spinbox.blockSignals(False)
+        self.update_navigation_buttons()
+        self.update_status()
+    
     def zoom_in(self):
         """放大"""
         current_value = self.zoom_slider.value()
@@ -373,75 +374,135 @@ class PDFViewerWidget(QDialog):
             print(f"❌ 适应页面失败: {str(e)}")
     
     def search_text(self):
-        """搜索文本"""
-        search_text = self.search_edit.text().strip()
-        if not search_text:
+        """搜索文本（在全文索引中查询，再次搜索相同内容时跳到下一个匹配页面）"""
+        query = normalize_query(self.search_edit.text())
+        if not query or not self.text_index:
             return
         
         try:
-            # 在当前页面搜索
-            page = self.pdf_document[self.current_page]
-            text_instances = page.search_for(search_text)
+            if query == self.search_query and self.search_hits:
+                pages = sorted(self.search_hits)
+                later = [page_num for page_num in pages if page_num > self.current_page]
+                self.goto_page_num(later[0] if later else pages[0])
+                return
             
-            if text_instances:
-                QMessageBox.information(self, "搜索结果", 
-                                      f"在第{self.current_page + 1}页找到 {len(text_instances)} 个匹配项")
+            self.search_query = query
+            self.search_hits = dict(self.text_index.search(query))
+            if self.search_hits:
+                self.show_first_search_hit()
             else:
-                # 在所有页面中搜索
-                found_pages = []
-                for i in range(self.total_pages):
-                    page = self.pdf_document[i]
-                    if page.search_for(search_text):
-                        found_pages.append(i + 1)
-                
-                if found_pages:
-                    pages_str = ", ".join(map(str, found_pages))
-                    result = QMessageBox.question(self, "搜索结果", 
-                                                f"在以下页面找到匹配项: {pages_str}\n\n是否跳转到第一个匹配页面?",
-                                                QMessageBox.Yes | QMessageBox.No)
-                    if result == QMessageBox.Yes:
-                        self.goto_page_num(found_pages[0] - 1)
-                else:
+                self.refresh_highlights()
+                if self.text_index.complete:
                     QMessageBox.information(self, "搜索结果", "未找到匹配的文本")
+            # 索引尚未建立完成时，新索引的页面中的匹配会陆续加入（on_page_indexed）
+            self.update_status()
                     
         except Exception as e:
             QMessageBox.critical(self, "搜索错误", f"搜索时出错: {str(e)}")
     
+    def show_first_search_hit(self):
+        """跳转到当前页面及之后的第一个匹配页面"""
+        pages = sorted(self.search_hits)
+        later = [page_num for page_num in pages if page_num >= self.current_page]
+        target = later[0] if later else pages[0]
+        self.refresh_highlights()
+        if target != self.current_page:
+            self.goto_page_num(target)
+    
+    def refresh_highlights(self):
+        """更新画布上的搜索高亮"""
+        self.page_canvas.set_highlights(self.search_hits.get(self.current_page))
+        if self.continuous_canvas is not None:
+            self.continuous_canvas.set_highlights(self.search_hits)
+    
+    def on_page_indexed(self, page_num):
+        """后台索引完成一页：加入该页的搜索结果"""
+        if not self.search_query:
+            return
+        rects = self.text_index.search_page(page_num, self.search_query)
+        if rects:
+            first_hit = not self.search_hits
+            self.search_hits[page_num] = rects
+            if first_hit:
+                self.show_first_search_hit()
+            else:
+                self.refresh_highlights()
+        self.update_status()
+    
+    def on_index_ready(self):
+        """索引建立完成（或从磁盘读取完成）"""
+        if not self.search_query:
+            return
+        had_hits = bool(self.search_hits)
+        self.search_hits = dict(self.text_index.search(self.search_query))
+        self.refresh_highlights()
+        if self.search_hits and not had_hits:
+            self.show_first_search_hit()
+        elif not self.search_hits:
+            QMessageBox.information(self, "搜索结果", "未找到匹配的文本")
+        self.update_status()
+    
     def render_current_page(self):
-        """渲染当前页面"""
-        if not self.pdf_document:
+        """渲染当前页面（已缓存时立即显示，否则后台渲染）"""
+        if not self.render_engine:
+            return
+        if self.continuous_mode:
+            self.continuous_canvas.scroll_to_page(self.current_page)
             return
         
-        # 停止之前的渲染线程
-        if self.render_thread and self.render_thread.isRunning():
-            self.render_thread.stop()
-            self.render_thread.wait(1000)  # 等待最多1秒
-        
-        # 显示进度条
-        self.progress_bar.setVisible(True)
-        self.progress_bar.setValue(0)
-        self.pdf_label.setText("正在渲染页面...")
-        
-        # 启动渲染线程
-        self.render_thread = PDFRenderThread(self.pdf_document, self.current_page, self.zoom_factor)
-        self.render_thread.page_rendered.connect(self.on_page_rendered)
-        self.render_thread.render_progress.connect(self.progress_bar.setValue)
-        self.render_thread.render_error.connect(self.on_render_error)
-        self.render_thread.start()
-    
-    def on_page_rendered(self, page_num, pixmap):
-        """页面渲染完成"""
-        if page_num == self.current_page:  # 确保是当前页面
-            self.pdf_label.setPixmap(pixmap)
-            self.pdf_label.resize(pixmap.size())
+        self.page_canvas.show_page(self.current_page, self.zoom_factor)
+        self.page_canvas.set_highlights(self.search_hits.get(self.current_page))
+        if self.page_canvas.tiled:
+            # 只渲染可见区域的图块
+            self.progress_bar.setVisible(False)
+            QTimer.singleShot(0, self.request_visible_tiles)
+            return
         
-        self.progress_bar.setVisible(False)
-        self.update_status()
+        # 画布已有预览（缩放前的图像）时不再渲染低分辨率预览
+        pixmap = self.render_engine.request_page(self.current_page, self.zoom_factor,
+                                                 with_preview=self.page_canvas.preview is None)
+        if pixmap is not None:
+            self.page_canvas.set_pixmap(pixmap)
+            self.progress_bar.setVisible(False)
+        else:
+            # 显示进度条（忙碌状态）
+            self.progress_bar.setRange(0, 0)
+            self.progress_bar.setVisible(True)
+            if self.page_canvas.preview is None:
+                self.page_canvas.set_message("正在渲染页面...")
     
-    def on_render_error(self, error_msg):
+    def request_visible_tiles(self, *args):
+        """请求当前可见区域的图块"""
+        if not self.render_engine or self.continuous_mode or not self.page_canvas.tiled:
+            return
+        visible = self.page_canvas.visibleRegion().boundingRect()
+        if visible.isEmpty():
+            visible = self.scroll_area.viewport().rect()
+        self.render_engine.request_tiles(self.current_page, self.zoom_factor, visible)
+    
+    def on_page_rendered(self, page_num, page_zoom):
+        """页面渲染完成（预取的相邻页面只进入缓存，连续滚动画布自行处理）"""
+        if page_num != self.current_page or self.page_canvas.tiled or self.continuous_mode:
+            return
+        if page_zoom == zoom_key(self.zoom_factor):
+            self.page_canvas.set_pixmap(self.render_engine.cached_page(page_num, self.zoom_factor))
+            self.progress_bar.setVisible(False)
+            self.progress_bar.setRange(0, 100)
+            self.update_status()
+        elif self.render_engine.is_preview(page_zoom):
+            self.page_canvas.set_preview(self.render_engine.cached_preview(page_num))
+    
+    def on_tile_rendered(self, page_num, page_zoom, col, row):
+        """图块渲染完成"""
+        if page_num == self.current_page and page_zoom == zoom_key(self.zoom_factor) and not self.continuous_mode:
+            self.page_canvas.update(col * TILE_SIZE, row * TILE_SIZE, TILE_SIZE, TILE_SIZE)
+    
+    def on_render_error(self, page_num, error_msg):
         """渲染错误"""
+        if page_num != self.current_page or self.continuous_mode:
+            return
         self.progress_bar.setVisible(False)
-        self.pdf_label.setText(f"渲染错误:\n{error_msg}")
+        self.page_canvas.set_message(f"渲染错误:\n{error_msg}")
         QMessageBox.critical(self, "渲染错误", error_msg)
     
     def update_navigation_buttons(self):
@@ -466,19 +527,41 @@ class PDFViewerWidget(QDialog):
             except:
                 pass
             
+            if self.search_query and self.text_index:
+                status_text += f" | 搜索“{self.search_query}”: {len(self.search_hits)} 页有匹配"
+                if self.text_index.error:
+                    status_text += "（建立索引失败）"
+                elif not self.text_index.complete:
+                    status_text += f"（正在建立索引 {self.text_index.indexed_count}/{self.total_pages}）"
+            
             self.status_bar.setText(status_text)
     
-    def closeEvent(self, event):
-        """关闭事件"""
+    def release_resources(self):
+        """停止渲染线程、断开索引并关闭文档（可重复调用）"""
         # 停止渲染线程
-        if self.render_thread and self.render_thread.isRunning():
-            self.render_thread.stop()
-            self.render_thread.wait(1000)
+        if self.render_engine and self.render_engine.worker.isRunning():
+            print(f"📊 PDF渲染缓存统计: {self.render_engine.get_stats()}")
+            self.render_engine.stop()
+        
+        # 索引由同一文件的查看器共享，只断开信号，后台索引继续完成
+        if self.text_index:
+            self.text_index.page_indexed.disconnect(self.on_page_indexed)
+            self.text_index.index_ready.disconnect(self.on_index_ready)
+            self.text_index = None
         
         # 关闭PDF文档
         if self.pdf_document:
             self.pdf_document.close()
-        
+            self.pdf_document = None
+    
+    def done(self, result):
+        """Esc、accept()/reject() 结束对话框时不会产生关闭事件，在这里释放资源"""
+        self.release_resources()
+        super().done(result)
+    
+    def closeEvent(self, event):
+        """关闭事件"""
+        self.release_resources()
         event.accept()
 
 
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+圆形头像缓存测试 - 验证 create_rounded_avatar：
+重复请求直接返回缓存、头像文件修改时间变化后重新渲染、缓存数量不超过 AVATAR_CACHE_SIZE，
+以及缓存前后创建头像和聊天气泡的耗时
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5.QtGui import QColor, QImage
+from PyQt5.QtWidgets import QApplication
+
+from resources.assets.config import online_chat_config as config
+from src.ui.widgets.online_chat_widget import OnlineChatBubble
+
+
+def write_image(path, color, size=256):
+    image = QImage(size, size, QImage.Format_RGB32)
+    image.fill(QColor(color))
+    assert image.save(path, 'PNG')
+    return path
+
+
+class AvatarCacheTestCase(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication(sys.argv)
+
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp(prefix='avatar_cache_')
+        self.addCleanup(shutil.rmtree, self.work_dir, ignore_errors=True)
+        self.reset_cache()
+        self.addCleanup(self.reset_cache)
+
+    @staticmethod
+    def reset_cache():
+        config._avatar_cache.clear()
+        config._avatar_cache_stats.update(hits=0, misses=0)
+
+
+class AvatarCacheTest(AvatarCacheTestCase):
+
+    def test_repeated_request_returns_cached_pixmap(self):
+        path = write_image(os.path.join(self.work_dir, 'avatar.png'), '#3366cc')
+        first = config.create_rounded_avatar(path, 40)
+        self.assertIs(config.create_rounded_avatar(path, 40), first)
+        # 不同大小分别缓存
+        self.assertIsNot(config.create_rounded_avatar(path, 30), first)
+        stats = config.get_avatar_cache_stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['size']), (1, 2, 2))
+
+    def test_mtime_change_invalidates_entry(self):
+        path = write_image(os.path.join(self.work_dir, 'avatar.png'), '#3366cc')
+        first = config.create_rounded_avatar(path, 40)
+        center = first.toImage().pixelColor(first.width() // 2, first.height() // 2)
+        self.assertEqual(center, QColor('#3366cc'))
+
+        # 用户更换头像：文件内容和修改时间都变化
+        write_image(path, '#cc3333')
+        mtime = os.path.getmtime(path) + 10
+        os.utime(path, (mtime, mtime))
+        second = config.create_rounded_avatar(path, 40)
+        self.assertIsNot(second, first)
+        center = second.toImage().pixelColor(second.width() // 2, second.height() // 2)
+        self.assertEqual(center, QColor('#cc3333'))
+        self.assertEqual(config.get_avatar_cache_stats()['misses'], 2)
+        # 同一路径只保留最新的一份
+        self.assertEqual(config.get_avatar_cache_stats()['size'], 1)
+        self.assertIs(config.create_rounded_avatar(path, 40), second)
+
+    def test_cache_size_is_bounded(self):
+        path = write_image(os.path.join(self.work_dir, 'avatar.png'), '#3366cc', size=64)
+        for size in range(10, 10 + config.AVATAR_CACHE_SIZE + 5):
+            config.create_rounded_avatar(path, size)
+        self.assertEqual(config.get_avatar_cache_stats()['size'], config.AVATAR_CACHE_SIZE)
+        # 最久未使用的条目先被淘汰
+        self.assertNotIn((path, 10, self.app.devicePixelRatio()), config._avatar_cache)
+
+
+class AvatarCacheBenchmark(AvatarCacheTestCase):
+    """缓存前（每次都加载图片并绘制圆形头像）与缓存后的耗时对比"""
+    repeats = 200
+
+    def timed(self, func, uncached):
+        start = time.perf_counter()
+        for _ in range(self.repeats):
+            if uncached:
+                self.reset_cache()
+            func()
+        return (time.perf_counter() - start) * 1000 / self.repeats
+
+    def test_avatar_and_bubble_construction(self):
+        path = config.get_avatar_by_profession('系统架构设计师')
+        create = lambda: config.create_rounded_avatar(path, 40)
+        avatar_before = self.timed(create, uncached=True)
+        avatar_after = self.timed(create, uncached=False)
+
+        bubbles = []
+        build = lambda: bubbles.append(OnlineChatBubble("收到，马上处理", is_user=False, sender_name="张工",
+                                                        timestamp="10:00", profession='系统架构设计师'))
+        bubble_before = self.timed(build, uncached=True)
+        bubble_after = self.timed(build, uncached=False)
+        for bubble in bubbles:
+            bubble.deleteLater()
+        self.app.processEvents()
+
+        print(f"\n📊 圆形头像(ms/次): 缓存前 {avatar_before:.3f}，缓存后 {avatar_after:.4f}；"
+              f"聊天气泡构造(ms/个): 缓存前 {bubble_before:.3f}，缓存后 {bubble_after:.3f}")
+        self.assertLess(avatar_after * 10, avatar_before)
+        self.assertLess(bubble_after, bubble_before)
+
+
+if __name__ == '__main__':
+    unittest.main()
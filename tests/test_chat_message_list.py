@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+虚拟消息列表测试 - 在离屏环境中验证聊天窗口的 ChatMessageList：
+滚动范围覆盖全部记录、拖动到任意位置时只为可见区域创建气泡、插入更早的记录时保持查看位置、
+气泡内容变化（图片加载完成）后重新排列、内存中的记录数上限；
+以及1千/1万/5万条消息时每步滚动的耗时和同时存在的气泡数量（应与消息总数无关）
+"""
+
+import contextlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5.QtCore import QCoreApplication, QEvent
+from PyQt5.QtGui import QPixmap
+from PyQt5.QtWidgets import QApplication, QWidget
+
+from resources.assets.config import online_chat_config as config
+from src.ui.widgets.online_chat_widget import ImageChatBubble, OnlineChatWidget
+
+LIST_SIZES = (1000, 10000, 50000)
+SCROLL_STEPS = 40
+WHEEL_STEP = 120  # 一次滚轮滚动的像素数
+FRAME_BUDGET_MS = 1000 / 60
+
+
+class MessageListTestCase(unittest.TestCase):
+    """在临时 CACHE_DIR 中创建并显示聊天窗口（服务器不可达，不会再收到服务器消息）"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication(sys.argv)
+
+    def setUp(self):
+        self.addCleanup(setattr, config, 'CACHE_DIR', config.CACHE_DIR)
+        self.addCleanup(setattr, config, 'CHAT_API_BASE_URL', config.CHAT_API_BASE_URL)
+        config.CACHE_DIR = tempfile.mkdtemp(prefix='chat_list_')
+        self.addCleanup(shutil.rmtree, config.CACHE_DIR, True)
+        config.CHAT_API_BASE_URL = 'http://127.0.0.1:9'
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.widget = OnlineChatWidget()
+            self.widget.show()
+            self.pump_until(lambda: self.widget.connection_error)
+            # 等待连接失败提示触发的延迟滚动执行完毕
+            end = time.time() + 0.5
+            while time.time() < end:
+                self.app.processEvents()
+            self.widget.clear_messages()
+        self.addCleanup(self.close_widget)
+        self.scroll_bar = self.widget.scroll.verticalScrollBar()
+
+    def close_widget(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.widget.api.stop()
+            self.widget.push_channel.stop()
+            if self.widget.history_store:
+                self.widget.history_store.close()
+            self.widget.close()
+            self.widget.deleteLater()
+            self.app.processEvents()
+
+    def pump_until(self, condition, timeout=5.0):
+        end = time.time() + timeout
+        while time.time() < end and not condition():
+            self.app.processEvents()
+            time.sleep(0.005)
+        self.assertTrue(condition(), "等待超时")
+
+    def pump(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            for _ in range(3):
+                self.app.processEvents()
+            # 测试中没有运行事件循环，手动执行回收气泡的 deleteLater
+            QCoreApplication.sendPostedEvents(None, QEvent.DeferredDelete)
+
+    def make_record(self, number):
+        """第 number 条消息：普通文本、长文本、系统消息、文件和图片轮流出现"""
+        kind = number % 5
+        if kind == 3:
+            file_info = {'file_name': f"report_{number}.pdf", 'file_url': '', 'file_size': 2048, 'content': ''}
+            return self.widget._make_message_record("", number % 2 == 0, "user1", "10:00", "file",
+                                                    file_info, message_id=f"m{number}")
+        if kind == 4:
+            file_info = {'file_name': f"photo_{number}.png", 'file_url': '', 'file_size': 4096, 'content': ''}
+            return self.widget._make_message_record("", False, "user2", "10:00", "image",
+                                                    file_info, message_id=f"m{number}")
+        if kind == 2:
+            return self.widget._make_message_record(f"系统通知 {number}", False, "系统", "10:00", "system",
+                                                    message_id=f"m{number}")
+        content = f"消息 {number}" if kind == 0 else f"较长的消息 {number} " + "网络规划与系统设计讨论 " * 12
+        return self.widget._make_message_record(content, number % 2 == 0, f"user{number % 7}", "10:00",
+                                                profession='系统架构设计师', message_id=f"m{number}")
+
+    def fill(self, count):
+        with contextlib.redirect_stdout(io.StringIO()):
+            for number in range(len(self.widget.message_records), count):
+                self.widget._append_message_record(self.make_record(number))
+        self.pump()
+
+    def scroll_to(self, value):
+        self.scroll_bar.setValue(value)
+        self.pump()
+
+    def visible_records(self):
+        """与可见区域相交的气泡对应的记录（从上到下）"""
+        top = self.scroll_bar.value()
+        bottom = top + self.widget.scroll.viewport().height()
+        bubbles = sorted(self.widget.chat_area.bubbles.values(), key=lambda bubble: bubble.y())
+        return [bubble.record for bubble in bubbles
+                if bubble.y() < bottom and bubble.y() + bubble.height() > top]
+
+
+class MessageListTest(MessageListTestCase):
+
+    def test_scroll_range_covers_all_records(self):
+        self.fill(2000)
+        records = self.widget.message_records
+        self.assertEqual(len(records), 2000)
+
+        self.scroll_to(self.scroll_bar.maximum())
+        self.assertIn(records[-1], self.visible_records())
+        self.scroll_to(0)
+        self.assertIn(records[0], self.visible_records())
+        # 只为可见区域附近的记录创建气泡
+        self.assertLess(len(self.widget.chat_area.bubbles), 40)
+
+    def test_jump_to_middle_shows_matching_rows(self):
+        self.fill(5000)
+        chat_area = self.widget.chat_area
+        self.scroll_to(self.scroll_bar.maximum() // 2)
+        value = self.scroll_bar.value()
+        row = chat_area.row_at(value)
+        bubble = chat_area.bubbles[id(self.widget.message_records[row])]
+        # 行高包含下方的行间距
+        self.assertLessEqual(bubble.y(), value)
+        self.assertGreater(bubble.y() + bubble.height() + 10, value)
+        # 相邻的气泡首尾相接，间距与原布局相同
+        below = chat_area.bubbles[id(self.widget.message_records[row + 1])]
+        self.assertEqual(below.y(), bubble.y() + bubble.height() + 10)
+
+    def test_prepend_keeps_viewed_message_in_place(self):
+        self.fill(300)
+        self.scroll_to(self.scroll_bar.maximum() // 2)
+        record = self.visible_records()[0]
+        row = self.widget.message_records.index(record)
+        offset = self.widget.chat_area.bubbles[id(record)].y() - self.scroll_bar.value()
+
+        older = [self.make_record(number) for number in range(1000, 1030)]
+        self.widget.chat_area.prepend(older)
+        self.pump()
+        self.assertIs(self.widget.message_records[row + 30], record)
+        bubble = self.widget.chat_area.bubbles[id(record)]
+        self.assertEqual(bubble.y() - self.scroll_bar.value(), offset)
+
+    def test_image_load_reflows_following_rows(self):
+        self.fill(20)
+        self.scroll_to(0)
+        chat_area = self.widget.chat_area
+        records = self.widget.message_records
+        row = next(row for row, record in enumerate(records[:10]) if record['message_type'] == 'image')
+        bubble = chat_area.bubbles[id(records[row])]
+        self.assertIsInstance(bubble, ImageChatBubble)
+        height = records[row]['height']
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            bubble.on_image_loaded(QPixmap(300, 250))
+        self.pump()
+        self.assertGreater(records[row]['height'], height)
+        self.assertEqual(bubble.height(), records[row]['height'])
+        below = chat_area.bubbles[id(records[row + 1])]
+        self.assertEqual(below.y(), bubble.y() + bubble.height() + 10)
+
+    def test_record_count_is_capped(self):
+        self.addCleanup(setattr, config, 'CHAT_LIST_MAX_RECORDS', config.CHAT_LIST_MAX_RECORDS)
+        self.addCleanup(setattr, config, 'CHAT_LIST_TRIM_SLACK', config.CHAT_LIST_TRIM_SLACK)
+        config.CHAT_LIST_MAX_RECORDS, config.CHAT_LIST_TRIM_SLACK = 100, 20
+        self.fill(250)
+        records = self.widget.message_records
+        self.assertLess(len(records), 120)
+        self.assertEqual(records[-1]['message_id'], "m249")
+        self.scroll_to(self.scroll_bar.maximum())
+        self.assertIn(records[-1], self.visible_records())
+
+    def test_clear_removes_all_bubbles(self):
+        self.fill(200)
+        self.widget.clear_messages()
+        self.pump()
+        self.assertEqual(self.widget.message_records, [])
+        self.assertEqual(self.widget.chat_area.bubbles, {})
+        self.assertEqual(self.scroll_bar.maximum(), 0)
+
+
+class ScrollBenchmark(MessageListTestCase):
+    """消息总数从1千增长到5万时，每步滚动（含重绘）的耗时和同时存在的气泡数量保持不变"""
+
+    def scroll_steps(self, start):
+        """从 start 处向下连续滚动，返回每步耗时（毫秒）和期间最多同时存在的气泡数量"""
+        self.scroll_to(start)
+        viewport = self.widget.scroll.viewport()
+        step_ms, max_bubbles = [], 0
+        for _ in range(SCROLL_STEPS):
+            begin = time.perf_counter()
+            self.scroll_bar.setValue(self.scroll_bar.value() + WHEEL_STEP)
+            viewport.repaint()
+            step_ms.append((time.perf_counter() - begin) * 1000)
+            max_bubbles = max(max_bubbles, len(self.widget.chat_area.bubbles))
+        return step_ms, max_bubbles
+
+    def test_scroll_cost_is_flat(self):
+        results = {}
+        for size in LIST_SIZES:
+            start = time.perf_counter()
+            self.fill(size)
+            fill_s = time.perf_counter() - start
+            step_ms, max_bubbles = [], 0
+            # 顶部、中部、底部附近各滚动一段（首次显示的气泡需要创建和测量）
+            for fraction in (0.0, 0.5, 0.95):
+                ms, bubbles = self.scroll_steps(int(self.scroll_bar.maximum() * fraction))
+                step_ms += ms
+                max_bubbles = max(max_bubbles, bubbles)
+            widgets = len(self.widget.chat_area.findChildren(QWidget))
+            results[size] = (sum(step_ms) / len(step_ms), sorted(step_ms)[int(len(step_ms) * 0.95)],
+                             max_bubbles, widgets)
+            print(f"\n📊 {size}条消息: 追加耗时 {fill_s:.2f}s，滚动范围 {self.scroll_bar.maximum()}px，"
+                  f"每步滚动 平均 {results[size][0]:.2f}ms / P95 {results[size][1]:.2f}ms，"
+                  f"最多同时存在 {max_bubbles} 个气泡（子控件 {widgets} 个）")
+            self.assertEqual(len(self.widget.message_records), size)
+
+        small, large = results[LIST_SIZES[0]], results[LIST_SIZES[-1]]
+        # 滚动耗时与消息总数无关，且在一帧之内
+        self.assertLess(large[0], small[0] * 2 + 1)
+        self.assertLess(large[1], FRAME_BUDGET_MS)
+        # 气泡和控件数量有固定上限，不随消息总数增长
+        self.assertLess(large[2], 40)
+        self.assertLess(large[3], small[3] * 1.5 + 50)
+
+
+if __name__ == '__main__':
+    unittest.main()
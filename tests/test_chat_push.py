@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+聊天推送通道测试 - 使用本地SSE替身服务器验证 ChatPushChannel：
+事件（新消息、在线状态）的接收与分发、事件流断开后带 Last-Event-ID 重连，
+以及服务器没有 /api/chat/stream（与 API.json 一致）时聊天窗口保持轮询；
+推送连接期间停止轮询，断开后临时回退到轮询
+"""
+
+import contextlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5.QtWidgets import QApplication
+
+from resources.assets.config import online_chat_config as config
+from src.ui.widgets.online_chat_widget import ChatPushChannel, OnlineChatAPI, OnlineChatWidget
+
+RETRY_MS = 50  # 替身服务器通过 retry 字段下发的重连间隔
+
+
+def make_message(number):
+    return {
+        'id': f"m{number:06d}",
+        'sender_id': 1,
+        'sender_name': "user1",
+        'content': f"推送消息 {number}",
+        'message_type': 'text',
+        'timestamp': f"2026-01-01T10:00:{number % 60:02d}"
+    }
+
+
+def message_event(number):
+    message = make_message(number)
+    return f"id: {message['id']}\nevent: message\ndata: {json.dumps(message, ensure_ascii=False)}\n\n"
+
+
+def presence_event(users):
+    return f"event: presence\ndata: {json.dumps({'users': users}, ensure_ascii=False)}\n\n"
+
+
+class PushServer(ThreadingHTTPServer):
+    """
+    /api/chat/stream 替身服务器（同时提供 /health、/api/chat/messages、/api/chat/online-users）
+
+    supports_push: 是否提供事件流端点（API.json 中没有，默认返回404）
+    事件流与常见SSE服务一样不声明 charset（SSE 固定为UTF-8）
+    streams: 每次连接依次取出一组事件；取完最后一组后事件流保持打开（只发送心跳），直到 release
+    """
+
+    def __init__(self, supports_push=True):
+        super().__init__(('127.0.0.1', 0), PushRequestHandler)
+        self.supports_push = supports_push
+        self.streams = []
+        self.connections = []  # 每次事件流连接的 (Last-Event-ID, 查询参数)
+        self.lock = threading.Lock()
+        self.release = threading.Event()
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_port}"
+
+    def push_connections(self):
+        with self.lock:
+            return list(self.connections)
+
+
+class PushRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, data, status=200):
+        body = json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        self.send_header('content-type', 'application/json')
+        self.send_header('content-length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        server = self.server
+        url = urlparse(self.path)
+        if url.path == '/health':
+            self.send_json({'status': 'healthy'})
+        elif url.path in ('/api/chat/messages', '/api/chat/online-users'):
+            self.send_json([])
+        elif url.path == config.CHAT_PUSH_PATH and server.supports_push:
+            self.stream_events(url)
+        else:
+            self.send_json({'detail': 'Not Found'}, 404)
+
+    def stream_events(self, url):
+        server = self.server
+        query = {name: values[0] for name, values in parse_qs(url.query).items()}
+        with server.lock:
+            server.connections.append((self.headers.get('Last-Event-ID'), query))
+            events = server.streams.pop(0) if server.streams else None
+        self.send_response(200)
+        self.send_header('content-type', 'text/event-stream')
+        self.send_header('cache-control', 'no-cache')
+        self.send_header('connection', 'close')
+        self.end_headers()
+        self.close_connection = True
+        try:
+            self.wfile.write(f"retry: {RETRY_MS}\n\n".encode('utf-8'))
+            for event in events or []:
+                self.wfile.write(event.encode('utf-8'))
+            self.wfile.flush()
+            if events is None:
+                while not server.release.wait(0.2):
+                    self.wfile.write(b": ping\n\n")
+                    self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # 客户端停止推送通道
+
+
+def start_server(test, supports_push=True):
+    server = PushServer(supports_push)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    test.addCleanup(server.server_close)
+    test.addCleanup(server.shutdown)
+    test.addCleanup(server.release.set)
+    return server
+
+
+class PushTestCase(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication(sys.argv)
+
+    def wait_until(self, condition, timeout=5.0):
+        end = time.time() + timeout
+        while time.time() < end and not condition():
+            self.app.processEvents()
+            time.sleep(0.005)
+        self.assertTrue(condition(), "等待推送超时")
+        self.app.processEvents()  # 处理工作线程结束前发出的信号
+
+
+class ChatPushChannelTest(PushTestCase):
+
+    def setUp(self):
+        self.server = start_server(self)
+        api = OnlineChatAPI()
+        api.base_url = self.server.base_url
+        self.channel = ChatPushChannel(api)
+        self.addCleanup(self.stop_channel)
+        self.signals = {'messages': [], 'presence': [], 'connected': 0, 'disconnected': [], 'unsupported': []}
+        self.channel.message_pushed.connect(self.signals['messages'].append)
+        self.channel.presence_changed.connect(self.signals['presence'].append)
+        self.channel.connected.connect(lambda: self.signals.update(connected=self.signals['connected'] + 1))
+        self.channel.disconnected.connect(self.signals['disconnected'].append)
+        self.channel.push_unsupported.connect(self.signals['unsupported'].append)
+
+    def stop_channel(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.channel.stop()
+
+    def start_channel(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.channel.start()
+
+    def test_events_are_delivered(self):
+        self.server.streams = [[message_event(1), ": heartbeat\n\n", presence_event(['user1', 'user2']),
+                                message_event(2)], None]
+        self.start_channel()
+        self.wait_until(lambda: len(self.signals['messages']) == 2 and self.signals['presence'])
+
+        self.assertEqual(self.signals['messages'], [make_message(1), make_message(2)])
+        self.assertEqual(self.signals['presence'], [['user1', 'user2']])
+        self.assertEqual(self.channel.last_event_id, make_message(2)['id'])
+        self.assertEqual(self.channel.stats['events'], 3)
+        self.assertEqual(self.channel.reconnect_interval, RETRY_MS)
+
+    def test_reconnect_resumes_after_last_event(self):
+        # 第一条连接发送两条消息后被服务器关闭，重连后继续接收
+        self.server.streams = [[message_event(1), message_event(2)], [message_event(3)]]
+        self.start_channel()
+        self.wait_until(lambda: len(self.signals['messages']) == 3)
+
+        connections = self.server.push_connections()
+        self.assertEqual(connections[0][0], None)
+        self.assertEqual(connections[1][0], make_message(2)['id'])
+        self.assertEqual(connections[1][1].get('last_id'), make_message(2)['id'])
+        self.assertEqual([message['id'] for message in self.signals['messages']],
+                         [make_message(number)['id'] for number in (1, 2, 3)])
+        self.assertIn("服务器关闭了事件流", self.signals['disconnected'])
+        self.assertGreaterEqual(self.channel.stats['reconnects'], 1)
+        self.assertGreaterEqual(self.signals['connected'], 2)
+
+    def test_missing_endpoint_stops_without_retrying(self):
+        self.server.supports_push = False
+        self.start_channel()
+        self.wait_until(lambda: self.channel.isFinished())
+
+        self.assertEqual(self.signals['unsupported'], ["HTTP 404"])
+        self.assertEqual(self.signals['connected'], 0)
+        self.assertEqual(self.channel.stats['reconnects'], 0)
+
+
+class PushFallbackTest(PushTestCase):
+    """聊天窗口：推送连接后停止轮询，断开或服务器不支持推送时使用轮询"""
+
+    def setUp(self):
+        self.original_cache_dir = config.CACHE_DIR
+        config.CACHE_DIR = tempfile.mkdtemp(prefix='chat_push_')
+        self.addCleanup(setattr, config, 'CACHE_DIR', self.original_cache_dir)
+        self.addCleanup(shutil.rmtree, config.CACHE_DIR, True)
+        self.addCleanup(setattr, config, 'CHAT_API_BASE_URL', config.CHAT_API_BASE_URL)
+
+    def create_widget(self, server):
+        config.CHAT_API_BASE_URL = server.base_url
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.widget = OnlineChatWidget()
+        self.addCleanup(self.close_widget)
+        return self.widget
+
+    def close_widget(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.widget.heartbeat_timer.stop()
+            self.widget.auto_refresh_timer.stop()
+            self.widget.api.stop()
+            self.widget.push_channel.stop()
+            if self.widget.history_store:
+                self.widget.history_store.close()
+            self.widget.deleteLater()
+
+    def pump_until(self, condition):
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.wait_until(condition)
+
+    def test_push_replaces_polling_until_disconnected(self):
+        server = start_server(self)
+        server.streams = [None]
+        widget = self.create_widget(server)
+        self.pump_until(lambda: widget.push_active)
+        self.assertFalse(widget.auto_refresh_timer.isActive())
+
+        # 推送的消息直接显示
+        server.streams = [[message_event(7)]]
+        server.release.set()  # 关闭当前事件流，重连后收到新消息
+        self.pump_until(lambda: widget.newest_message_id == make_message(7)['id'])
+        self.assertGreaterEqual(len(server.push_connections()), 2)
+
+    def test_disconnect_falls_back_to_polling(self):
+        server = start_server(self)
+        server.streams = [None]
+        widget = self.create_widget(server)
+        self.pump_until(lambda: widget.push_active)
+
+        server.supports_push = False  # 重连时端点已不存在
+        server.release.set()
+        self.pump_until(lambda: not widget.push_channel.isRunning())
+        self.assertFalse(widget.push_active)
+        self.assertTrue(widget.auto_refresh_timer.isActive())
+
+    def test_server_without_stream_keeps_polling(self):
+        server = start_server(self, supports_push=False)
+        widget = self.create_widget(server)
+        self.pump_until(lambda: widget.push_channel.isFinished())
+
+        self.assertFalse(widget.push_active)
+        self.assertTrue(widget.auto_refresh_timer.isActive())
+        self.assertEqual(widget.get_traffic_stats()['push']['reconnects'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+聊天消息同步测试 - 使用本地 /api/chat/messages 替身服务器（只支持 room_id/limit/before，与 API.json 一致）：
+请求中不带服务器不支持的 after 参数；向前补齐遗漏消息时在本地最新消息（或更早的发送时间）处停止，
+定时轮询的补齐页数有上限；历史消息增长到1万条时，每次轮询的CPU耗时保持不变；
+冷启动时从本地记录渲染第一条消息的耗时
+"""
+
+import io
+import contextlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5.QtWidgets import QApplication
+
+from resources.assets.config import online_chat_config as config
+from src.api.chat_history_store import ChatHistoryStore
+from src.ui.widgets.online_chat_widget import OnlineChatAPI, OnlineChatWidget
+
+HISTORY_SIZES = (1000, 5000, 10000)
+POLLS_PER_SIZE = 50
+POLL_LIMIT = 20
+COLD_OPEN_HISTORY = 20000
+
+
+def make_message(number):
+    """第 number 条消息（编号越大越新）"""
+    return {
+        'id': f"m{number:06d}",
+        'sender_id': number % 7,
+        'sender_name': f"user{number % 7}",
+        'content': f"消息 {number}",
+        'message_type': 'text',
+        'timestamp': f"2026-01-01T{number // 3600 % 24:02d}:{number // 60 % 60:02d}:{number % 60:02d}"
+    }
+
+
+def latest_page(newest, limit, missing=()):
+    """编号不超过 newest 的最新一页（最新的在前），跳过 missing 中已删除的消息"""
+    page = []
+    for number in range(newest, 0, -1):
+        if len(page) >= limit:
+            break
+        if number not in missing:
+            page.append(make_message(number))
+    return page
+
+
+class ChatServer(ThreadingHTTPServer):
+    """/health 和 /api/chat/messages 替身服务器，消息编号 1..count（missing 中的已删除），记录消息请求的查询参数"""
+
+    def __init__(self, count=0):
+        super().__init__(('127.0.0.1', 0), ChatRequestHandler)
+        self.count = count
+        self.missing = set()
+        self.queries = []
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_port}"
+
+
+class ChatRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == '/health':
+            body = b'{"status": "healthy"}'
+        elif url.path == '/api/chat/messages':
+            query = {name: values[0] for name, values in parse_qs(url.query).items()}
+            self.server.queries.append(query)
+            newest = self.server.count
+            if query.get('before'):
+                newest = int(query['before'][1:]) - 1
+            page = latest_page(newest, int(query.get('limit', 50)), self.server.missing)
+            body = json.dumps(page, ensure_ascii=False).encode('utf-8')
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header('content-type', 'application/json')
+        self.send_header('content-length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start_server(test, count):
+    server = ChatServer(count)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    test.addCleanup(server.server_close)
+    test.addCleanup(server.shutdown)
+    return server
+
+
+class MessageRequestTest(unittest.TestCase):
+    """消息请求只使用 API.json 中定义的参数"""
+
+    def setUp(self):
+        self.server = start_server(self, 500)
+        self.api = OnlineChatAPI()
+        self.api.base_url = self.server.base_url
+        self.loaded = []
+        self.api.messages_loaded.connect(self.loaded.append)
+
+    def load(self, *args):
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.api._load_messages_sync(*args)
+        return self.loaded[-1]
+
+    def test_latest_page_without_anchor(self):
+        messages = self.load(POLL_LIMIT)
+        self.assertEqual([msg['id'] for msg in messages], [msg['id'] for msg in latest_page(500, POLL_LIMIT)])
+        self.assertEqual(len(self.server.queries), 1)
+
+    def test_anchor_is_not_sent_to_server(self):
+        self.load(POLL_LIMIT, None, make_message(490)['id'])
+        for query in self.server.queries:
+            self.assertLessEqual(set(query), {'room_id', 'limit', 'before'})
+
+    def test_gap_is_filled_up_to_anchor(self):
+        anchor = make_message(450)
+        messages = self.load(POLL_LIMIT, None, anchor['id'], anchor['timestamp'])
+        self.assertEqual(len(self.server.queries), 3)
+        self.assertIn(anchor['id'], [msg['id'] for msg in messages])
+        self.assertEqual(messages[0]['id'], make_message(500)['id'])
+
+    def test_deleted_anchor_stops_at_its_timestamp(self):
+        """本地最新的消息已在服务器删除时，按发送时间停止，而不是一直翻到上限"""
+        anchor = make_message(450)
+        self.server.missing.add(450)
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            self.api._load_messages_sync(POLL_LIMIT, None, anchor['id'], anchor['timestamp'])
+        self.assertEqual(len(self.server.queries), 3)
+        self.assertNotIn("上限", output.getvalue())
+
+    def test_poll_backfill_is_capped(self):
+        anchor = make_message(300)
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            self.api._load_messages_sync(POLL_LIMIT, None, anchor['id'], anchor['timestamp'],
+                                         config.MESSAGE_SYNC_POLL_MAX_PAGES)
+        self.assertEqual(len(self.server.queries), config.MESSAGE_SYNC_POLL_MAX_PAGES)
+        self.assertIn("上限", output.getvalue())
+
+    def test_anchor_on_last_allowed_page_is_not_reported_as_capped(self):
+        pages = config.MESSAGE_SYNC_POLL_MAX_PAGES
+        anchor = make_message(500 - pages * POLL_LIMIT + 1)
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            self.api._load_messages_sync(POLL_LIMIT, None, anchor['id'], anchor['timestamp'], pages)
+        self.assertEqual(len(self.server.queries), pages)
+        self.assertNotIn("上限", output.getvalue())
+
+    def test_short_history_stops_without_warning(self):
+        """服务器上的消息不足一页时已到最早的消息，不算达到上限"""
+        self.server.count = 15
+        anchor = make_message(400)
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            self.api._load_messages_sync(POLL_LIMIT, None, anchor['id'], anchor['timestamp'])
+        self.assertEqual(len(self.server.queries), 1)
+        self.assertNotIn("上限", output.getvalue())
+
+
+class ChatWidgetTestCase(unittest.TestCase):
+    """在临时 CACHE_DIR 中创建聊天窗口（本地聊天记录数据库写在这里）"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication(sys.argv)
+        cls.original_cache_dir = config.CACHE_DIR
+
+    @classmethod
+    def tearDownClass(cls):
+        config.CACHE_DIR = cls.original_cache_dir
+
+    def setUp(self):
+        config.CACHE_DIR = tempfile.mkdtemp(prefix='chat_sync_')
+        self.addCleanup(shutil.rmtree, config.CACHE_DIR, True)
+
+    def create_widget(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.widget = OnlineChatWidget()
+        self.widget.heartbeat_timer.stop()
+        self.widget.auto_refresh_timer.stop()
+        self.addCleanup(self.close_widget)
+        return self.widget
+
+    def close_widget(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.widget.api.stop()
+            self.widget.push_channel.stop()
+            if self.widget.history_store:
+                self.widget.history_store.close()
+            self.widget.deleteLater()
+
+
+class PollCostBenchmark(ChatWidgetTestCase):
+    """每次轮询返回最新20条（其中1条是新消息），已显示的消息由ID索引去重"""
+
+    def test_poll_cpu_is_flat_as_history_grows(self):
+        widget = self.create_widget()
+        newest = 0
+        per_poll_ms = {}
+        for size in HISTORY_SIZES:
+            with contextlib.redirect_stdout(io.StringIO()):
+                while newest < size:
+                    newest += 100
+                    widget.on_messages_loaded(latest_page(newest, 100))
+                self.app.processEvents()
+
+                start = time.process_time()
+                for _ in range(POLLS_PER_SIZE):
+                    newest += 1
+                    widget.on_messages_loaded(latest_page(newest, POLL_LIMIT))
+                per_poll_ms[size] = (time.process_time() - start) * 1000 / POLLS_PER_SIZE
+                self.app.processEvents()
+
+        print(f"\n📊 每次轮询CPU耗时(ms): " +
+              ", ".join(f"{size}条历史 {ms:.2f}" for size, ms in per_poll_ms.items()))
+        self.assertEqual(widget.newest_message_id, make_message(newest)['id'])
+        self.assertLessEqual(len(widget.message_id_index), config.MESSAGE_CACHE_SIZE)
+        # 允许计时抖动，但不能随历史消息数量增长（1万条 vs 1千条）
+        self.assertLess(per_poll_ms[HISTORY_SIZES[-1]], per_poll_ms[HISTORY_SIZES[0]] * 2 + 1)
+
+
+class AutoRefreshTest(ChatWidgetTestCase):
+
+    def test_timer_poll_uses_small_backfill_cap(self):
+        widget = self.create_widget()
+        with contextlib.redirect_stdout(io.StringIO()):
+            widget.on_messages_loaded(latest_page(100, POLL_LIMIT))
+        requests = []
+        widget.api.load_messages = lambda **kwargs: requests.append(kwargs)
+        widget.connection_error = False
+        widget.push_active = False
+        widget.auto_refresh_messages()
+        self.assertEqual(requests, [{
+            'limit': POLL_LIMIT,
+            'anchor_id': make_message(100)['id'],
+            'anchor_timestamp': make_message(100)['timestamp'],
+            'max_pages': config.MESSAGE_SYNC_POLL_MAX_PAGES
+        }])
+        self.assertLess(config.MESSAGE_SYNC_POLL_MAX_PAGES, config.MESSAGE_SYNC_MAX_PAGES)
+
+class ColdOpenBenchmark(ChatWidgetTestCase):
+    """本地已有2万条记录、服务器上多出50条时，打开窗口先从本地渲染，健康检查通过后只补齐缺口"""
+
+    def test_cold_open_renders_from_local_store(self):
+        store = ChatHistoryStore()
+        store.save_messages(config.CHAT_ROOM_ID, [make_message(number) for number in range(1, COLD_OPEN_HISTORY + 1)])
+        store.close()
+        server = start_server(self, COLD_OPEN_HISTORY + 50)
+        self.addCleanup(setattr, config, 'CHAT_API_BASE_URL', config.CHAT_API_BASE_URL)
+        config.CHAT_API_BASE_URL = server.base_url
+
+        # 首条消息在窗口构造过程中（等待健康检查结果期间）从本地记录渲染
+        start = time.perf_counter()
+        widget = self.create_widget()
+        first_render_ms = (time.perf_counter() - start) * 1000
+        self.assertTrue(widget.message_records, "打开时应立即显示本地记录")
+        self.assertEqual(widget.newest_message_id, make_message(COLD_OPEN_HISTORY)['id'])
+        self.assertEqual(server.queries, [], "本地记录渲染不等待服务器")
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            end = time.time() + 5
+            while widget.newest_message_id != make_message(COLD_OPEN_HISTORY + 50)['id'] and time.time() < end:
+                self.app.processEvents()
+                time.sleep(0.005)
+            gap_filled_ms = (time.perf_counter() - start) * 1000
+
+        print(f"\n📊 冷启动（本地{COLD_OPEN_HISTORY}条记录）: 窗口构造并显示首条消息 {first_render_ms:.1f}ms，"
+              f"补齐缺口 {gap_filled_ms:.1f}ms")
+        self.assertEqual(widget.newest_message_id, make_message(COLD_OPEN_HISTORY + 50)['id'])
+        self.assertEqual(len(server.queries), 1, "缺口在一页之内，只需请求一次")
+        self.assertLess(first_render_ms, 2000)
+
+
+if __name__ == '__main__':
+    unittest.main()
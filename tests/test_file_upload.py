@@ -0,0 +1,479 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分块上传测试 - 使用本地上传替身服务器（可注入延迟和失败）验证 FileUploadThread：
+多个数据块并发上传、单块失败重试、取消后按续传清单继续，以及服务器不支持 /chunks 时的原有协议；
+50MB文件的首个数据块发出时间和总耗时（边读边算哈希 vs 原有协议先读一遍文件计算哈希）；
+去重上传：本地索引命中只发送引用、服务器已有文件时只发送引用、引用失败时完整上传、服务器没有去重接口时不再探测
+"""
+
+import hashlib
+import json
+import os
+import random
+import re
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5.QtWidgets import QApplication
+
+from resources.assets.config import online_chat_config as config
+from src.api import upload_dedup
+from src.ui.widgets.file_upload_widget import FileUploadThread
+
+CHUNK_LATENCY = 0.05  # 注入的每个数据块请求延迟（秒）
+
+
+def write_file(path, size, seed=0):
+    with open(path, 'wb') as f:
+        f.write(random.Random(seed).randbytes(size))
+    return path
+
+
+def parse_multipart(content_type, body):
+    """解析 multipart/form-data 请求体，返回 {字段名: bytes}"""
+    boundary = content_type.split('boundary=', 1)[1].strip('"').encode('latin-1')
+    fields = {}
+    for part in body.split(b'--' + boundary)[1:-1]:
+        head, _, value = part[2:].partition(b'\r\n\r\n')
+        name = re.search(rb'name="([^"]*)"', head).group(1).decode('utf-8')
+        fields[name] = value[:-2]  # 去掉分隔符前的 \r\n
+    return fields
+
+
+class UploadServer(ThreadingHTTPServer):
+    """
+    /api/chat/upload 替身服务器
+
+    supports_chunks: 是否提供 /chunks 查询接口（不提供时客户端走原有协议）
+    supports_dedup: 是否提供 /exists 和 /reference 去重接口
+    latency: 每个数据块请求的延迟（秒）
+    fail_chunks: {块序号: 剩余失败次数}，失败时返回500
+    """
+
+    def __init__(self, supports_chunks=True, latency=0, supports_dedup=True):
+        super().__init__(('127.0.0.1', 0), UploadRequestHandler)
+        self.supports_chunks = supports_chunks
+        self.supports_dedup = supports_dedup
+        self.latency = latency
+        self.fail_chunks = {}
+        self.on_chunk = None  # 收到数据块后的回调（块序号）
+        self.lock = threading.Lock()
+        self.chunks = {}  # upload_id -> {块序号: 数据}
+        self.chunk_posts = []  # 每个数据块请求的表单字段（不含数据）
+        self.requests = []  # (方法, 路径)
+        self.merged = {}  # file_hash -> 已保存的文件数据（完整上传或分块合并）
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.first_chunk_at = None
+
+    @property
+    def upload_url(self):
+        return f"http://127.0.0.1:{self.server_port}/api/chat/upload"
+
+
+class UploadRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, data, status=200):
+        body = json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        self.send_header('content-type', 'application/json')
+        self.send_header('content-length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def read_body(self):
+        return self.rfile.read(int(self.headers.get('Content-Length') or 0))
+
+    def do_GET(self):
+        server = self.server
+        url = urlparse(self.path)
+        query = {name: values[0] for name, values in parse_qs(url.query).items()}
+        with server.lock:
+            server.requests.append(('GET', url.path))
+        if url.path.endswith('/chunks') and server.supports_chunks:
+            with server.lock:
+                chunks = sorted(server.chunks.get(query.get('upload_id'), {}))
+            self.send_json({'chunks': chunks})
+        elif url.path.endswith('/exists') and server.supports_dedup:
+            with server.lock:
+                data = server.merged.get(query.get('file_hash'))
+            self.send_json({'exists': data is not None and len(data) == int(query.get('file_size', -1))})
+        else:
+            self.send_json({'detail': 'Not Found'}, 404)
+
+    def do_POST(self):
+        server = self.server
+        path = urlparse(self.path).path
+        body = self.read_body()
+        with server.lock:
+            server.requests.append(('POST', path))
+        if path.endswith('/chunk'):
+            self.handle_chunk(body)
+        elif path.endswith('/merge'):
+            self.handle_merge(json.loads(body))
+        elif path.endswith('/reference') and server.supports_dedup:
+            payload = json.loads(body)
+            with server.lock:
+                data = server.merged.get(payload['file_hash'])
+            if data is None:
+                self.send_json({'detail': '文件不存在'}, 404)
+            else:
+                self.send_json({'file_hash': payload['file_hash'], 'file_size': len(data), 'reference': True})
+        elif path == '/api/chat/upload':
+            fields = parse_multipart(self.headers['Content-Type'], body)
+            data = fields['file']
+            file_hash = hashlib.md5(data).hexdigest()
+            with server.lock:
+                server.merged[file_hash] = data
+            self.send_json({'file_hash': file_hash, 'file_size': len(data)})
+        else:
+            self.send_json({'detail': 'Not Found'}, 404)
+
+    def handle_chunk(self, body):
+        server = self.server
+        with server.lock:
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+            if server.first_chunk_at is None:
+                server.first_chunk_at = time.perf_counter()
+        try:
+            time.sleep(server.latency)
+            fields = parse_multipart(self.headers['Content-Type'], body)
+            index = int(fields['chunk_index'])
+            data = fields['chunk']
+            with server.lock:
+                server.chunk_posts.append({name: value.decode('utf-8') for name, value in fields.items()
+                                           if name != 'chunk'})
+                if server.fail_chunks.get(index):
+                    server.fail_chunks[index] -= 1
+                    failed = True
+                else:
+                    failed = False
+                    if fields['chunk_hash'].decode('utf-8') == hashlib.md5(data).hexdigest():
+                        server.chunks.setdefault(fields['upload_id'].decode('utf-8'), {})[index] = data
+            if server.on_chunk:
+                server.on_chunk(index)
+            if failed:
+                self.send_json({'detail': '注入的失败'}, 500)
+            else:
+                self.send_json({'chunk_index': index})
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def handle_merge(self, payload):
+        server = self.server
+        with server.lock:
+            chunks = server.chunks.get(payload['upload_id'], {})
+            if sorted(chunks) != list(range(payload['chunks_total'])):
+                self.send_json({'detail': '数据块不完整'}, 400)
+                return
+            data = b''.join(chunks[index] for index in range(payload['chunks_total']))
+            if hashlib.md5(data).hexdigest() != payload['file_hash']:
+                self.send_json({'detail': '文件哈希不一致'}, 400)
+                return
+            server.merged[payload['file_hash']] = data
+        self.send_json({'file_hash': payload['file_hash'], 'file_size': len(data)})
+
+
+class UploadTestCase(unittest.TestCase):
+    """临时目录中的测试文件、续传清单和上传索引"""
+
+    supports_chunks = True
+    supports_dedup = True
+    latency = 0
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication(sys.argv)
+
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp(prefix='file_upload_')
+        self.addCleanup(shutil.rmtree, self.work_dir, True)
+        for name, value in (('UPLOAD_MANIFEST_DIR', os.path.join(self.work_dir, 'manifests')),
+                            ('UPLOAD_RETRY_BACKOFF', 0.01)):
+            self.addCleanup(setattr, config, name, getattr(config, name))
+            setattr(config, name, value)
+        self.addCleanup(setattr, upload_dedup, '_default_index', upload_dedup._default_index)
+        upload_dedup._default_index = upload_dedup.UploadIndex(os.path.join(self.work_dir, 'upload_index.json'))
+        self.addCleanup(upload_dedup._unsupported_urls.clear)
+
+        self.server = UploadServer(self.supports_chunks, self.latency, self.supports_dedup)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+    def make_file(self, name, size, seed=0):
+        return write_file(os.path.join(self.work_dir, name), size, seed)
+
+    def upload(self, file_path, on_thread=None):
+        """在当前线程执行一次上传，返回 (完成结果, 失败信息)"""
+        thread = FileUploadThread(file_path, self.server.upload_url, {'Authorization': 'Bearer stand-in'})
+        completed, failed = [], []
+        thread.upload_completed.connect(completed.append)
+        thread.upload_failed.connect(failed.append)
+        if on_thread:
+            on_thread(thread)
+        thread.run()
+        return (completed[0] if completed else None), (failed[0] if failed else None)
+
+    def file_hash(self, file_path):
+        with open(file_path, 'rb') as f:
+            return hashlib.md5(f.read()).hexdigest()
+
+    def assert_uploaded(self, file_path, result):
+        self.assertIsNotNone(result)
+        file_hash = self.file_hash(file_path)
+        self.assertEqual(result['file_hash'], file_hash)
+        with open(file_path, 'rb') as f:
+            self.assertEqual(self.server.merged[file_hash], f.read())
+
+
+class ChunkedUploadTest(UploadTestCase):
+
+    def test_chunks_upload_concurrently(self):
+        path = self.make_file('report.pdf', 8 * config.UPLOAD_CHUNK_SIZE + 123)
+        self.server.latency = CHUNK_LATENCY
+        result, error = self.upload(path)
+        self.assertIsNone(error)
+        self.assert_uploaded(path, result)
+        self.assertEqual(len(self.server.chunk_posts), 9)
+        self.assertGreater(self.server.max_in_flight, 1)
+        self.assertLessEqual(self.server.max_in_flight, config.UPLOAD_CHUNK_CONCURRENCY)
+        # 支持 /chunks 的服务器按 upload_id 合并，数据块不需要携带 file_hash
+        self.assertFalse(any('file_hash' in post for post in self.server.chunk_posts))
+        self.assertFalse(os.listdir(config.UPLOAD_MANIFEST_DIR), "上传完成后应删除续传清单")
+
+    def test_failed_chunk_is_retried_alone(self):
+        path = self.make_file('report.pdf', 6 * config.UPLOAD_CHUNK_SIZE)
+        self.server.fail_chunks = {3: 2}
+        result, error = self.upload(path)
+        self.assertIsNone(error)
+        self.assert_uploaded(path, result)
+        sent = [int(post['chunk_index']) for post in self.server.chunk_posts]
+        self.assertEqual(sent.count(3), 3)
+        self.assertEqual(sorted(set(sent)), list(range(6)))
+        self.assertEqual(len(sent), 6 + 2)
+
+    def test_chunk_failing_past_retries_fails_upload(self):
+        path = self.make_file('report.pdf', 3 * config.UPLOAD_CHUNK_SIZE)
+        self.server.fail_chunks = {1: config.UPLOAD_CHUNK_RETRIES + 1}
+        result, error = self.upload(path)
+        self.assertIsNone(result)
+        self.assertIn("2/3", error)
+
+    def test_resume_after_cancel_skips_completed_chunks(self):
+        path = self.make_file('report.pdf', 10 * config.UPLOAD_CHUNK_SIZE)
+        server = self.server
+
+        def cancel_after_three(thread):
+            def on_chunk(index):
+                if len(server.chunk_posts) >= 3:
+                    thread.cancel()
+            server.on_chunk = on_chunk
+        result, error = self.upload(path, cancel_after_three)
+        self.assertIsNone(result)
+        self.assertIsNone(error, "取消不是失败")
+        manifests = os.listdir(config.UPLOAD_MANIFEST_DIR)
+        self.assertEqual(len(manifests), 1)
+        with open(os.path.join(config.UPLOAD_MANIFEST_DIR, manifests[0]), 'r', encoding='utf-8') as f:
+            completed = set(json.load(f)['completed'])
+        self.assertTrue(completed)
+
+        server.on_chunk = None
+        first_run = len(server.chunk_posts)
+        result, error = self.upload(path)
+        self.assertIsNone(error)
+        self.assert_uploaded(path, result)
+        resent = {int(post['chunk_index']) for post in server.chunk_posts[first_run:]}
+        self.assertFalse(resent & completed, "续传时不应重新发送已完成的数据块")
+        self.assertEqual(resent | completed, set(range(10)))
+
+
+class LegacyChunkedUploadTest(UploadTestCase):
+    """服务器没有 /chunks 接口（与 API.json 一致）：先计算文件哈希，每个数据块都携带 file_hash"""
+
+    supports_chunks = False
+
+    def test_every_chunk_carries_file_hash(self):
+        path = self.make_file('report.pdf', 5 * config.UPLOAD_CHUNK_SIZE + 7)
+        result, error = self.upload(path)
+        self.assertIsNone(error)
+        self.assert_uploaded(path, result)
+        file_hash = self.file_hash(path)
+        self.assertEqual([post.get('file_hash') for post in self.server.chunk_posts], [file_hash] * 6)
+
+    def test_resume_uses_local_manifest(self):
+        path = self.make_file('report.pdf', 6 * config.UPLOAD_CHUNK_SIZE)
+        self.server.fail_chunks = {4: config.UPLOAD_CHUNK_RETRIES + 1}
+        result, error = self.upload(path)
+        self.assertIsNone(result)
+        first_run = len(self.server.chunk_posts)
+
+        result, error = self.upload(path)
+        self.assertIsNone(error)
+        self.assert_uploaded(path, result)
+        resent = [int(post['chunk_index']) for post in self.server.chunk_posts[first_run:]]
+        self.assertIn(4, resent)
+        self.assertLess(len(resent), 6, "本地清单中已完成的数据块不应重新发送")
+
+
+class ChunkThroughputBenchmark(UploadTestCase):
+    """注入每块50ms延迟时，并发上传与逐块上传的吞吐量对比"""
+
+    latency = CHUNK_LATENCY
+
+    def timed_upload(self, path):
+        start = time.perf_counter()
+        result, error = self.upload(path)
+        elapsed = time.perf_counter() - start
+        self.assertIsNone(error)
+        self.assert_uploaded(path, result)
+        return elapsed
+
+    def test_concurrent_chunks_raise_throughput(self):
+        size = 16 * config.UPLOAD_CHUNK_SIZE
+        concurrent_path = self.make_file('concurrent.pdf', size, seed=1)
+        sequential_path = self.make_file('sequential.pdf', size, seed=2)
+
+        concurrent_s = self.timed_upload(concurrent_path)
+        self.addCleanup(setattr, config, 'UPLOAD_CHUNK_CONCURRENCY', config.UPLOAD_CHUNK_CONCURRENCY)
+        config.UPLOAD_CHUNK_CONCURRENCY = 1
+        sequential_s = self.timed_upload(sequential_path)
+
+        mb = size / (1024 * 1024)
+        print(f"\n📊 {mb:.0f}MB，每块延迟{CHUNK_LATENCY * 1000:.0f}ms: "
+              f"逐块上传 {mb / sequential_s:.1f}MB/s，并发上传 {mb / concurrent_s:.1f}MB/s")
+        self.assertLess(concurrent_s, sequential_s / 2)
+
+
+
+class StreamingHashBenchmark(UploadTestCase):
+    """
+    50MB文件：支持 /chunks 时哈希在读取数据块时同步计算，第一个数据块立即发出；
+    原有协议（当前服务器）要先完整读一遍文件计算哈希，首个数据块因此推迟
+    """
+
+    def timed_upload(self, path):
+        self.server.first_chunk_at = None
+        start = time.perf_counter()
+        result, error = self.upload(path)
+        end = time.perf_counter()
+        self.assertIsNone(error)
+        self.assert_uploaded(path, result)
+        return (self.server.first_chunk_at - start) * 1000, (end - start) * 1000
+
+    def test_first_chunk_is_not_delayed_by_hashing(self):
+        size = config.UPLOAD_MAX_SIZE
+        streaming_path = self.make_file('streaming.pdf', size, seed=3)
+        legacy_path = self.make_file('legacy.pdf', size, seed=4)
+
+        streaming_first, streaming_total = self.timed_upload(streaming_path)
+        self.server.supports_chunks = False
+        legacy_first, legacy_total = self.timed_upload(legacy_path)
+        hash_start = time.perf_counter()
+        FileUploadThread(legacy_path, self.server.upload_url).get_file_hash(config.UPLOAD_CHUNK_SIZE)
+        pre_read_ms = (time.perf_counter() - hash_start) * 1000
+
+        print(f"\n📊 {size // (1024 * 1024)}MB上传: 边读边算哈希 首块 {streaming_first:.0f}ms / 总计 {streaming_total:.0f}ms，"
+              f"原有协议 首块 {legacy_first:.0f}ms / 总计 {legacy_total:.0f}ms（预先计算哈希 {pre_read_ms:.0f}ms）")
+        self.assertLess(streaming_first, legacy_first)
+        self.assertGreaterEqual(legacy_first, pre_read_ms * 0.5)
+
+
+class DedupUploadTest(UploadTestCase):
+    """重复发送同一文件时只发送引用，不再上传文件内容"""
+
+    SMALL_SIZE = 200 * 1024
+
+    def upload_requests(self):
+        """除 /chunks 查询外的请求（每次上传前清空）"""
+        return [request for request in self.server.requests if not request[1].endswith('/chunks')]
+
+    def test_index_hit_sends_reference_only(self):
+        path = self.make_file('screenshot.png', self.SMALL_SIZE)
+        result, error = self.upload(path)
+        self.assertIsNone(error)
+        self.assertEqual(self.upload_requests(), [('GET', '/api/chat/upload/exists'), ('POST', '/api/chat/upload')])
+
+        self.server.requests.clear()
+        result, error = self.upload(path)
+        self.assertIsNone(error)
+        self.assertTrue(result.get('reference'))
+        self.assertEqual(self.upload_requests(), [('POST', '/api/chat/upload/reference')])
+        stats = upload_dedup.get_upload_index().get_stats()
+        self.assertEqual(stats['index_hits'], 1)
+        self.assertEqual(stats['bytes_skipped'], self.SMALL_SIZE)
+
+    def test_probe_hit_sends_reference_only(self):
+        path = self.make_file('manual.pdf', self.SMALL_SIZE)
+        with open(path, 'rb') as f:
+            data = f.read()
+        self.server.merged[hashlib.md5(data).hexdigest()] = data  # 其他用户上传过同一文件
+
+        result, error = self.upload(path)
+        self.assertIsNone(error)
+        self.assertTrue(result.get('reference'))
+        self.assertEqual(self.upload_requests(),
+                         [('GET', '/api/chat/upload/exists'), ('POST', '/api/chat/upload/reference')])
+        self.assertEqual(upload_dedup.get_upload_index().get_stats()['probe_hits'], 1)
+
+    def test_missing_reference_forgets_and_uploads(self):
+        path = self.make_file('manual.pdf', 3 * config.UPLOAD_CHUNK_SIZE)
+        result, error = self.upload(path)
+        self.assertIsNone(error)
+        self.server.merged.clear()  # 服务器清理了文件
+        self.server.chunks.clear()
+
+        self.server.requests.clear()
+        result, error = self.upload(path)
+        self.assertIsNone(error)
+        self.assert_uploaded(path, result)
+        self.assertFalse(result.get('reference'))
+        requests = self.upload_requests()
+        self.assertEqual(requests[0], ('POST', '/api/chat/upload/reference'))
+        self.assertEqual(requests.count(('POST', '/api/chat/upload/chunk')), 3)
+        self.assertEqual(requests[-1], ('POST', '/api/chat/upload/merge'))
+        # 重新上传后索引再次记录该文件
+        self.assertIsNotNone(upload_dedup.get_upload_index().lookup(path))
+
+
+class DedupUnsupportedServerTest(UploadTestCase):
+    """服务器没有 /exists、/reference（与 API.json 一致）：只多一次探测，之后不再探测，文件只上传一次"""
+
+    supports_dedup = False
+
+    def test_missing_endpoints_cost_one_probe(self):
+        first = self.make_file('first.png', 100 * 1024, seed=5)
+        second = self.make_file('second.png', 100 * 1024, seed=6)
+        for path in (first, second, first):
+            result, error = self.upload(path)
+            self.assertIsNone(error)
+            self.assert_uploaded(path, result)
+
+        self.assertEqual(self.server.requests, [
+            ('GET', '/api/chat/upload/exists'),
+            ('POST', '/api/chat/upload'),
+            ('POST', '/api/chat/upload'),
+            ('POST', '/api/chat/upload'),
+        ])
+        self.assertFalse(upload_dedup.dedup_supported(self.server.upload_url))
+        self.assertEqual(upload_dedup.get_upload_index().get_stats()['probe_skipped'], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PDF预览对话框测试 - 使用临时生成的PDF在离屏环境中测量Ctrl+滚轮缩放：
+每一步缩放（含重绘）都应在一帧（60fps）内完成，连续缩放结束后只渲染最终的缩放比例；
+切换手册时旧的渲染引擎随之释放
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fitz  # PyMuPDF
+from PyQt5.QtCore import Qt, QPoint, QPointF
+from PyQt5.QtGui import QWheelEvent
+from PyQt5.QtWidgets import QApplication
+
+from src.desktop.desktop_manager import PDFPreviewDialog
+from src.ui.widgets.pdf_render_engine import PDFRenderEngine, ZOOM_RENDER_DELAY
+
+PAGE_COUNT = 40
+FRAME_BUDGET_MS = 1000 / 60
+
+
+def make_pdf(path, pages=PAGE_COUNT):
+    """生成每页40行文字加一个色块的测试文档"""
+    doc = fitz.open()
+    for page_num in range(pages):
+        page = doc.new_page()
+        for line in range(40):
+            page.insert_text((50, 60 + line * 18), f"Page {page_num + 1} line {line}: operations manual sample",
+                             fontsize=11)
+        page.draw_rect(fitz.Rect(50, 790, 300, 810), color=(1, 0, 0), fill=(0.2, 0.4, 0.8))
+    doc.save(path)
+    doc.close()
+
+
+class PDFPreviewDialogTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication(sys.argv)
+        cls.work_dir = tempfile.mkdtemp(prefix='pdf_preview_')
+        cls.pdf_paths = []
+        for name in ('a', 'b'):
+            path = os.path.join(cls.work_dir, f"manual_{name}.pdf")
+            make_pdf(path)
+            cls.pdf_paths.append(path)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.work_dir, ignore_errors=True)
+
+    def setUp(self):
+        self.dialog = PDFPreviewDialog(self.pdf_paths[0], "测试")
+        self.dialog.show()
+        self.addCleanup(self.dialog.reject)
+        self.pump_until(lambda: self.dialog.page_canvas is not None and self.dialog.page_canvas.pixmap is not None)
+
+    def pump(self, seconds):
+        end = time.time() + seconds
+        while time.time() < end:
+            self.app.processEvents()
+
+    def pump_until(self, condition, timeout=5.0):
+        end = time.time() + timeout
+        while time.time() < end and not condition():
+            self.app.processEvents()
+            time.sleep(0.002)
+        self.assertTrue(condition(), "等待渲染超时")
+
+    def wheel_step(self, up):
+        """发送一次Ctrl+滚轮事件并立即重绘页面，返回耗时（毫秒）"""
+        event = QWheelEvent(QPointF(10, 10), QPointF(10, 10), QPoint(0, 0), QPoint(0, 120 if up else -120),
+                            Qt.NoButton, Qt.ControlModifier, Qt.NoScrollPhase, False)
+        start = time.perf_counter()
+        self.dialog.scroll_area_wheel_event(event)
+        self.dialog.page_canvas.repaint()
+        return (time.perf_counter() - start) * 1000
+
+    def test_wheel_zoom_fits_frame_budget(self):
+        dialog = self.dialog
+        # 等待相邻页面预取和全文索引完成，避免后台线程争用GIL影响测量
+        self.pump(0.5)
+        renders = dialog.render_engine.get_stats()['renders']
+        steps = [self.wheel_step(True) for _ in range(4)] + [self.wheel_step(False) for _ in range(6)]
+        print(f"\n📊 Ctrl+滚轮缩放每步耗时(ms): {[round(ms, 1) for ms in steps]}，最大 {max(steps):.1f}")
+
+        self.assertLess(max(steps), FRAME_BUDGET_MS, "单步缩放超过一帧（60fps）")
+        # 连续缩放期间只缩放显示已有图像，不发起新的渲染
+        self.assertEqual(dialog.render_engine.get_stats()['renders'], renders)
+        self.assertEqual(dialog.zoom_combo.currentText(), "50%")
+
+        self.pump(ZOOM_RENDER_DELAY / 1000)
+        self.pump_until(lambda: dialog.page_canvas.pixmap is not None)
+        # 最终显示的是按最终缩放比例渲染的图像
+        self.assertIs(dialog.page_canvas.pixmap,
+                      dialog.render_engine.cached_page(dialog.current_page, dialog.current_zoom()))
+
+    def test_switching_manuals_releases_old_engine(self):
+        dialog = self.dialog
+        for index in range(6):
+            dialog.open_document(self.pdf_paths[index % 2], f"角色{index}")
+            self.pump_until(lambda: dialog.page_canvas is not None and dialog.page_canvas.pixmap is not None)
+        # deleteLater 在事件循环中执行
+        self.pump(0.1)
+        self.assertEqual(len(dialog.findChildren(PDFRenderEngine)), 1)
+
+    def test_reject_stops_render_engine(self):
+        dialog = self.dialog
+        worker = dialog.render_engine.worker
+        dialog.reject()
+        self.assertIsNone(dialog.render_engine)
+        self.assertIsNone(dialog.pdf_doc)
+        self.assertTrue(worker.wait(2000))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PDF渲染引擎测试 - 使用临时生成的PDF在离屏环境中验证 PDFRenderEngine：
+缓存命中不再渲染、相邻页面预取、按字节上限淘汰（其他缩放比例优先、距当前页最远优先、同等条件按LRU），
+以及200页手册连续翻页的耗时（预取命中 vs 每次翻页同步渲染）
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fitz  # PyMuPDF
+from PyQt5.QtGui import QPixmap
+from PyQt5.QtWidgets import QApplication
+
+from src.ui.widgets.pdf_render_engine import PDFRenderEngine, render_page_image, zoom_key
+
+ZOOM = 0.5
+FRAME_BUDGET_MS = 1000 / 60
+
+
+def make_pdf(path, pages):
+    """生成每页40行文字加一个色块的测试文档，返回每页尺寸"""
+    doc = fitz.open()
+    for page_num in range(pages):
+        page = doc.new_page()
+        for line in range(40):
+            page.insert_text((50, 60 + line * 18), f"Page {page_num + 1} line {line}: operations manual sample",
+                             fontsize=11)
+        page.draw_rect(fitz.Rect(50, 790, 300, 810), color=(1, 0, 0), fill=(0.2, 0.4, 0.8))
+    doc.save(path)
+    sizes = [(page.rect.width, page.rect.height) for page in doc]
+    doc.close()
+    return sizes
+
+
+class RenderEngineTestCase(unittest.TestCase):
+    page_count = 20
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication(sys.argv)
+        cls.work_dir = tempfile.mkdtemp(prefix='pdf_render_')
+        cls.pdf_path = os.path.join(cls.work_dir, 'manual.pdf')
+        cls.page_sizes = make_pdf(cls.pdf_path, cls.page_count)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.work_dir, ignore_errors=True)
+
+    def create_engine(self, cache_pages=None):
+        """创建渲染引擎，cache_pages 指定缓存上限可容纳的整页图像数量"""
+        engine = PDFRenderEngine(self.pdf_path, self.page_sizes)
+        if cache_pages is not None:
+            engine.cache_bytes = int(cache_pages * self.page_cost(engine))
+        self.addCleanup(engine.stop)
+        return engine
+
+    @staticmethod
+    def page_cost(engine):
+        size = engine.page_pixel_size(0, ZOOM)
+        return size.width() * size.height() * max(QPixmap(1, 1).depth(), 8) // 8
+
+    def wait_idle(self, engine, timeout=10.0):
+        """等待渲染线程完成全部任务，并处理已发出的渲染结果"""
+        worker = engine.worker
+        end = time.time() + timeout
+        while time.time() < end and (worker._jobs or worker.current_key is not None):
+            self.app.processEvents()
+            time.sleep(0.001)
+        self.app.processEvents()
+        self.assertFalse(worker._jobs or worker.current_key is not None, "等待渲染超时")
+
+    def show_page(self, engine, page_num, zoom=ZOOM):
+        """请求整页并等待其可显示，返回QPixmap"""
+        pixmap = engine.request_page(page_num, zoom, with_preview=False)
+        end = time.time() + 10
+        while pixmap is None and time.time() < end:
+            self.app.processEvents()
+            time.sleep(0.001)
+            pixmap = engine.cached_page(page_num, zoom)
+        self.assertIsNotNone(pixmap, "等待渲染超时")
+        return pixmap
+
+    @staticmethod
+    def cached_pages(engine, zoom=ZOOM):
+        return sorted(key[1] for key in engine._cache if key[0] == 'page' and key[2] == zoom_key(zoom))
+
+
+class RenderCacheTest(RenderEngineTestCase):
+
+    def test_cache_hit_does_not_render_again(self):
+        engine = self.create_engine()
+        pixmap = self.show_page(engine, 3)
+        self.wait_idle(engine)
+        renders = engine.get_stats()['renders']
+
+        self.assertIs(engine.request_page(3, ZOOM), pixmap)
+        self.wait_idle(engine)
+        stats = engine.get_stats()
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['renders'], renders)
+
+    def test_neighbours_are_prefetched(self):
+        engine = self.create_engine()
+        self.show_page(engine, 5)
+        self.wait_idle(engine)
+        self.assertEqual(self.cached_pages(engine), [4, 5, 6])
+        # 翻到下一页时直接命中缓存
+        self.assertIsNotNone(engine.request_page(6, ZOOM))
+        self.wait_idle(engine)
+        self.assertEqual(self.cached_pages(engine), [4, 5, 6, 7])
+
+    def test_cache_stays_within_byte_limit(self):
+        engine = self.create_engine(cache_pages=3.5)
+        for page_num in range(6):
+            self.show_page(engine, page_num)
+            self.wait_idle(engine)
+            self.assertLessEqual(engine.get_stats()['bytes'], engine.cache_bytes)
+        # 距离当前页（5）最远的页面先被淘汰，保留当前页和预取的前后页
+        self.assertEqual(self.cached_pages(engine), [4, 5, 6])
+        self.assertGreater(engine.get_stats()['evictions'], 0)
+
+    def test_other_zoom_evicted_before_far_pages(self):
+        engine = self.create_engine(cache_pages=4.5)
+        self.show_page(engine, 10)
+        self.wait_idle(engine)
+        # 缩放到更小比例后，旧缩放比例的图像即使是当前页也先被淘汰
+        engine.cache_bytes = engine.get_stats()['bytes'] + 2 * self.page_cost(engine) // 4
+        self.show_page(engine, 10, zoom=ZOOM / 2)
+        self.wait_idle(engine)
+        self.assertEqual(self.cached_pages(engine, ZOOM / 2), [9, 10, 11])
+        self.assertLess(len(self.cached_pages(engine)), 3)
+
+    def test_equal_candidates_evicted_in_lru_order(self):
+        engine = self.create_engine()
+        engine.cancel_pending()
+        pixmap = QPixmap(100, 100)
+        engine.cache_bytes = 2 * 100 * 100 * max(pixmap.depth(), 8) // 8
+        engine._focus = (5, zoom_key(ZOOM))
+        engine._store(('page', 4, zoom_key(ZOOM)), QPixmap(pixmap))
+        engine._store(('page', 6, zoom_key(ZOOM)), QPixmap(pixmap))
+        engine.cached_page(4, ZOOM)  # 第4页最近使用过
+        engine._store(('page', 5, zoom_key(ZOOM)), QPixmap(pixmap))
+        # 第4、6页距当前页相同，淘汰最久未使用的第6页
+        self.assertEqual(self.cached_pages(engine), [4, 5])
+
+
+class PageFlipBenchmark(RenderEngineTestCase):
+    """200页手册逐页向后翻阅：预取后每次翻页直接显示缓存，对比每次翻页同步渲染"""
+    page_count = 200
+    flips = 40
+
+    def test_page_flip_latency(self):
+        document = fitz.open(self.pdf_path)
+        try:
+            sync_ms = []
+            for page_num in range(self.flips):
+                start = time.perf_counter()
+                QPixmap.fromImage(render_page_image(document[page_num], ZOOM))
+                sync_ms.append((time.perf_counter() - start) * 1000)
+        finally:
+            document.close()
+
+        engine = self.create_engine()
+        flip_ms = []
+        for page_num in range(self.flips):
+            start = time.perf_counter()
+            self.show_page(engine, page_num)
+            flip_ms.append((time.perf_counter() - start) * 1000)
+            self.wait_idle(engine)  # 阅读当前页期间完成预取
+
+        cached = flip_ms[1:]
+        print(f"\n📊 翻页耗时(ms): 同步渲染 平均 {sum(sync_ms) / len(sync_ms):.2f} 最大 {max(sync_ms):.2f}，"
+              f"预取命中 平均 {sum(cached) / len(cached):.3f} 最大 {max(cached):.3f}")
+        self.assertEqual(engine.get_stats()['hits'], self.flips - 1)
+        self.assertLess(max(cached), FRAME_BUDGET_MS)
+        self.assertLess(sum(cached) / len(cached), sum(sync_ms) / len(sync_ms))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+断点续传下载测试 - 使用本地下载替身服务器（可在传输中途断开连接）验证 RangeDownloader：
+连接中断后只重新请求缺少的字节、.part 文件跨实例续传、文件变化时 If-Range 返回200后从头下载、
+大文件分段并行下载，以及服务器提前结束传输时抛出 IncompleteDownloadError
+"""
+
+import os
+import random
+import re
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.api.range_downloader import IncompleteDownloadError, RangeDownloader
+from src.core import api_config
+
+SMALL_SIZE = 1024 * 1024  # 小于 DOWNLOAD_MIN_SEGMENT_SIZE，单连接下载
+
+
+def make_data(size, seed=0):
+    return random.Random(seed).randbytes(size)
+
+
+class DownloadServer(ThreadingHTTPServer):
+    """
+    文件下载替身服务器（FastAPI/Starlette 风格的小写响应头）
+
+    ranges: 是否支持 Range 请求
+    drop_after: 每个响应发送该字节数后断开连接（drops 次）
+    truncate_at: 只发送到该绝对偏移处，随后关闭连接（不声明 content-length）
+    """
+
+    def __init__(self, data, ranges=True):
+        super().__init__(('127.0.0.1', 0), DownloadRequestHandler)
+        self.lock = threading.Lock()
+        self.ranges = ranges
+        self.drop_after = None
+        self.drops = 0
+        self.truncate_at = None
+        self.requests = []  # (Range, If-Range)
+        self.set_data(data, 'v1')
+
+    def set_data(self, data, version):
+        self.data = data
+        self.etag = f'"{version}"'
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_port}/api/files/manual.bin"
+
+    def ranges_requested(self):
+        with self.lock:
+            return [requested for requested, _ in self.requests]
+
+
+class DownloadRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        range_header = self.headers.get('Range')
+        if_range = self.headers.get('If-Range')
+        with server.lock:
+            server.requests.append((range_header, if_range))
+            data, etag = server.data, server.etag
+            drop = server.drop_after if server.drops > 0 else None
+            if drop is not None:
+                server.drops -= 1
+
+        start, end = 0, len(data) - 1
+        match = re.match(r'bytes=(\d+)-(\d*)', range_header or '')
+        partial = server.ranges and match and (if_range is None or if_range == etag)
+        if partial:
+            start = int(match.group(1))
+            end = int(match.group(2)) if match.group(2) else end
+        body = data[start:end + 1]
+
+        self.send_response(206 if partial else 200)
+        if partial:
+            self.send_header('content-range', f"bytes {start}-{end}/{len(data)}")
+        if server.ranges:
+            self.send_header('accept-ranges', 'bytes')
+        self.send_header('etag', etag)
+        self.send_header('content-disposition', 'attachment; filename="manual.bin"')
+        if server.truncate_at is not None:
+            body = body[:max(0, server.truncate_at - start)]
+            self.send_header('connection', 'close')
+            self.close_connection = True
+        else:
+            self.send_header('content-length', str(len(body)))
+        if drop is not None:
+            body = body[:drop]
+            self.close_connection = True
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # 客户端读够分段后提前关闭连接
+
+
+class RangeDownloaderTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp(prefix='range_download_')
+        self.addCleanup(shutil.rmtree, self.work_dir, ignore_errors=True)
+        backoff = api_config.HTTP_BACKOFF_FACTOR
+        api_config.HTTP_BACKOFF_FACTOR = 0.01
+        self.addCleanup(setattr, api_config, 'HTTP_BACKOFF_FACTOR', backoff)
+        self.dest_path = os.path.join(self.work_dir, 'manual.bin')
+
+    def start_server(self, data, ranges=True):
+        server = DownloadServer(data, ranges)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return server
+
+    def download(self, server, **kwargs):
+        downloader = RangeDownloader(server.url, self.dest_path, **kwargs)
+        downloader.run()
+        return downloader
+
+    def assert_downloaded(self, data):
+        with open(self.dest_path, 'rb') as f:
+            self.assertEqual(f.read(), data)
+        self.assertFalse(os.path.exists(self.dest_path + '.part'))
+        self.assertFalse(os.path.exists(self.dest_path + '.part.json'))
+
+    def interrupted_download(self, server, drop_after):
+        """下载到一半断开且不重试，留下 .part 文件和续传状态，返回已写入的字节数"""
+        server.drop_after, server.drops = drop_after, 1
+        with self.assertRaises(Exception):
+            self.download(server, max_retries=0)
+        self.assertTrue(os.path.exists(self.dest_path + '.part'))
+        return RangeDownloader(server.url, self.dest_path)._load_state()['segments'][0]['done']
+
+
+class RangeResumeTest(RangeDownloaderTestCase):
+
+    def test_dropped_connection_refetches_only_missing_bytes(self):
+        data = make_data(SMALL_SIZE)
+        server = self.start_server(data)
+        drop_after = 300 * 1024
+        server.drop_after, server.drops = drop_after, 1
+
+        downloader = self.download(server)
+        self.assert_downloaded(data)
+        ranges = server.ranges_requested()
+        self.assertEqual(len(ranges), 2)
+        self.assertEqual(ranges[0], 'bytes=0-')
+        offset = int(re.match(r'bytes=(\d+)-', ranges[1]).group(1))
+        # 从已写入磁盘的位置继续，已收到的字节不重复请求
+        self.assertGreater(offset, 0)
+        self.assertLessEqual(offset, drop_after)
+        self.assertEqual(ranges[1], f"bytes={offset}-{SMALL_SIZE - 1}")
+        self.assertEqual(downloader.stats['retries'], 1)
+        # 续传请求带上 ETag，服务器文件变化时不会拼接出错误内容
+        self.assertEqual(server.requests[1][1], '"v1"')
+
+    def test_part_file_resumes_in_new_downloader(self):
+        data = make_data(SMALL_SIZE, seed=1)
+        server = self.start_server(data)
+        done = self.interrupted_download(server, 600 * 1024)
+        self.assertGreater(done, 0)
+
+        server.requests.clear()
+        downloader = self.download(server)
+        self.assert_downloaded(data)
+        self.assertEqual(server.ranges_requested(), [f"bytes={done}-{SMALL_SIZE - 1}"])
+        self.assertEqual(downloader.stats['resumed_bytes'], done)
+        # 服务器响应头大小写与原始响应无关
+        self.assertEqual(downloader.response_headers.get('Content-Disposition'),
+                         'attachment; filename="manual.bin"')
+
+    def test_changed_file_restarts_from_zero(self):
+        server = self.start_server(make_data(SMALL_SIZE, seed=2))
+        self.interrupted_download(server, 600 * 1024)
+
+        new_data = make_data(SMALL_SIZE + 1000, seed=3)
+        server.set_data(new_data, 'v2')
+        server.requests.clear()
+        downloader = self.download(server)
+        self.assert_downloaded(new_data)
+        ranges = server.ranges_requested()
+        # If-Range 不匹配时服务器返回200，丢弃 .part 后重新探测
+        self.assertEqual(server.requests[0][1], '"v1"')
+        self.assertEqual(ranges[1], 'bytes=0-')
+        self.assertEqual(len(ranges), 2)
+        self.assertEqual(downloader.total_size, len(new_data))
+
+    def test_server_without_ranges_downloads_whole_file(self):
+        data = make_data(SMALL_SIZE, seed=4)
+        server = self.start_server(data, ranges=False)
+        server.drop_after, server.drops = 300 * 1024, 1
+        self.download(server)
+        self.assert_downloaded(data)
+        # 不支持 Range 时无法续传，重试从头下载
+        self.assertEqual(len(server.requests), 2)
+        self.assertFalse(os.path.exists(self.dest_path + '.part.json'))
+
+
+class SegmentedDownloadTest(RangeDownloaderTestCase):
+
+    def test_large_file_split_into_segments(self):
+        size = 3 * api_config.DOWNLOAD_MIN_SEGMENT_SIZE + 12345
+        data = make_data(size, seed=5)
+        server = self.start_server(data)
+        downloader = self.download(server, segments=4)
+        self.assert_downloaded(data)
+
+        self.assertEqual(downloader.stats['segments'], 3)
+        ranges = server.ranges_requested()
+        # 探测请求的数据流直接作为第一个分段，其余分段各请求一次
+        self.assertEqual(ranges[0], 'bytes=0-')
+        segment_size = (size + 2) // 3
+        self.assertEqual(sorted(ranges[1:]), [f"bytes={segment_size}-{2 * segment_size - 1}",
+                                              f"bytes={2 * segment_size}-{size - 1}"])
+
+    def test_dropped_segment_refetches_only_that_segment(self):
+        size = 2 * api_config.DOWNLOAD_MIN_SEGMENT_SIZE
+        data = make_data(size, seed=6)
+        server = self.start_server(data)
+        self.download(server)
+        self.assert_downloaded(data)
+        os.remove(self.dest_path)
+
+        server.requests.clear()
+        server.drop_after, server.drops = 300 * 1024, 1  # 只有探测请求（第一个分段）被断开
+        self.download(server)
+        self.assert_downloaded(data)
+        ranges = server.ranges_requested()
+        self.assertEqual(len(ranges), 3)
+        offset, end = map(int, re.match(r'bytes=(\d+)-(\d+)', ranges[2]).groups())
+        self.assertGreater(offset, 0)
+        self.assertEqual(end, size // 2 - 1)
+
+
+class IncompleteDownloadTest(RangeDownloaderTestCase):
+
+    def test_truncated_body_raises_incomplete_download(self):
+        data = make_data(SMALL_SIZE, seed=7)
+        server = self.start_server(data)
+        server.truncate_at = 400 * 1024  # 服务器只发送前400KB就正常关闭连接
+
+        with self.assertRaises(IncompleteDownloadError):
+            self.download(server, max_retries=2)
+        ranges = server.ranges_requested()
+        self.assertEqual(len(ranges), 3)
+        # 每次重试都从已写入的位置继续，已下载部分保留用于下次续传
+        self.assertEqual(ranges[1:], [f"bytes={400 * 1024}-{SMALL_SIZE - 1}"] * 2)
+        self.assertTrue(os.path.exists(self.dest_path + '.part'))
+        self.assertFalse(os.path.exists(self.dest_path))
+
+
+if __name__ == '__main__':
+    unittest.main()
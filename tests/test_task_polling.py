@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+任务轮询测试 - 使用本地替身服务器验证条件请求和增量转换：
+任务列表未变化时，空闲轮询不转换任务、不写入 received_tasks.json、不刷新任务显示；
+服务器响应缓慢时后台刷新不阻塞界面线程的事件循环
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5.QtCore import QTimer
+from PyQt5.QtWidgets import QApplication
+
+from src.desktop.desktop_manager import APIClient, DesktopManager
+
+IDLE_POLLS = 5
+SLOW_SERVER_DELAY = 0.5  # 慢速替身服务器每个任务请求的延迟（秒）
+SLOW_SERVER_TASKS = 500
+
+
+def make_task(task_id, status="进行中"):
+    return {
+        'id': task_id,
+        'title': f"任务{task_id}",
+        'description': "替身服务器任务",
+        'status': status,
+        'priority': "中",
+        'task_type': "测试"
+    }
+
+
+class TaskServer(ThreadingHTTPServer):
+    """/api/my-tasks 替身服务器，记录收到的请求"""
+
+    def __init__(self, send_validators=True, task_count=5, delay=0):
+        super().__init__(('127.0.0.1', 0), TaskRequestHandler)
+        self.send_validators = send_validators
+        self.delay = delay
+        self.tasks = [make_task(task_id) for task_id in range(1, task_count + 1)]
+        self.version = 1
+        self.requests = []  # [(路径, If-None-Match)]
+        self.not_modified_count = 0
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_port}"
+
+    def set_tasks(self, tasks):
+        self.tasks = tasks
+        self.version += 1
+
+
+class TaskRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, data, headers=None):
+        body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        self.server.requests.append((self.path, None))
+        self.send_json({'access_token': 'stand-in-token', 'token_type': 'bearer'})
+
+    def do_GET(self):
+        server = self.server
+        if_none_match = self.headers.get('If-None-Match')
+        server.requests.append((self.path.split('?')[0], if_none_match))
+        time.sleep(server.delay)
+        etag = f'"tasks-v{server.version}"'
+        if server.send_validators and if_none_match == etag:
+            server.not_modified_count += 1
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        # 与 Starlette 一致，响应头名称为小写
+        self.send_json(server.tasks, {'etag': etag} if server.send_validators else None)
+
+
+class TaskManagerTestCase(unittest.TestCase):
+    """在临时工作目录中创建桌面管理器，任务接口指向替身服务器"""
+
+    send_validators = True
+    task_count = 5
+    server_delay = 0
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication(sys.argv)
+        cls.original_cwd = os.getcwd()
+        # received_tasks.json 写在当前目录下
+        cls.work_dir = tempfile.mkdtemp(prefix='task_polling_')
+        os.chdir(cls.work_dir)
+        cls.manager = DesktopManager()
+        cls.manager.poll_scheduler.stop()
+        # 启动1秒后的任务通知检查会另行登录，不属于轮询流程
+        cls.manager.notification_timer.stop()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.manager.deleteLater()
+        os.chdir(cls.original_cwd)
+
+    def setUp(self):
+        self.server = TaskServer(self.send_validators, self.task_count, self.server_delay)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        manager = self.manager
+        manager.task_api_client = APIClient(base_url=self.server.base_url)
+        manager.get_user_info_for_api = lambda: {
+            'username': 'tester', 'password': 'secret', 'type': '操作员', 'operator_type': '操作员'
+        }
+        manager.current_tasks = []
+        manager.current_task_index = 0
+        manager._api_task_cache = {}
+        manager._tasks_signature = None
+        manager._rendered_task_key = None
+        for name in manager.task_poll_stats:
+            manager.task_poll_stats[name] = 0
+
+        # 任务显示的重绘次数（update_task_display 每次重绘都会设置任务文字）
+        self.repaints = 0
+        label = manager.task_scroll_label
+        original_set_text = label.setText
+
+        def counting_set_text(text):
+            self.repaints += 1
+            original_set_text(text)
+        label.setText = counting_set_text
+        self.addCleanup(lambda: label.__dict__.pop('setText', None))
+
+        self.cache_path = os.path.join(self.work_dir, 'received_tasks.json')
+        if os.path.exists(self.cache_path):
+            os.remove(self.cache_path)
+
+    def poll(self):
+        """执行一次与后台刷新线程相同的轮询流程"""
+        self.manager.on_task_data_fetched(self.manager._fetch_task_data(self.manager._task_poll_snapshot()))
+
+
+class TaskPollingTest(TaskManagerTestCase):
+    """空闲轮询不转换、不写盘；任务变化时只转换变化的任务"""
+
+    def test_idle_polls_do_no_work(self):
+        stats = self.manager.task_poll_stats
+        self.poll()
+        self.assertEqual(stats['conversions'], 5)
+        self.assertEqual(stats['cache_writes'], 1)
+        written_at = os.stat(self.cache_path).st_mtime_ns
+        repaints = self.repaints
+        self.assertGreater(repaints, 0)
+
+        for _ in range(IDLE_POLLS):
+            self.poll()
+
+        self.assertEqual(stats['polls'], 1 + IDLE_POLLS)
+        self.assertEqual(stats['conversions'], 5, "空闲轮询不应转换任务")
+        self.assertEqual(stats['cache_writes'], 1, "空闲轮询不应写入缓存")
+        self.assertEqual(os.stat(self.cache_path).st_mtime_ns, written_at)
+        self.assertEqual(stats['unchanged'], IDLE_POLLS)
+        self.assertEqual(self.repaints, repaints, "空闲轮询不应重绘任务显示")
+        self.assertEqual(self.server.not_modified_count, IDLE_POLLS)
+        task_requests = [etag for path, etag in self.server.requests if path == '/api/my-tasks']
+        self.assertEqual(task_requests[1:], ['"tasks-v1"'] * IDLE_POLLS)
+
+    def test_changed_task_is_converted_alone(self):
+        stats = self.manager.task_poll_stats
+        self.poll()
+        tasks = [dict(task) for task in self.server.tasks]
+        tasks[2]['status'] = "已完成"
+        self.server.set_tasks(tasks)
+
+        self.poll()
+        self.assertEqual(stats['conversions'], 6, "只有变化的任务需要转换")
+        self.assertEqual(stats['cache_writes'], 2)
+        with open(self.cache_path, 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+        self.assertEqual([task['status'] for task in cached['tasks']].count("已完成"), 1)
+
+
+class TaskPollingWithoutValidatorsTest(TaskPollingTest):
+    """服务器不返回ETag时，按任务集合签名判断未变化"""
+
+    send_validators = False
+
+    def test_idle_polls_do_no_work(self):
+        stats = self.manager.task_poll_stats
+        self.poll()
+        written_at = os.stat(self.cache_path).st_mtime_ns
+        repaints = self.repaints
+
+        for _ in range(IDLE_POLLS):
+            self.poll()
+
+        self.assertEqual(stats['conversions'], 5, "空闲轮询不应转换任务")
+        self.assertEqual(stats['cache_writes'], 1, "空闲轮询不应写入缓存")
+        self.assertEqual(os.stat(self.cache_path).st_mtime_ns, written_at)
+        self.assertEqual(stats['unchanged'], IDLE_POLLS)
+        self.assertEqual(self.repaints, repaints, "空闲轮询不应重绘任务显示")
+        self.assertEqual(self.server.not_modified_count, 0)
+
+
+class TaskRefreshStallBenchmark(TaskManagerTestCase):
+    """
+    最坏情况：服务器每次延迟0.5秒并返回500个任务（首次轮询全部转换并写入缓存）。
+    刷新在后台线程执行时，界面线程事件循环的最长停顿只包括应用结果和刷新显示
+    """
+
+    task_count = SLOW_SERVER_TASKS
+    server_delay = SLOW_SERVER_DELAY
+
+    def measure_refresh(self):
+        """通过后台线程执行一次刷新，返回 (总耗时, 事件循环最长停顿)（毫秒）"""
+        manager = self.manager
+        polls = manager.task_poll_stats['polls']
+        ticks = []
+        timer = QTimer()
+        timer.setInterval(5)
+        timer.timeout.connect(lambda: ticks.append(time.perf_counter()))
+        timer.start()
+
+        start = time.perf_counter()
+        manager.refresh_task_data()
+        deadline = start + 10
+        while (manager.task_refresh_worker.isRunning() or manager.task_poll_stats['polls'] == polls) \
+                and time.perf_counter() < deadline:
+            self.app.processEvents()
+            time.sleep(0.001)
+        self.app.processEvents()
+        end = time.perf_counter()
+        timer.stop()
+
+        self.assertGreater(manager.task_poll_stats['polls'], polls, "后台刷新未完成")
+        points = [start] + ticks + [end]
+        max_gap = max(later - earlier for earlier, later in zip(points, points[1:]))
+        return (end - start) * 1000, max_gap * 1000
+
+    def test_slow_server_does_not_stall_event_loop(self):
+        manager = self.manager
+        first_ms, first_stall_ms = self.measure_refresh()
+        self.assertEqual(len(manager.current_tasks), SLOW_SERVER_TASKS)
+        self.assertEqual(manager.task_poll_stats['conversions'], SLOW_SERVER_TASKS)
+        idle_ms, idle_stall_ms = self.measure_refresh()
+        self.assertEqual(manager.task_poll_stats['unchanged'], 1)
+
+        # 对照：同样的刷新直接在界面线程执行时，事件循环停顿整个刷新过程
+        manager._tasks_signature = None
+        start = time.perf_counter()
+        self.poll()
+        blocking_ms = (time.perf_counter() - start) * 1000
+
+        print(f"\n📊 慢速服务器({SLOW_SERVER_DELAY * 1000:.0f}ms, {SLOW_SERVER_TASKS}个任务): "
+              f"首次刷新 {first_ms:.0f}ms / 最长停顿 {first_stall_ms:.1f}ms，"
+              f"空闲刷新 {idle_ms:.0f}ms / 最长停顿 {idle_stall_ms:.1f}ms，"
+              f"界面线程同步执行 {blocking_ms:.0f}ms")
+        self.assertGreaterEqual(first_ms, SLOW_SERVER_DELAY * 1000)
+        self.assertLess(first_stall_ms, SLOW_SERVER_DELAY * 1000 / 5)
+        self.assertLess(idle_stall_ms, SLOW_SERVER_DELAY * 1000 / 5)
+
+
+if __name__ == '__main__':
+    unittest.main()